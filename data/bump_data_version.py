@@ -0,0 +1,121 @@
+"""
+Bump the analytics data version after an ETL load
+The analytics API builds every response-cache key from petroverse:data_version,
+so incrementing it invalidates all cached responses at once. The new version is
+also published so API workers drop their in-process cache immediately.
+
+Loads that only touch one dataset can call invalidate_cache_tags() instead,
+which deletes just the responses tagged with that dataset (e.g. supply) and
+increments the dataset's generation so their ETags change too.
+
+notify_data_changed() queues a Postgres NOTIFY in the load's own transaction,
+so the API's live dashboard publishers refresh as soon as the load commits.
+"""
+
+import os
+import json
+import sys
+import logging
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "petroverse:data_version"
+GENERATIONS_KEY = "petroverse:cache:generations"
+INVALIDATION_CHANNEL = "petroverse:cache:invalidate"
+TAG_PREFIX = "petroverse:cache:tag"
+DATA_CHANGED_CHANNEL = "petroverse_data_changed"
+DELETE_BATCH_SIZE = 500
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def bump_data_version():
+    """
+    Increment petroverse:data_version and return the new version.
+    Returns None when Redis is unavailable; a failed bump never fails the load.
+    """
+    if not REDIS_AVAILABLE:
+        logger.warning("redis package not installed - API response cache not invalidated")
+        return None
+
+    try:
+        client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=5)
+        version = client.incr(DATA_VERSION_KEY)
+        client.publish(INVALIDATION_CHANNEL, json.dumps({"version": str(version)}))
+        client.close()
+        logger.info(f"Analytics data version bumped to {version}")
+        return version
+    except Exception as e:
+        logger.warning(f"Could not bump analytics data version: {e}")
+        return None
+
+
+def invalidate_cache_tags(tags):
+    """
+    Delete cached API responses carrying any of tags (e.g. ["dataset:supply"])
+    in pipelined batches and move each dataset tag's dataset to a new
+    generation. Returns the number of keys removed, or None when Redis is
+    unavailable.
+    """
+    if not REDIS_AVAILABLE:
+        logger.warning("redis package not installed - API response cache not invalidated")
+        return None
+
+    try:
+        client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=5, decode_responses=True)
+        version = client.get(DATA_VERSION_KEY) or "0"
+        generations = {
+            tag.split(":", 1)[1]: client.hincrby(GENERATIONS_KEY, tag.split(":", 1)[1], 1)
+            for tag in tags if tag.startswith("dataset:")
+        }
+        deleted = 0
+        for tag in tags:
+            tag_key = f"{TAG_PREFIX}:v{version}:{tag}"
+            batch = []
+            for member in client.sscan_iter(tag_key, count=DELETE_BATCH_SIZE):
+                batch.append(member)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    deleted += _unlink_batch(client, batch)
+                    batch = []
+            if batch:
+                deleted += _unlink_batch(client, batch)
+            client.unlink(tag_key)
+        client.publish(INVALIDATION_CHANNEL, json.dumps({"tags": list(tags), "generations": generations}))
+        client.close()
+        logger.info(f"Invalidated {deleted} cached responses for tags {list(tags)}")
+        return deleted
+    except Exception as e:
+        logger.warning(f"Could not invalidate cache tags {list(tags)}: {e}")
+        return None
+
+
+def notify_data_changed(cursor, datasets):
+    """
+    Queue NOTIFY petroverse_data_changed on the load's cursor. Postgres
+    delivers it on commit and drops it on rollback, so call before commit().
+    """
+    cursor.execute(
+        "SELECT pg_notify(%s, %s)",
+        (DATA_CHANGED_CHANNEL, json.dumps({"datasets": list(datasets)}))
+    )
+
+
+def _unlink_batch(client, keys):
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.unlink(key)
+    return sum(pipe.execute())
+
+
+if __name__ == "__main__":
+    version = bump_data_version()
+    if version is None:
+        print("FAILED: data version not bumped")
+        sys.exit(1)
+    print(f"Data version is now {version}")
@@ -7,6 +7,8 @@ import psycopg2
 import logging
 from datetime import datetime
 
+from refresh_monthly_cube import record_fact_load, refresh_after_load
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,7 @@ def rebuild_fact_tables():
         logger.info("Clearing existing fact tables...")
         cursor.execute("TRUNCATE TABLE petroverse.fact_bdc_transactions CASCADE")
         cursor.execute("TRUNCATE TABLE petroverse.fact_omc_transactions CASCADE")
+        record_fact_load(cursor, "rebuild_fact_tables")
         conn.commit()
         
         # Rebuild BDC fact table
@@ -120,6 +123,9 @@ def rebuild_fact_tables():
         for row in results:
             logger.info(f"{row[0]}: {row[1]:,} records, {row[2]} companies, {row[3]} products")
         
+        # Fact tables were truncated, so the monthly cube needs a full rebuild
+        refresh_after_load(conn)
+        
         return True
         
     except Exception as e:
@@ -3,10 +3,15 @@ Import Final BDC and OMC Data to Database
 Clears existing data and imports both datasets
 """
 
+import sys
 import psycopg2
 import pandas as pd
 import logging
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from refresh_monthly_cube import record_fact_load, refresh_after_load
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,6 +54,8 @@ def import_final_data():
         cursor.execute("TRUNCATE TABLE petroverse.companies CASCADE")
         cursor.execute("TRUNCATE TABLE petroverse.products CASCADE")
         cursor.execute("TRUNCATE TABLE petroverse.time_dimension CASCADE")
+        # Company/product ids change: the API stops reading the cube until it is rebuilt
+        record_fact_load(cursor, "import_final_bdc_omc_data")
         
         conn.commit()
         logger.info("All existing data cleared!")
@@ -323,6 +330,9 @@ def import_final_data():
         logger.info("DATABASE IMPORT COMPLETE!")
         logger.info("=" * 50)
         
+        # Rebuild the monthly cube on the new ids and bump the API data version
+        refresh_after_load(conn)
+        
         return True
         
     except Exception as e:
@@ -3,10 +3,15 @@ Replace Database with Final BDC Data
 Deletes all existing data and imports the final cleaned BDC extraction
 """
 
+import sys
 import psycopg2
 import pandas as pd
 import logging
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from refresh_monthly_cube import record_fact_load, refresh_after_load
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,6 +52,8 @@ def replace_database_with_final_bdc():
         cursor.execute("TRUNCATE TABLE petroverse.companies CASCADE")
         cursor.execute("TRUNCATE TABLE petroverse.products CASCADE")
         cursor.execute("TRUNCATE TABLE petroverse.time_dimension CASCADE")
+        # Company/product ids change: the API stops reading the cube until it is rebuilt
+        record_fact_load(cursor, "replace_database_with_final_bdc")
         
         conn.commit()
         logger.info("All existing data cleared!")
@@ -240,6 +247,10 @@ def replace_database_with_final_bdc():
             logger.info(f"  {row[0]}: {row[1]} products")
         
         logger.info("\nDATABASE REPLACEMENT COMPLETE!")
+        
+        # Rebuild the monthly cube on the new ids and bump the API data version
+        refresh_after_load(conn)
+        
         return True
         
     except Exception as e:
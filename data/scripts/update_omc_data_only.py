@@ -3,10 +3,15 @@ Update Database with New OMC Data Only
 Keep existing BDC data intact, replace only OMC data with updated mappings
 """
 
+import sys
 import psycopg2
 import pandas as pd
 import logging
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from refresh_monthly_cube import record_fact_load, refresh_after_load
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -199,6 +204,7 @@ def update_omc_data_only():
         """)
         omc_fact_count = cursor.rowcount
         logger.info(f"Rebuilt OMC fact table: {omc_fact_count:,} records")
+        record_fact_load(cursor, "update_omc_data_only")
         
         conn.commit()
         
@@ -263,6 +269,9 @@ def update_omc_data_only():
         logger.info("OMC DATA UPDATE COMPLETE!")
         logger.info("=" * 50)
         
+        # Rebuild the monthly cube from the new OMC facts and bump the API data version
+        refresh_after_load(conn)
+        
         return True
         
     except Exception as e:
@@ -8,6 +8,8 @@ import psycopg2
 from psycopg2.extras import execute_values
 from datetime import datetime
 
+from bump_data_version import invalidate_cache_tags, notify_data_changed
+
 def update_supply_data():
     """Replace supply data in database with new standardized data"""
     
@@ -98,10 +100,16 @@ def update_supply_data():
         inserted = cur.rowcount
         print(f"Inserted {inserted} records")
         
+        # Live dashboards refresh once this commits
+        notify_data_changed(cur, ["supply"])
+        
         # Commit transaction
         conn.commit()
         print("\nTransaction committed successfully!")
         
+        # Invalidate cached API responses built from the old supply data
+        invalidate_cache_tags(["dataset:supply"])
+        
         # Verify new data
         cur.execute("""
             SELECT year, COUNT(*) as records, COUNT(DISTINCT region) as regions,
@@ -0,0 +1,17 @@
+-- PetroVerse Fact Table Indexes
+-- Covering indexes for the ranked lists (BDC network relationships, BDC
+-- operational consistency, outlier detection). Each page aggregates or scores
+-- every transaction in the date range before ranking, so these let that scan
+-- read the index (date_id first for the date filter, then the join and group
+-- keys, with the measures included) instead of the wide fact rows.
+-- A one-off migration, applied with data/apply_fact_indexes.py (or psql, which
+-- runs each statement in its own transaction). CONCURRENTLY keeps loads able
+-- to write while the indexes build.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_fact_bdc_ranked
+    ON petroverse.fact_bdc_transactions(date_id, company_id, product_id)
+    INCLUDE (transaction_id, volume_mt, volume_liters, data_quality_score);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_fact_omc_ranked
+    ON petroverse.fact_omc_transactions(date_id, company_id, product_id)
+    INCLUDE (transaction_id, volume_mt, volume_liters, data_quality_score);
@@ -0,0 +1,72 @@
+-- PetroVerse Monthly Rollup Cube
+-- Pre-aggregated BDC/OMC facts at company x product x month x business type grain.
+-- Built and refreshed by data/refresh_monthly_cube.py; read by services/analytics/monthly_cube.py
+
+CREATE TABLE IF NOT EXISTS petroverse.agg_monthly_transactions (
+    business_type VARCHAR(3) NOT NULL,          -- 'BDC' or 'OMC' (source fact table)
+    company_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    date_id INTEGER NOT NULL,                   -- time_dimension is monthly, one date_id per month
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+
+    -- Transaction count
+    txn_count BIGINT NOT NULL,
+
+    -- Volume in liters (count: non-NULL volumes, the divisor for averages)
+    volume_liters_count BIGINT NOT NULL DEFAULT 0,
+    volume_liters_sum NUMERIC NOT NULL DEFAULT 0,
+    volume_liters_sumsq NUMERIC NOT NULL DEFAULT 0,
+    volume_liters_min NUMERIC,
+    volume_liters_max NUMERIC,
+
+    -- Volume in metric tonnes
+    volume_mt_count BIGINT NOT NULL DEFAULT 0,
+    volume_mt_sum NUMERIC NOT NULL DEFAULT 0,
+    volume_mt_sumsq NUMERIC NOT NULL DEFAULT 0,
+    volume_mt_min NUMERIC,
+    volume_mt_max NUMERIC,
+
+    -- Volume in kilograms
+    volume_kg_sum NUMERIC NOT NULL DEFAULT 0,
+
+    -- Quality
+    quality_score_sum NUMERIC NOT NULL DEFAULT 0,
+    outlier_count BIGINT NOT NULL DEFAULT 0,
+
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (business_type, date_id, company_id, product_id)
+);
+
+-- Added after the first release; months built before it are rewritten by the
+-- next refresh, whose fingerprint compares these counts
+ALTER TABLE petroverse.agg_monthly_transactions
+    ADD COLUMN IF NOT EXISTS volume_liters_count BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS volume_mt_count BIGINT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_agg_monthly_company
+    ON petroverse.agg_monthly_transactions(business_type, company_id, date_id);
+CREATE INDEX IF NOT EXISTS idx_agg_monthly_product
+    ON petroverse.agg_monthly_transactions(business_type, product_id, date_id);
+
+-- One row per refresh run; the API only reads the cube once a refresh has completed
+CREATE TABLE IF NOT EXISTS petroverse.agg_refresh_log (
+    refresh_id SERIAL PRIMARY KEY,
+    cube_name VARCHAR(100) NOT NULL,
+    refresh_mode VARCHAR(20) NOT NULL,          -- 'full' or 'incremental'
+    months_rewritten INTEGER NOT NULL DEFAULT 0,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_agg_refresh_log_cube
+    ON petroverse.agg_refresh_log(cube_name, refreshed_at DESC);
+
+-- One row per fact table load; the API reads the cube only while its last
+-- refresh is newer than the last load (loaders call record_fact_load)
+CREATE TABLE IF NOT EXISTS petroverse.fact_load_log (
+    load_id SERIAL PRIMARY KEY,
+    source VARCHAR(100) NOT NULL,               -- loader that replaced or appended facts
+    loaded_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
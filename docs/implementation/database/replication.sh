@@ -0,0 +1,3 @@
+#!/bin/bash
+# Let postgres-replica (docker-compose.yml) stream WAL from this server
+echo "host replication ${POSTGRES_USER} all scram-sha-256" >> "$PGDATA/pg_hba.conf"
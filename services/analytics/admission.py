@@ -0,0 +1,365 @@
+"""
+Admission Control
+A scheduler in front of the database pool. Work that is about to run queries
+(a response-cache miss, an export, a cache warm-up target) is admitted with a
+tenant, a priority class and a cost before it takes pooled connections:
+
+- at most ADMISSION_MAX_INFLIGHT cost units run at once per worker, and the
+  last ADMISSION_INTERACTIVE_RESERVE of them are kept for interactive requests
+- a tenant holds at most TENANT_MAX_INFLIGHT units, times its weight from
+  ADMISSION_TENANT_WEIGHTS, so one tenant's heavy dashboard cannot take the pool
+- exports and warm-up have their own caps (EXPORT_MAX_CONCURRENT,
+  WARMUP_CONCURRENCY)
+
+Work that cannot start waits: interactive first, then exports, then warm-up,
+in arrival order within a class. Interactive requests and exports are
+rejected with 429 and a Retry-After instead of waiting when ADMISSION_QUEUE_LIMIT
+callers (ADMISSION_TENANT_QUEUE_LIMIT for one tenant) are already waiting, or
+after ADMISSION_MAX_WAIT seconds; warm-up always waits.
+
+The tenant, class and cost come from the request context that the HTTP
+middleware sets (request_context / RequestContext); /api/v2/analytics/*
+requests cost 2.
+"""
+
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, NamedTuple, Optional
+
+from fastapi import HTTPException
+
+import metrics
+
+try:
+    from config import settings
+    ADMISSION_ENABLED = settings.ADMISSION_ENABLED
+    ADMISSION_MAX_INFLIGHT = settings.ADMISSION_MAX_INFLIGHT
+    ADMISSION_INTERACTIVE_RESERVE = settings.ADMISSION_INTERACTIVE_RESERVE
+    TENANT_MAX_INFLIGHT = settings.TENANT_MAX_INFLIGHT
+    ADMISSION_TENANT_WEIGHTS = settings.ADMISSION_TENANT_WEIGHTS
+    ADMISSION_QUEUE_LIMIT = settings.ADMISSION_QUEUE_LIMIT
+    ADMISSION_TENANT_QUEUE_LIMIT = settings.ADMISSION_TENANT_QUEUE_LIMIT
+    ADMISSION_MAX_WAIT = settings.ADMISSION_MAX_WAIT
+    EXPORT_MAX_CONCURRENT = settings.EXPORT_MAX_CONCURRENT
+    WARMUP_CONCURRENCY = settings.WARMUP_CONCURRENCY
+except (ImportError, AttributeError):
+    ADMISSION_ENABLED = True
+    ADMISSION_MAX_INFLIGHT = 16
+    ADMISSION_INTERACTIVE_RESERVE = 4
+    TENANT_MAX_INFLIGHT = 6
+    ADMISSION_TENANT_WEIGHTS = ""
+    ADMISSION_QUEUE_LIMIT = 64
+    ADMISSION_TENANT_QUEUE_LIMIT = 16
+    ADMISSION_MAX_WAIT = 10.0
+    EXPORT_MAX_CONCURRENT = 2
+    WARMUP_CONCURRENCY = 2
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+EXPORT = "export"
+WARMUP = "warmup"
+PRIORITIES = (INTERACTIVE, EXPORT, WARMUP)
+
+CLASS_LIMITS = {EXPORT: EXPORT_MAX_CONCURRENT, WARMUP: WARMUP_CONCURRENCY}
+
+# Route prefix -> cost units; everything else costs 1
+ROUTE_COSTS = {"/api/v2/analytics/": 2}
+
+MAX_RETRY_AFTER = 60
+
+ADMISSION_WAIT = metrics.histogram(
+    "petroverse_admission_wait_seconds",
+    "Time spent queued for admission by priority class",
+    ("priority",)
+)
+ADMISSION_REJECTED = metrics.counter(
+    "petroverse_admission_rejected_total",
+    "Work rejected with 429 by priority class and reason",
+    ("priority", "reason")
+)
+ADMISSION_IN_FLIGHT = metrics.gauge(
+    "petroverse_admission_in_flight",
+    "Admitted cost units by priority class",
+    ("priority",)
+)
+ADMISSION_QUEUED = metrics.gauge(
+    "petroverse_admission_queued",
+    "Callers waiting for admission by priority class",
+    ("priority",)
+)
+
+
+class RequestContext(NamedTuple):
+    tenant: str
+    priority: str = INTERACTIVE
+    cost: int = 1
+
+
+request_context: ContextVar[Optional[RequestContext]] = ContextVar("admission_request", default=None)
+
+
+class Overloaded(HTTPException):
+    """429 with a Retry-After hint"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail=f"Server busy ({reason}), retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.reason = reason
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    """"tenant_a:2,tenant_b:0.5" -> {"tenant_a": 2.0, "tenant_b": 0.5}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        tenant, _, weight = item.rpartition(":")
+        try:
+            weights[tenant] = float(weight)
+        except ValueError:
+            logger.warning(f"Ignoring admission weight '{item}'")
+    return weights
+
+
+def route_cost(path: str) -> int:
+    for prefix, cost in ROUTE_COSTS.items():
+        if path.startswith(prefix):
+            return cost
+    return 1
+
+
+class _Waiter:
+    __slots__ = ("tenant", "priority", "cost", "future")
+
+    def __init__(self, tenant: str, priority: str, cost: int):
+        self.tenant = tenant
+        self.priority = priority
+        self.cost = cost
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int, interactive_reserve: int, tenant_limit: int,
+                 tenant_weights: Dict[str, float], queue_limit: int, tenant_queue_limit: int,
+                 max_wait: float):
+        self.max_in_flight = max_in_flight
+        self.interactive_reserve = min(interactive_reserve, max_in_flight - 1)
+        self.tenant_limit = tenant_limit
+        self.tenant_weights = tenant_weights
+        self.queue_limit = queue_limit
+        self.tenant_queue_limit = tenant_queue_limit
+        self.max_wait = max_wait
+
+        self.in_flight = 0
+        self._by_class: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self._by_tenant: Dict[str, int] = {}
+        self._queues: Dict[str, Deque[_Waiter]] = {priority: deque() for priority in PRIORITIES}
+        self._queued_by_tenant: Dict[str, int] = {}
+        # Moving average of how long admitted work holds its units, for Retry-After
+        self._hold_seconds = 1.0
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    def _tenant_limit(self, tenant: str) -> float:
+        return self.tenant_limit * self.tenant_weights.get(tenant, 1.0)
+
+    def _blocker(self, tenant: str, priority: str, cost: int) -> Optional[str]:
+        """What stops this work from starting now, or None"""
+        # Work bigger than a limit still runs alone rather than never
+        if self.in_flight and self.in_flight + cost > self.max_in_flight:
+            return "capacity"
+        if priority != INTERACTIVE and self.in_flight + cost > self.max_in_flight - self.interactive_reserve:
+            return "capacity"
+        class_limit = CLASS_LIMITS.get(priority)
+        if class_limit is not None and self._by_class[priority] and self._by_class[priority] + cost > class_limit:
+            return "class"
+        held = self._by_tenant.get(tenant, 0)
+        if held and held + cost > self._tenant_limit(tenant):
+            return "tenant"
+        return None
+
+    def _waiting_for_capacity(self, priority: str) -> bool:
+        """A waiter of this class or a higher one is only waiting for free units"""
+        for higher in PRIORITIES[:PRIORITIES.index(priority) + 1]:
+            for waiter in self._queues[higher]:
+                if self._blocker(waiter.tenant, waiter.priority, waiter.cost) == "capacity":
+                    return True
+        return False
+
+    def _take(self, tenant: str, priority: str, cost: int) -> None:
+        self.in_flight += cost
+        self._by_class[priority] += cost
+        self._by_tenant[tenant] = self._by_tenant.get(tenant, 0) + cost
+        self._stats["admitted"] += 1
+
+    def _release(self, tenant: str, priority: str, cost: int, held: float) -> None:
+        self.in_flight -= cost
+        self._by_class[priority] -= cost
+        remaining = self._by_tenant[tenant] - cost
+        if remaining:
+            self._by_tenant[tenant] = remaining
+        else:
+            del self._by_tenant[tenant]
+        self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """
+        Admit waiters that fit now, highest class first, oldest first within a
+        class. Waiters held back by their tenant or class limit are skipped;
+        the first one waiting for free units stops the scan, so smaller work
+        behind it cannot keep taking the units it needs.
+        """
+        for priority in PRIORITIES:
+            for waiter in list(self._queues[priority]):
+                blocker = self._blocker(waiter.tenant, waiter.priority, waiter.cost)
+                if blocker is None:
+                    self._dequeue(waiter)
+                    self._take(waiter.tenant, waiter.priority, waiter.cost)
+                    waiter.future.set_result(None)
+                elif blocker == "capacity":
+                    return
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        self._queues[waiter.priority].append(waiter)
+        self._queued_by_tenant[waiter.tenant] = self._queued_by_tenant.get(waiter.tenant, 0) + 1
+        self._stats["queued"] += 1
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        self._queues[waiter.priority].remove(waiter)
+        remaining = self._queued_by_tenant[waiter.tenant] - 1
+        if remaining:
+            self._queued_by_tenant[waiter.tenant] = remaining
+        else:
+            del self._queued_by_tenant[waiter.tenant]
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog has probably drained"""
+        backlog = self.queued + 1
+        estimate = self._hold_seconds * backlog / max(self.max_in_flight, 1)
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    def _reject(self, priority: str, reason: str) -> Overloaded:
+        self._stats["rejected"] += 1
+        ADMISSION_REJECTED.inc(priority=priority, reason=reason)
+        return Overloaded(reason, self.retry_after())
+
+    def check(self, priority: str, cost: int = 1) -> None:
+        """Raise Overloaded now if work of this kind would be rejected or queued behind a full class"""
+        class_limit = CLASS_LIMITS.get(priority)
+        if class_limit is not None and self._by_class[priority] + cost > class_limit:
+            raise self._reject(priority, f"{priority} limit")
+        if self.queued >= self.queue_limit:
+            raise self._reject(priority, "queue full")
+
+    async def acquire(self, tenant: str, priority: str, cost: int) -> None:
+        bounded = priority != WARMUP
+        if self._blocker(tenant, priority, cost) is None and not self._waiting_for_capacity(priority):
+            self._take(tenant, priority, cost)
+            return
+
+        if bounded:
+            if self.queued >= self.queue_limit:
+                raise self._reject(priority, "queue full")
+            if self._queued_by_tenant.get(tenant, 0) >= self.tenant_queue_limit:
+                raise self._reject(priority, "tenant queue full")
+
+        waiter = _Waiter(tenant, priority, cost)
+        self._enqueue(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait if bounded else None)
+        except asyncio.TimeoutError:
+            # Admitted in the same loop turn as the timeout: keep the units
+            if waiter.future.done():
+                return
+            self._dequeue(waiter)
+            raise self._reject(priority, "wait timeout")
+        except asyncio.CancelledError:
+            # The caller went away; give back a slot granted meanwhile
+            if waiter.future.done():
+                self._release(tenant, priority, cost, 0.0)
+            else:
+                self._dequeue(waiter)
+            raise
+        finally:
+            ADMISSION_WAIT.observe(time.perf_counter() - started, priority=priority)
+
+    @asynccontextmanager
+    async def admit(self, tenant: str, priority: str, cost: int):
+        await self.acquire(tenant, priority, cost)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(tenant, priority, cost, time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "in_flight_by_class": dict(self._by_class),
+            "queued_by_class": {priority: len(queue) for priority, queue in self._queues.items()},
+            "busiest_tenants": dict(sorted(self._by_tenant.items(), key=lambda item: -item[1])[:5]),
+            "retry_after": self.retry_after()
+        }
+
+
+controller = AdmissionController(
+    max_in_flight=ADMISSION_MAX_INFLIGHT,
+    interactive_reserve=ADMISSION_INTERACTIVE_RESERVE,
+    tenant_limit=TENANT_MAX_INFLIGHT,
+    tenant_weights=_parse_weights(ADMISSION_TENANT_WEIGHTS),
+    queue_limit=ADMISSION_QUEUE_LIMIT,
+    tenant_queue_limit=ADMISSION_TENANT_QUEUE_LIMIT,
+    max_wait=ADMISSION_MAX_WAIT
+)
+
+
+def _resolve(priority: Optional[str]) -> RequestContext:
+    context = request_context.get() or RequestContext("anonymous")
+    if priority is not None and priority != context.priority:
+        context = context._replace(priority=priority)
+    return context
+
+
+@asynccontextmanager
+async def admit(priority: Optional[str] = None):
+    """Hold admission for the current request's tenant and class while the block runs"""
+    if not ADMISSION_ENABLED:
+        yield
+        return
+    context = _resolve(priority)
+    async with controller.admit(context.tenant, context.priority, context.cost):
+        yield
+
+
+def check(priority: Optional[str] = None) -> None:
+    """Fail fast with 429 before starting work that would be rejected (e.g. a streaming export)"""
+    if ADMISSION_ENABLED:
+        context = _resolve(priority)
+        controller.check(context.priority, context.cost)
+
+
+def _collect() -> None:
+    for priority in PRIORITIES:
+        ADMISSION_IN_FLIGHT.set(controller._by_class[priority], priority=priority)
+        ADMISSION_QUEUED.set(len(controller._queues[priority]), priority=priority)
+
+
+metrics.add_collector(_collect)
+
+
+def admission_stats() -> Dict[str, Any]:
+    return {"enabled": ADMISSION_ENABLED, **controller.stats()}
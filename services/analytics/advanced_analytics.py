@@ -6,11 +6,18 @@ Implements all 24 new charts and 12 KPIs with full data-driven calculations
 import asyncpg
 import numpy as np
 from typing import Optional, List, Dict, Any
-from datetime import datetime, date
+from datetime import date
 import pandas as pd
 from scipy import stats
 import json
 
+from combined_facts import get_combined_source, combined_raw_source
+from sql_filters import DATE_FILTERS, DIMENSION_FILTERS, FilterSet
+from pagination import Page, Ranking, SortKey
+
+# Company benchmarking binds the company id to $1, so its date slots follow it
+BENCHMARK_DATE_FILTERS = FilterSet(*DATE_FILTERS.predicates, first_slot=2)
+
 async def get_market_concentration_metrics(
     conn: asyncpg.Connection,
     start_date: Optional[str] = None,
@@ -25,32 +32,16 @@ async def get_market_concentration_metrics(
     KPI 3: Competition Intensity
     """
     
-    # Build filter conditions
-    where_conditions = ["1=1"]
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date)
-    
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date)
-    
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"c.company_id = ANY(${param_count}::integer[])")
-        params.append(company_ids)
-    
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"p.product_id = ANY(${param_count}::integer[])")
-        params.append(product_ids)
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = DIMENSION_FILTERS.sql
+    params = DIMENSION_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
     
-    where_clause = " AND ".join(where_conditions)
+    src = await get_combined_source(conn)
     
     # Calculate HHI over time
     query = f"""
@@ -61,14 +52,13 @@ async def get_market_concentration_metrics(
             c.company_id,
             c.company_name,
             c.company_type,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as company_volume,
-            SUM(SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0))) 
+            COALESCE({src.sum('volume_mt')}, 0) as company_volume,
+            SUM(COALESCE({src.sum('volume_mt')}, 0)) 
                 OVER (PARTITION BY t.year, t.month, c.company_type) as total_type_volume
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
-        LEFT JOIN petroverse.products p ON COALESCE(fb.product_id, fo.product_id) = p.product_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        LEFT JOIN petroverse.products p ON f.product_id = p.product_id
         WHERE {where_clause}
         GROUP BY t.year, t.month, c.company_id, c.company_name, c.company_type
     ),
@@ -170,20 +160,11 @@ async def get_company_benchmarking(
     Individual company benchmarking against industry
     """
     
-    # Build date filter
-    date_filter = ""
-    params = [company_id]
-    param_count = 1
-    
-    if start_date:
-        param_count += 1
-        date_filter += f" AND t.full_date >= ${param_count}"
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date)
+    # Date filter in fixed slots after the company id ($1)
+    date_filter = f"AND {BENCHMARK_DATE_FILTERS.sql}"
+    params = [company_id] + BENCHMARK_DATE_FILTERS.params(start_date=start_date, end_date=end_date)
     
-    if end_date:
-        param_count += 1
-        date_filter += f" AND t.full_date <= ${param_count}"
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date)
+    src = await get_combined_source(conn)
     
     # Get company metrics and industry benchmarks
     query = f"""
@@ -192,15 +173,14 @@ async def get_company_benchmarking(
             c.company_id,
             c.company_name,
             c.company_type,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as total_volume,
-            COUNT(DISTINCT COALESCE(fb.transaction_id, fo.transaction_id)) as total_transactions,
-            AVG(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as avg_transaction_size,
-            COUNT(DISTINCT COALESCE(fb.product_id, fo.product_id)) as product_diversity,
-            STDDEV(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as volume_stability
+            COALESCE({src.sum('volume_mt')}, 0) as total_volume,
+            {src.count()} as total_transactions,
+            {src.avg('volume_mt')} as avg_transaction_size,
+            COUNT(DISTINCT f.product_id) as product_diversity,
+            {src.stddev('volume_mt')} as volume_stability
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
         WHERE 1=1 {date_filter}
         GROUP BY c.company_id, c.company_name, c.company_type
     ),
@@ -253,11 +233,10 @@ async def get_company_benchmarking(
         SELECT 
             t.year,
             t.month,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as monthly_volume
+            COALESCE({src.sum('volume_mt')}, 0) as monthly_volume
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
         WHERE c.company_id = $1 {date_filter}
         GROUP BY t.year, t.month
         ORDER BY t.year, t.month
@@ -314,32 +293,15 @@ async def get_supply_chain_efficiency(
     KPI 5: Supply Chain Velocity
     """
     
-    # Build filters
-    where_conditions = ["1=1"]
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date)
-    
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date)
-    
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"c.company_id = ANY(${param_count}::integer[])")
-        params.append(company_ids)
-    
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"p.product_id = ANY(${param_count}::integer[])")
-        params.append(product_ids)
-    
-    where_clause = " AND ".join(where_conditions)
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = DIMENSION_FILTERS.sql
+    params = DIMENSION_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
+    src = await get_combined_source(conn)
     
     query = f"""
     WITH efficiency_metrics AS (
@@ -349,21 +311,20 @@ async def get_supply_chain_efficiency(
             c.company_type,
             p.product_category,
             COUNT(DISTINCT c.company_id) as active_companies,
-            COUNT(DISTINCT COALESCE(fb.transaction_id, fo.transaction_id)) as total_transactions,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as total_volume,
-            AVG(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as avg_transaction_size,
-            STDDEV(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as transaction_variability,
+            {src.count()} as total_transactions,
+            COALESCE({src.sum('volume_mt')}, 0) as total_volume,
+            {src.avg('volume_mt')} as avg_transaction_size,
+            {src.stddev('volume_mt')} as transaction_variability,
             -- Economic efficiency ratio (volume per transaction)
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) / 
-                NULLIF(COUNT(DISTINCT COALESCE(fb.transaction_id, fo.transaction_id)), 0) as efficiency_ratio,
+            COALESCE({src.sum('volume_mt')}, 0) / 
+                NULLIF({src.count()}, 0) as efficiency_ratio,
             -- Supply chain velocity (transactions per company)
-            COUNT(DISTINCT COALESCE(fb.transaction_id, fo.transaction_id))::float / 
+            {src.count()}::float / 
                 NULLIF(COUNT(DISTINCT c.company_id), 0) as supply_velocity
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
-        LEFT JOIN petroverse.products p ON COALESCE(fb.product_id, fo.product_id) = p.product_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        LEFT JOIN petroverse.products p ON f.product_id = p.product_id
         WHERE {where_clause}
         GROUP BY t.year, t.month, c.company_type, p.product_category
     )
@@ -548,32 +509,15 @@ async def get_seasonal_patterns_analysis(
     KPI 7: Seasonal Adjustment Factor
     """
     
-    # Build filters
-    where_conditions = ["1=1"]
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date)
-    
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date)
-    
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"c.company_id = ANY(${param_count}::integer[])")
-        params.append(company_ids)
-    
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"p.product_id = ANY(${param_count}::integer[])")
-        params.append(product_ids)
-    
-    where_clause = " AND ".join(where_conditions)
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = DIMENSION_FILTERS.sql
+    params = DIMENSION_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
+    src = await get_combined_source(conn)
     
     query = f"""
     WITH monthly_volumes AS (
@@ -582,14 +526,13 @@ async def get_seasonal_patterns_analysis(
             t.year,
             c.company_type,
             p.product_category,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as total_volume,
+            COALESCE({src.sum('volume_mt')}, 0) as total_volume,
             COUNT(DISTINCT c.company_id) as active_companies,
-            STDDEV(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as volume_variability
+            {src.stddev('volume_mt')} as volume_variability
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
-        LEFT JOIN petroverse.products p ON COALESCE(fb.product_id, fo.product_id) = p.product_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        LEFT JOIN petroverse.products p ON f.product_id = p.product_id
         WHERE {where_clause}
         GROUP BY t.month, t.year, c.company_type, p.product_category
     ),
@@ -674,20 +617,11 @@ async def get_market_dynamics_analysis(
     KPI 12: Innovation Index (based on new product adoption)
     """
     
-    # Build date filter
-    date_filter = ""
-    params = []
-    param_count = 0
+    # Canonical date filter: one SQL text per query whatever dates are set
+    date_filter = f"AND {DATE_FILTERS.sql}"
+    params = DATE_FILTERS.params(start_date=start_date, end_date=end_date)
     
-    if start_date:
-        param_count += 1
-        date_filter += f" AND t.full_date >= ${param_count}"
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date)
-    
-    if end_date:
-        param_count += 1
-        date_filter += f" AND t.full_date <= ${param_count}"
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date)
+    src = await get_combined_source(conn)
     
     # Market entry/exit analysis
     entry_exit_query = f"""
@@ -699,11 +633,10 @@ async def get_market_dynamics_analysis(
             MIN(t.full_date) as first_transaction,
             MAX(t.full_date) as last_transaction,
             COUNT(DISTINCT t.date_id) as active_periods,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as total_volume
+            COALESCE({src.sum('volume_mt')}, 0) as total_volume
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
         WHERE 1=1 {date_filter}
         GROUP BY c.company_id, c.company_name, c.company_type
     ),
@@ -735,11 +668,10 @@ async def get_market_dynamics_analysis(
             c.company_id,
             c.company_type,
             t.year,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as annual_volume
+            COALESCE({src.sum('volume_mt')}, 0) as annual_volume
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
         WHERE 1=1 {date_filter}
         GROUP BY c.company_id, c.company_type, t.year
     ),
@@ -775,13 +707,12 @@ async def get_market_dynamics_analysis(
     WITH company_sizes AS (
         SELECT 
             c.company_type,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as company_volume,
+            COALESCE({src.sum('volume_mt')}, 0) as company_volume,
             NTILE(4) OVER (PARTITION BY c.company_type 
-                           ORDER BY SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0))) as size_quartile
+                           ORDER BY COALESCE({src.sum('volume_mt')}, 0)) as size_quartile
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
         WHERE 1=1 {date_filter}
         GROUP BY c.company_id, c.company_type
     )
@@ -874,20 +805,11 @@ async def get_correlation_analysis(
     Correlation analysis between different metrics
     """
     
-    # Build date filter
-    date_filter = ""
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        date_filter += f" AND t.full_date >= ${param_count}"
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date)
+    # Canonical date filter: one SQL text per query whatever dates are set
+    date_filter = f"AND {DATE_FILTERS.sql}"
+    params = DATE_FILTERS.params(start_date=start_date, end_date=end_date)
     
-    if end_date:
-        param_count += 1
-        date_filter += f" AND t.full_date <= ${param_count}"
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date)
+    src = await get_combined_source(conn)
     
     query = f"""
     WITH metrics AS (
@@ -896,15 +818,14 @@ async def get_correlation_analysis(
             t.month,
             COUNT(DISTINCT c.company_id) as company_count,
             COUNT(DISTINCT p.product_id) as product_count,
-            SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as total_volume,
-            AVG(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as avg_transaction,
-            COUNT(DISTINCT COALESCE(fb.transaction_id, fo.transaction_id)) as transaction_count,
-            STDDEV(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as volume_volatility
+            COALESCE({src.sum('volume_mt')}, 0) as total_volume,
+            {src.avg('volume_mt')} as avg_transaction,
+            {src.count()} as transaction_count,
+            {src.stddev('volume_mt')} as volume_volatility
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
-        LEFT JOIN petroverse.products p ON COALESCE(fb.product_id, fo.product_id) = p.product_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        LEFT JOIN petroverse.products p ON f.product_id = p.product_id
         WHERE 1=1 {date_filter}
         GROUP BY t.year, t.month
     )
@@ -955,83 +876,91 @@ async def get_correlation_analysis(
     }
 
 
+OUTLIER_RANKING = Ranking(
+    "analytics:outliers",
+    sorts={
+        "z_score": SortKey("COALESCE(z_score, 0)", "numeric"),
+        "volume": SortKey("COALESCE(volume, 0)", "numeric"),
+        "date": SortKey("full_date", "date"),
+    },
+    # Transaction ids are only unique within one fact table
+    tiebreak=(SortKey("business_type", "text"), SortKey("transaction_id", "integer")),
+    default_sort="z_score",
+    default_limit=100,
+)
+
+
 async def get_outlier_detection(
     conn: asyncpg.Connection,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    page: Optional[Page] = None
 ) -> Dict[str, Any]:
     """
-    Detect outliers in transaction data
+    Detect outliers in transaction data, in pages of OUTLIER_RANKING
+    (default: top 100 by z-score). The summary counts the returned page.
     """
+    page = page or OUTLIER_RANKING.page()
     
-    # Build date filter
-    date_filter = ""
-    params = []
-    param_count = 0
+    # Canonical date filter: one SQL text per query whatever dates are set
+    date_filter = f"AND {DATE_FILTERS.sql}"
+    params = DATE_FILTERS.params(start_date=start_date, end_date=end_date)
     
-    if start_date:
-        param_count += 1
-        date_filter += f" AND t.full_date >= ${param_count}"
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date)
-    
-    if end_date:
-        param_count += 1
-        date_filter += f" AND t.full_date <= ${param_count}"
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date)
+    # Row-level outliers need individual transactions, not monthly rollups
+    src = combined_raw_source()
     
     query = f"""
     WITH transaction_stats AS (
         SELECT 
             c.company_type,
             p.product_category,
-            AVG(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as mean_volume,
-            STDDEV(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as std_volume,
-            PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as q1,
-            PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as q3
+            {src.avg('volume_mt')} as mean_volume,
+            {src.stddev('volume_mt')} as std_volume,
+            PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY f.volume_mt) as q1,
+            PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY f.volume_mt) as q3
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
-        LEFT JOIN petroverse.products p ON COALESCE(fb.product_id, fo.product_id) = p.product_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        LEFT JOIN petroverse.products p ON f.product_id = p.product_id
         WHERE 1=1 {date_filter}
         GROUP BY c.company_type, p.product_category
     ),
     outliers AS (
         SELECT 
+            f.business_type,
+            f.transaction_id,
             c.company_name,
             c.company_type,
             p.product_name,
             p.product_category,
             t.full_date,
-            COALESCE(fb.volume_mt, fo.volume_mt) as volume,
+            f.volume_mt as volume,
             ts.mean_volume,
             ts.std_volume,
             ts.q1,
             ts.q3,
             ts.q3 - ts.q1 as iqr,
             CASE 
-                WHEN COALESCE(fb.volume_mt, fo.volume_mt) > ts.q3 + 1.5 * (ts.q3 - ts.q1) THEN 'Upper Outlier'
-                WHEN COALESCE(fb.volume_mt, fo.volume_mt) < ts.q1 - 1.5 * (ts.q3 - ts.q1) THEN 'Lower Outlier'
+                WHEN f.volume_mt > ts.q3 + 1.5 * (ts.q3 - ts.q1) THEN 'Upper Outlier'
+                WHEN f.volume_mt < ts.q1 - 1.5 * (ts.q3 - ts.q1) THEN 'Lower Outlier'
                 ELSE 'Normal'
             END as outlier_type,
-            ABS((COALESCE(fb.volume_mt, fo.volume_mt) - ts.mean_volume) / NULLIF(ts.std_volume, 0)) as z_score
+            ABS((f.volume_mt - ts.mean_volume) / NULLIF(ts.std_volume, 0)) as z_score
         FROM petroverse.companies c
-        LEFT JOIN petroverse.fact_bdc_transactions fb ON c.company_id = fb.company_id
-        LEFT JOIN petroverse.fact_omc_transactions fo ON c.company_id = fo.company_id
-        LEFT JOIN petroverse.time_dimension t ON COALESCE(fb.date_id, fo.date_id) = t.date_id
-        LEFT JOIN petroverse.products p ON COALESCE(fb.product_id, fo.product_id) = p.product_id
+        LEFT JOIN {src.relation} f ON c.company_id = f.company_id
+        LEFT JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        LEFT JOIN petroverse.products p ON f.product_id = p.product_id
         JOIN transaction_stats ts ON c.company_type = ts.company_type AND p.product_category = ts.product_category
         WHERE 1=1 {date_filter}
-            AND (COALESCE(fb.volume_mt, fo.volume_mt) > ts.q3 + 1.5 * (ts.q3 - ts.q1)
-                 OR COALESCE(fb.volume_mt, fo.volume_mt) < ts.q1 - 1.5 * (ts.q3 - ts.q1)
-                 OR ABS((COALESCE(fb.volume_mt, fo.volume_mt) - ts.mean_volume) / NULLIF(ts.std_volume, 0)) > 3)
+            AND (f.volume_mt > ts.q3 + 1.5 * (ts.q3 - ts.q1)
+                 OR f.volume_mt < ts.q1 - 1.5 * (ts.q3 - ts.q1)
+                 OR ABS((f.volume_mt - ts.mean_volume) / NULLIF(ts.std_volume, 0)) > 3)
     )
     SELECT * FROM outliers
-    ORDER BY z_score DESC
-    LIMIT 100
     """
     
-    results = await conn.fetch(query, *params)
+    results = await conn.fetch(page.query(query, first_slot=DATE_FILTERS.next_slot), *params, *page.params)
+    results, next_cursor = page.split(results)
     
     # Process outliers
     outlier_list = []
@@ -1057,7 +986,8 @@ async def get_outlier_detection(
             'upper_outliers': len([o for o in outlier_list if o['outlier_type'] == 'Upper Outlier']),
             'lower_outliers': len([o for o in outlier_list if o['outlier_type'] == 'Lower Outlier']),
             'max_z_score': max([o['z_score'] for o in outlier_list]) if outlier_list else 0
-        }
+        },
+        'page': page.describe(next_cursor)
     }
 
 
@@ -1072,16 +1002,16 @@ async def get_volume_forecast(
     """
     
     # Simple query to avoid complex CTEs that cause issues
+    src = await get_combined_source(conn)
     
-    query = """
+    query = f"""
     SELECT 
         t.year,
         t.month,
         t.full_date,
-        SUM(COALESCE(fb.volume_mt, 0) + COALESCE(fo.volume_mt, 0)) as total_volume
+        COALESCE({src.sum('volume_mt')}, 0) as total_volume
     FROM petroverse.time_dimension t
-    LEFT JOIN petroverse.fact_bdc_transactions fb ON t.date_id = fb.date_id
-    LEFT JOIN petroverse.fact_omc_transactions fo ON t.date_id = fo.date_id
+    LEFT JOIN {src.relation} f ON t.date_id = f.date_id
     WHERE t.full_date IS NOT NULL
     GROUP BY t.year, t.month, t.full_date
     ORDER BY t.full_date DESC
@@ -0,0 +1,73 @@
+"""
+Authenticated User Cache
+get_current_user resolves the token's user and tenant from the database on
+every request. This keeps the resolved user in process for AUTH_CACHE_TTL
+seconds, keyed by user_id and the token's issued-at, so a fresh login always
+reads the database once and repeated calls with the same token cost nothing.
+
+Entries are tagged with their user and tenant. invalidate_user() /
+invalidate_tenant() drop them on every worker through the response cache's
+invalidation channel; changes made outside this API are picked up when the
+entry expires.
+"""
+
+from typing import Any, Dict, Optional
+
+from local_cache import LRUCache
+import response_cache
+
+try:
+    from config import settings
+    AUTH_CACHE_TTL = settings.AUTH_CACHE_TTL
+    AUTH_CACHE_MAX_ENTRIES = settings.AUTH_CACHE_MAX_ENTRIES
+except (ImportError, AttributeError):
+    AUTH_CACHE_TTL = 60
+    AUTH_CACHE_MAX_ENTRIES = 10000
+
+# Entries are small models; size them at a nominal 1 KB so only the entry
+# count limit applies
+_ENTRY_SIZE = 1024
+
+_users = LRUCache(
+    max_entries=AUTH_CACHE_MAX_ENTRIES,
+    max_bytes=AUTH_CACHE_MAX_ENTRIES * _ENTRY_SIZE,
+    ttl=AUTH_CACHE_TTL
+)
+
+
+def _key(user_id: str, issued_at: Any) -> str:
+    return f"{user_id}:{issued_at}"
+
+
+def get_user(user_id: str, issued_at: Any) -> Optional[Any]:
+    return _users.get(_key(user_id, issued_at))
+
+
+def set_user(user_id: str, issued_at: Any, user: Any, tenant_id: str) -> None:
+    _users.set(
+        _key(user_id, issued_at), user, _ENTRY_SIZE,
+        tags=(f"user:{user_id}", f"tenant:{tenant_id}")
+    )
+
+
+def _handle_invalidation(message: Dict[str, Any]) -> None:
+    for tag in message.get("auth", []):
+        _users.delete_tag(tag)
+
+
+response_cache.add_invalidation_handler(_handle_invalidation)
+
+
+async def invalidate_user(user_id: str) -> None:
+    """Forget a user's resolved identity after it changes"""
+    await response_cache.publish_invalidation({"auth": [f"user:{user_id}"]})
+
+
+async def invalidate_tenant(tenant_id: str) -> None:
+    """Forget every user of a tenant after the tenant changes"""
+    await response_cache.publish_invalidation({"auth": [f"tenant:{tenant_id}"]})
+
+
+def auth_cache_stats() -> Dict[str, Any]:
+    stats = _users.stats()
+    return {key: stats[key] for key in ("entries", "hits", "misses", "hit_rate", "evictions", "expirations")}
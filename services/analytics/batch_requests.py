@@ -0,0 +1,251 @@
+"""
+Batch Requests
+POST /api/v2/batch answers the many GET calls a dashboard page makes on load
+in one round trip:
+
+    {"params": {"start_date": "2024-01-01", "end_date": "2024-06-30"},
+     "requests": [{"id": "performance", "endpoint": "/api/v2/bdc/performance"},
+                  {"id": "growth", "endpoint": "/api/v2/bdc/growth",
+                   "params": {"product_ids": "1,2"}}]}
+
+The caller is authenticated once, for the batch; endpoints that take the
+current user get that user. Batch-level params are shared filters applied to
+every sub-request whose endpoint accepts them (its own params, or a query
+string in endpoint, take precedence). Parameters are validated exactly as the
+endpoint's GET would validate them, and sub-requests that resolve to the same
+endpoint and values run once. Up to BATCH_CONCURRENCY run at a time, each
+admitted and cached as a separate request would be.
+
+Results stream back as NDJSON in completion order, one line per request id:
+
+    {"id": "growth", "endpoint": "/api/v2/bdc/growth", "status": 200, "data": {...}}
+    {"id": "performance", "endpoint": "/api/v2/bdc/performance", "status": 429, "error": "..."}
+
+Cached payloads are spliced into the line as their encoded bytes, not parsed
+again. Only plain GET endpoints can be batched: exports, admin and auth
+routes, and routes with headers, bodies or other dependencies are refused.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from fastapi import HTTPException, Response
+from fastapi.dependencies.utils import request_params_to_args
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+from starlette.datastructures import QueryParams
+
+import admission
+import binary_formats
+import metrics
+import response_cache
+from fast_json import dumps
+
+try:
+    from config import settings
+    BATCH_MAX_REQUESTS = settings.BATCH_MAX_REQUESTS
+    BATCH_CONCURRENCY = settings.BATCH_CONCURRENCY
+except (ImportError, AttributeError):
+    BATCH_MAX_REQUESTS = 20
+    BATCH_CONCURRENCY = 4
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPE = "application/x-ndjson"
+# Routes that cannot run inside a batch even though they are GETs
+EXCLUDED_PREFIXES = ("/api/v2/export/", "/api/v2/admin/", "/api/v2/auth/", "/api/v2/test/")
+
+BATCH_ITEM_DURATION = metrics.histogram(
+    "petroverse_batch_item_duration_seconds",
+    "Latency of batched sub-requests by route template and status",
+    ("route", "status")
+)
+BATCH_ITEMS = metrics.counter(
+    "petroverse_batch_items_total",
+    "Batched sub-requests, by whether they ran or reused an identical one",
+    ("result",)
+)
+
+
+class BatchItem(BaseModel):
+    id: Optional[Union[str, int]] = None
+    endpoint: str
+    params: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1)
+    params: Dict[str, Any] = {}
+
+
+class _Call(NamedTuple):
+    """One distinct endpoint invocation and the request ids waiting for it"""
+    route: APIRoute
+    arguments: Dict[str, Any]
+    ids: List[Union[str, int]]
+    endpoint: str
+
+
+_app = None
+_user_dependency: Optional[Callable] = None
+
+
+def init(app, user_dependency: Callable) -> None:
+    """Routes are looked up on app; user_dependency is the dependency the batch already resolved"""
+    global _app, _user_dependency
+    _app = app
+    _user_dependency = user_dependency
+
+
+def _batchable(route: Any) -> bool:
+    if not isinstance(route, APIRoute) or "GET" not in route.methods:
+        return False
+    if not route.path.startswith("/api/v2/") or route.path.startswith(EXCLUDED_PREFIXES):
+        return False
+    dependant = route.dependant
+    if dependant.header_params or dependant.cookie_params or dependant.body_params:
+        return False
+    return all(dependency.call is _user_dependency for dependency in dependant.dependencies)
+
+
+def _match(path: str) -> Optional[tuple]:
+    """(route, raw path parameters) of the batchable route serving path"""
+    for route in _app.routes:
+        match = getattr(route, "path_regex", None) and route.path_regex.match(path)
+        if match and _batchable(route):
+            return route, match.groupdict()
+    return None
+
+
+def _query(params: Dict[str, Any]) -> QueryParams:
+    """JSON parameter values as the query string a GET would have sent"""
+    pairs = []
+    for name, value in params.items():
+        for item in value if isinstance(value, list) else [value]:
+            if item is None:
+                continue
+            if isinstance(item, bool):
+                item = "true" if item else "false"
+            pairs.append((name, str(item)))
+    return QueryParams(pairs)
+
+
+def _error(status: int, detail: Any) -> HTTPException:
+    return HTTPException(status_code=status, detail=detail)
+
+
+def _resolve(item: BatchItem, shared: Dict[str, Any], user: Any) -> tuple:
+    """(route, validated endpoint arguments) for one sub-request; raises HTTPException"""
+    target = urlsplit(item.endpoint)
+    found = _match(target.path)
+    if found is None:
+        raise _error(404, f"No batchable endpoint at '{target.path}'")
+    route, path_values = found
+    dependant = route.dependant
+
+    accepted = {param.alias for param in dependant.query_params}
+    params = {name: value for name, value in shared.items() if name in accepted}
+    params.update(parse_qsl(target.query))
+    params.update(item.params)
+
+    arguments, errors = request_params_to_args(dependant.query_params, _query(params))
+    path_arguments, path_errors = request_params_to_args(dependant.path_params, path_values)
+    if errors or path_errors:
+        raise _error(422, jsonable_encoder(errors + path_errors))
+    arguments.update(path_arguments)
+    for dependency in dependant.dependencies:
+        arguments[dependency.name] = user
+    return route, arguments
+
+
+def plan(batch: BatchRequest, user: Any) -> tuple:
+    """
+    Validate every sub-request up front. Returns (calls, failures): distinct
+    endpoint invocations, and lines for sub-requests that cannot run.
+    """
+    if len(batch.requests) > BATCH_MAX_REQUESTS:
+        raise _error(400, f"A batch holds at most {BATCH_MAX_REQUESTS} requests")
+
+    calls: Dict[str, _Call] = {}
+    failures: List[bytes] = []
+    for index, item in enumerate(batch.requests):
+        request_id = item.id if item.id is not None else index
+        try:
+            route, arguments = _resolve(item, batch.params, user)
+        except HTTPException as e:
+            failures.append(_line(request_id, item.endpoint, e.status_code, error=e.detail))
+            continue
+
+        key_params = {name: value for name, value in arguments.items() if value is not user}
+        key = route.path + json.dumps(response_cache.normalize_params(key_params), sort_keys=True, default=str)
+        if key in calls:
+            calls[key].ids.append(request_id)
+            BATCH_ITEMS.inc(result="deduplicated")
+        else:
+            calls[key] = _Call(route, arguments, [request_id], item.endpoint)
+    return list(calls.values()), failures
+
+
+def _line(request_id: Any, endpoint: str, status: int, data: Optional[bytes] = None,
+          error: Any = None) -> bytes:
+    head = dumps({"id": request_id, "endpoint": endpoint, "status": status})
+    if data is not None:
+        return head[:-1] + b',"data":' + data + b"}\n"
+    return head[:-1] + b',"error":' + dumps(error) + b"}\n"
+
+
+async def _run(call: _Call, context: admission.RequestContext, slots: asyncio.Semaphore) -> tuple:
+    """(call, status, JSON bytes or None, error) of one distinct sub-request"""
+    async with slots:
+        # Runs in its own task: set the context its endpoint would see as a GET
+        binary_formats.request_format.set(("", None))
+        response_cache.if_none_match.set(None)
+        response_cache.request_method.set("GET")
+        admission.request_context.set(context._replace(cost=admission.route_cost(call.route.path)))
+        started = time.perf_counter()
+        status = 500
+        try:
+            result = await call.route.dependant.call(**call.arguments)
+            if isinstance(result, Response):
+                # Cached endpoints hand back the encoded JSON they would have sent
+                status = result.status_code
+                return call, status, result.body, None
+            status = 200
+            return call, status, dumps(result), None
+        except HTTPException as e:
+            status = e.status_code
+            return call, status, None, e.detail
+        except Exception as e:
+            logger.exception(f"Batched request to {call.endpoint} failed: {e}")
+            return call, status, None, "Internal server error"
+        finally:
+            BATCH_ITEMS.inc(result="executed")
+            BATCH_ITEM_DURATION.observe(time.perf_counter() - started, route=call.route.path, status=str(status))
+
+
+async def stream(calls: List[_Call], failures: List[bytes]) -> AsyncIterator[bytes]:
+    """NDJSON lines: refused sub-requests first, then results as each finishes"""
+    for line in failures:
+        yield line
+    if not calls:
+        return
+
+    context = admission.request_context.get()
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+    pending = {asyncio.create_task(_run(call, context, slots)) for call in calls}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                call, status, data, error = task.result()
+                for request_id in call.ids:
+                    yield _line(request_id, call.endpoint, status, data=data, error=error)
+    finally:
+        # Client went away: stop the sub-requests still running
+        for task in pending:
+            task.cancel()
@@ -3,50 +3,66 @@
 # All metrics are 100% database-driven with no synthetic data
 
 from typing import Optional, List, Dict, Any
-from datetime import datetime, date
 import asyncpg
-from decimal import Decimal
+
+from pagination import Page, Ranking, SortKey
+from sql_filters import FACT_FILTERS
+
+OPERATIONAL_RANKING = Ranking(
+    "bdc:operational",
+    sorts={
+        "total_volume_mt": SortKey("COALESCE(total_volume_mt, 0)", "numeric"),
+        "total_transactions": SortKey("total_transactions", "bigint"),
+        "products_handled": SortKey("products_handled", "bigint"),
+        "active_months": SortKey("active_months", "bigint"),
+        "avg_quality_score": SortKey("COALESCE(avg_quality_score, 0)", "numeric"),
+        "consistency_score": SortKey("consistency_score", "numeric"),
+        "monthly_avg_volume_mt": SortKey("COALESCE(monthly_avg_volume_mt, 0)", "numeric"),
+    },
+    tiebreak=(SortKey("company_name", "text"),),
+    default_sort="total_volume_mt",
+    default_limit=20,
+)
+
+NETWORK_RANKING = Ranking(
+    "bdc:network",
+    sorts={
+        "total_volume_mt": SortKey("total_volume_mt", "numeric"),
+        "transaction_count": SortKey("transaction_count", "bigint"),
+        "avg_volume_mt": SortKey("avg_volume_mt", "numeric"),
+        "active_months": SortKey("active_months", "bigint"),
+        "last_transaction_date": SortKey("last_transaction_date", "date"),
+    },
+    tiebreak=(SortKey("company_name", "text"), SortKey("product_name", "text")),
+    default_sort="total_volume_mt",
+    default_limit=100,
+)
 
 async def get_bdc_operational_metrics(
     conn: asyncpg.Connection,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     company_ids: Optional[List[int]] = None,
-    product_ids: Optional[List[int]] = None
+    product_ids: Optional[List[int]] = None,
+    page: Optional[Page] = None
 ) -> Dict[str, Any]:
     """
     Calculate operational efficiency metrics for BDC companies.
+    Companies are ranked in pages of OPERATIONAL_RANKING (default: top 20 by volume).
     """
-    
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date())
-    
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"f.company_id = ANY(${param_count}::integer[])")
-        params.append(company_ids)
-    
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"f.product_id = ANY(${param_count}::integer[])")
-        params.append(product_ids)
-    
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-    
-    # 1. Operational Consistency Metrics
-    operational_consistency = await conn.fetch(f"""
+    page = page or OPERATIONAL_RANKING.page()
+    
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = FACT_FILTERS.sql
+    params = FACT_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
+    
+    # 1. Operational Consistency Metrics (ranks are over all companies, not the page)
+    operational_consistency = await conn.fetch(page.query(f"""
         WITH company_metrics AS (
             SELECT 
                 c.company_name,
@@ -86,9 +102,8 @@ async def get_bdc_operational_metrics(
             RANK() OVER (ORDER BY avg_quality_score DESC) as quality_rank,
             RANK() OVER (ORDER BY products_handled DESC) as diversity_rank
         FROM company_metrics
-        ORDER BY total_volume_mt DESC
-        LIMIT 20
-    """, *params)
+    """, first_slot=FACT_FILTERS.next_slot), *params, *page.params)
+    operational_consistency, next_cursor = page.split(operational_consistency)
     
     # 2. Product Flow Analysis
     product_flow = await conn.fetch(f"""
@@ -247,7 +262,8 @@ async def get_bdc_operational_metrics(
     """, *params)
     
     return {
-        "operational_consistency": [dict(row) for row in operational_consistency],
+        "operational_consistency": operational_consistency,
+        "page": page.describe(next_cursor),
         "product_flow": [dict(row) for row in product_flow],
         "temporal_patterns": [dict(row) for row in temporal_patterns],
         "quality_metrics": dict(quality_metrics) if quality_metrics else {},
@@ -266,32 +282,14 @@ async def get_bdc_growth_analytics(
     Calculate growth and trend analytics for BDC operations.
     """
     
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date())
-    
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"f.company_id = ANY(${param_count}::integer[])")
-        params.append(company_ids)
-    
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"f.product_id = ANY(${param_count}::integer[])")
-        params.append(product_ids)
-    
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = FACT_FILTERS.sql
+    params = FACT_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
     
     # 1. Year-over-Year Growth Analysis
     yoy_growth = await conn.fetch(f"""
@@ -436,32 +434,14 @@ async def get_bdc_supply_chain_analytics(
     Focuses on product supply chain risk, volatility, and diversification metrics.
     """
     
-    # Build WHERE clause
-    where_conditions = ["1=1"]
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date())
-        
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date())
-        
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"f.company_id = ANY(${param_count})")
-        params.append(company_ids)
-        
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"f.product_id = ANY(${param_count})")
-        params.append(product_ids)
-        
-    where_clause = " AND ".join(where_conditions)
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = FACT_FILTERS.sql
+    params = FACT_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
     
     # Product Supply Chain Resilience Analysis with dynamic thresholds
     supply_chain_resilience = await conn.fetch(f"""
@@ -568,41 +548,26 @@ async def get_bdc_network_analytics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     company_ids: Optional[List[int]] = None,
-    product_ids: Optional[List[int]] = None
+    product_ids: Optional[List[int]] = None,
+    page: Optional[Page] = None
 ) -> Dict[str, Any]:
     """
     Analyze BDC network relationships and product-company dynamics.
+    Relationships are returned in pages of NETWORK_RANKING (default: top 100 by volume).
     """
+    page = page or NETWORK_RANKING.page()
     
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    param_count = 0
-    
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date())
-    
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"f.company_id = ANY(${param_count}::integer[])")
-        params.append(company_ids)
-    
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"f.product_id = ANY(${param_count}::integer[])")
-        params.append(product_ids)
-    
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = FACT_FILTERS.sql
+    params = FACT_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
     
     # Company-Product Network
-    network_data = await conn.fetch(f"""
+    network_data = await conn.fetch(page.query(f"""
         SELECT 
             c.company_name,
             p.product_name,
@@ -621,10 +586,10 @@ async def get_bdc_network_analytics(
         WHERE {where_clause}
         GROUP BY c.company_name, p.product_name, p.product_category
         HAVING SUM(f.volume_mt) > 100  -- Filter out very small relationships
-        ORDER BY total_volume_mt DESC
-        LIMIT 100
-    """, *params)
+    """, first_slot=FACT_FILTERS.next_slot), *params, *page.params)
+    network_data, next_cursor = page.split(network_data)
     
     return {
-        "network_relationships": [dict(row) for row in network_data]
+        "network_relationships": network_data,
+        "page": page.describe(next_cursor)
     }
\ No newline at end of file
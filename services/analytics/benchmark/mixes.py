@@ -0,0 +1,81 @@
+"""
+Benchmark Request Mixes
+Weighted dashboard traffic for run_benchmark.py. Each entry is
+(weight, label, path, parameter choices); a request picks one value per
+parameter from its choices (None leaves the parameter out), so a mix covers
+the unfiltered first load and the filter combinations users switch between.
+A "date_range" choice is a (start_date, end_date) pair.
+
+Weights follow how the web dashboards load: a page fires all of its section
+endpoints, and the executive and BDC/OMC pages are opened most.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Choices = Dict[str, Sequence[Optional[Any]]]
+Entry = Tuple[int, str, str, Choices]
+
+DATE_RANGES = [
+    (None, None),
+    ("2021-01-01", "2021-12-31"),
+    ("2022-01-01", "2022-12-31"),
+    ("2023-01-01", "2023-12-31"),
+    ("2024-01-01", "2024-06-30"),
+]
+
+TOP_N = [None, 10, 100]
+COMPANY_IDS = [None, None, None, "1,2,3", "5"]
+PRODUCT_IDS = [None, None, "1", "1,2"]
+REGIONS = [None, None, "Greater Accra", "Ashanti,Western"]
+BUSINESS_TYPES = [None, "BDC", "OMC"]
+
+EXECUTIVE: List[Entry] = [
+    (6, "executive.summary", "/api/v2/executive/summary", {}),
+    (8, "executive.summary_filtered", "/api/v2/executive/summary/filtered",
+     {"date_range": DATE_RANGES, "top_n": [10], "company_ids": COMPANY_IDS, "product_ids": PRODUCT_IDS}),
+    (3, "products.analysis", "/api/v2/products/analysis", {}),
+    (2, "filters", "/api/v2/filters", {}),
+]
+
+BDC: List[Entry] = [
+    (8, "bdc.comprehensive", "/api/v2/bdc/comprehensive",
+     {"date_range": DATE_RANGES, "top_n": TOP_N, "company_ids": COMPANY_IDS, "product_ids": PRODUCT_IDS}),
+    (3, "bdc.performance", "/api/v2/bdc/performance", {}),
+    (2, "bdc.operational", "/api/v2/bdc/operational", {"date_range": DATE_RANGES, "company_ids": COMPANY_IDS}),
+    (2, "bdc.growth", "/api/v2/bdc/growth", {"date_range": DATE_RANGES, "product_ids": PRODUCT_IDS}),
+]
+
+OMC: List[Entry] = [
+    (8, "omc.comprehensive", "/api/v2/omc/comprehensive",
+     {"date_range": DATE_RANGES, "top_n": TOP_N, "company_ids": COMPANY_IDS, "product_ids": PRODUCT_IDS}),
+    (3, "omc.performance", "/api/v2/omc/performance", {}),
+]
+
+SUPPLY: List[Entry] = [
+    (5, "supply.kpi", "/api/v2/supply/kpi", {"date_range": DATE_RANGES, "regions": REGIONS}),
+    (4, "supply.regional", "/api/v2/supply/regional", {"date_range": DATE_RANGES, "regions": REGIONS, "top_n": [None, 10]}),
+    (3, "supply.growth", "/api/v2/supply/growth", {"date_range": DATE_RANGES, "regions": REGIONS}),
+    (2, "supply.performance", "/api/v2/supply/performance", {"date_range": DATE_RANGES}),
+    (2, "supply.quality", "/api/v2/supply/quality", {"date_range": DATE_RANGES, "regions": REGIONS}),
+]
+
+ADVANCED: List[Entry] = [
+    (3, "analytics.market_concentration", "/api/v2/analytics/market-concentration",
+     {"date_range": DATE_RANGES, "business_type": BUSINESS_TYPES}),
+    (2, "analytics.supply_chain_efficiency", "/api/v2/analytics/supply-chain-efficiency",
+     {"date_range": DATE_RANGES, "company_ids": COMPANY_IDS}),
+    (2, "analytics.market_dynamics", "/api/v2/analytics/market-dynamics",
+     {"date_range": DATE_RANGES, "business_type": BUSINESS_TYPES}),
+    (2, "analytics.product_dependency_risk", "/api/v2/analytics/product-dependency-risk", {"date_range": DATE_RANGES}),
+    (2, "analytics.company_benchmarking", "/api/v2/analytics/company-benchmarking", {"date_range": DATE_RANGES}),
+    (1, "analytics.volume_forecast", "/api/v2/analytics/volume-forecast", {"periods": [6, 12]}),
+]
+
+MIXES: Dict[str, List[Entry]] = {
+    "dashboard": EXECUTIVE + BDC + OMC + SUPPLY + ADVANCED,
+    "executive": EXECUTIVE,
+    "bdc": BDC,
+    "omc": OMC,
+    "supply": SUPPLY,
+    "advanced": ADVANCED,
+}
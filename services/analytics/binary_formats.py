@@ -0,0 +1,193 @@
+"""
+Binary Response Formats
+Content negotiation for large analytics payloads. JSON stays the default;
+clients that send
+
+    Accept: application/vnd.apache.arrow.stream    (Arrow IPC stream)
+    Accept: application/msgpack                    (MessagePack)
+
+get column-oriented buffers instead of lists of row dicts.
+
+MessagePack keeps the payload's shape but every list of records becomes a
+column dict ({"region": [...], "total_quantity": [...]}). An Arrow stream holds
+one table: the one named by the ``table`` query parameter, otherwise the
+largest in the payload. The remaining non-tabular fields and the names of all
+tables travel in the schema metadata ("meta", "tables").
+
+Both libraries are optional; without them the API keeps answering JSON.
+"""
+
+import json
+import datetime
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Response
+
+from fast_json import loads
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+# (Accept header, ?table=) of the current request, set by middleware in main.py
+request_format: ContextVar[Tuple[str, Optional[str]]] = ContextVar("request_format", default=("", None))
+
+
+def negotiate(accept: str) -> Optional[str]:
+    """'arrow', 'msgpack' or None (JSON) for an Accept header, honouring q-values"""
+    if not accept:
+        return None
+
+    choices = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *options = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for option in options:
+            if option.startswith("q="):
+                try:
+                    quality = float(option[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            choices.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(choices):
+        if media_type == ARROW_MEDIA_TYPE and ARROW_AVAILABLE:
+            return "arrow"
+        if media_type in MSGPACK_MEDIA_TYPES and MSGPACK_AVAILABLE:
+            return "msgpack"
+        if media_type in ("application/json", "*/*", "application/*"):
+            return None
+    return None
+
+
+def is_table(value: Any) -> bool:
+    """A non-empty list of records (asyncpg Records or dicts)"""
+    return (
+        isinstance(value, list) and len(value) > 0
+        and all(isinstance(row, Mapping) or hasattr(row, "items") for row in value)
+    )
+
+
+def to_columns(rows: List[Any]) -> Dict[str, List[Any]]:
+    """Column dict from records; keys missing from a row become None"""
+    names: Dict[str, None] = {}
+    for row in rows:
+        for name in row.keys():
+            names.setdefault(name, None)
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def _columnar(value: Any) -> Any:
+    if is_table(value):
+        return {name: [_columnar(v) for v in column] for name, column in to_columns(value).items()}
+    if isinstance(value, Mapping):
+        return {key: _columnar(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_columnar(v) for v in value]
+    return value
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} to msgpack")
+
+
+def encode_msgpack(payload: Any) -> bytes:
+    return msgpack.packb(_columnar(payload), default=_msgpack_default, use_bin_type=True)
+
+
+def _tables(payload: Any, prefix: str = "") -> Dict[str, List[Any]]:
+    """Every table in the payload keyed by its dotted path"""
+    if is_table(payload):
+        return {prefix or "data": payload}
+    found = {}
+    if isinstance(payload, Mapping):
+        for key, value in payload.items():
+            found.update(_tables(value, f"{prefix}.{key}" if prefix else str(key)))
+    return found
+
+
+def _without_tables(payload: Any) -> Any:
+    if is_table(payload):
+        return None
+    if isinstance(payload, Mapping):
+        return {key: _without_tables(v) for key, v in payload.items() if not is_table(v)}
+    return payload
+
+
+def _arrow_array(values: List[Any]) -> "pa.Array":
+    """Arrow column with an inferred type; mixed-type columns fall back to strings"""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def encode_arrow(payload: Any, table: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+    """Arrow IPC stream of one table; returns (body, table name)"""
+    tables = _tables(payload)
+    if table not in tables:
+        table = max(tables, key=lambda name: len(tables[name])) if tables else None
+
+    columns = {name: _arrow_array(values) for name, values in to_columns(tables[table]).items()} if table else {}
+    metadata = {
+        "table": table or "",
+        "tables": json.dumps(sorted(tables)),
+        "meta": json.dumps(_without_tables(payload), default=str),
+    }
+    arrow_table = pa.table(columns).replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return sink.getvalue().to_pybytes(), table
+
+
+def variant() -> str:
+    """Representation the current request will get, e.g. 'json' or 'arrow:product_flow'"""
+    accept, table = request_format.get()
+    fmt = negotiate(accept) or "json"
+    return f"{fmt}:{table}" if fmt == "arrow" and table else fmt
+
+
+def render(body: bytes) -> Response:
+    """
+    Response for the current request's Accept header from encoded JSON bytes;
+    JSON requests get the bytes unchanged
+    """
+    accept, table = request_format.get()
+    fmt = negotiate(accept)
+    if fmt is None:
+        return Response(body, media_type="application/json", headers={"Vary": "Accept"})
+
+    payload = loads(body)
+
+    if fmt == "msgpack":
+        return Response(encode_msgpack(payload), media_type=MSGPACK_MEDIA_TYPE, headers={"Vary": "Accept"})
+
+    body, table = encode_arrow(payload, table)
+    headers = {"Vary": "Accept"}
+    if table:
+        headers["X-Arrow-Table"] = table
+    return Response(body, media_type=ARROW_MEDIA_TYPE, headers=headers)
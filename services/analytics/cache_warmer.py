@@ -0,0 +1,201 @@
+"""
+Response Cache Warmer
+Precomputes the default dashboard payloads into the response cache so the
+first users after a deploy, a Redis flush or an ETL load do not wait through
+cold multi-query runs.
+
+A warm-up runs in the background at startup and again whenever the data
+version moves or a dataset's tags are invalidated (the ETL's post-load
+message on the invalidation channel). Each target is a @cached_response
+endpoint called in process with one parameter combination, so its result
+lands in Redis and this worker's LRU exactly as a real request would put it
+there. At most WARMUP_CONCURRENCY targets run at once, in the admission
+controller's lowest class, to leave the pool to real traffic, and a Redis
+lock per data version keeps workers from warming side by side; a worker that
+finds the lock taken reads the results from Redis on first use.
+
+Progress is reported on /health.
+"""
+
+import time
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi.params import Param
+
+import admission
+import response_cache
+
+try:
+    from config import settings
+    CACHE_WARMUP_ENABLED = settings.CACHE_WARMUP_ENABLED
+    WARMUP_CONCURRENCY = settings.WARMUP_CONCURRENCY
+except (ImportError, AttributeError):
+    CACHE_WARMUP_ENABLED = True
+    WARMUP_CONCURRENCY = 2
+
+logger = logging.getLogger(__name__)
+
+WARMUP_LOCK_PREFIX = "petroverse:cache:warming"
+WARMUP_LOCK_TTL = 300
+
+
+class WarmupTarget:
+    """One endpoint call to precompute; datasets match its @cached_response datasets"""
+
+    def __init__(self, endpoint: Callable, datasets: Sequence[str], **params: Any):
+        self.endpoint = endpoint
+        self.datasets = datasets
+        self.params = params
+
+    @property
+    def name(self) -> str:
+        if not self.params:
+            return self.endpoint.__name__
+        args = ", ".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.endpoint.__name__}({args})"
+
+    def arguments(self) -> Dict[str, Any]:
+        """Every argument the endpoint takes, with Query(...) defaults resolved"""
+        arguments = {}
+        for name, parameter in inspect.signature(self.endpoint).parameters.items():
+            if name in self.params:
+                arguments[name] = self.params[name]
+            elif isinstance(parameter.default, Param):
+                arguments[name] = parameter.default.default
+            elif parameter.default is not inspect.Parameter.empty:
+                arguments[name] = parameter.default
+        return arguments
+
+
+_redis = None
+_targets: List[WarmupTarget] = []
+_state: Dict[str, Any] = {
+    "task": None,
+    "pending": None,
+    "status": "idle",
+    "trigger": None,
+    "total": 0,
+    "completed": 0,
+    "failed": 0,
+    "started_at": None,
+    "duration_ms": None,
+    "last_error": None,
+    "runs": 0
+}
+
+
+def init(redis_client, targets: Sequence[WarmupTarget]) -> None:
+    global _redis
+    _redis = redis_client
+    _targets[:] = targets
+
+
+async def _warm_one(target: WarmupTarget, slots: asyncio.Semaphore) -> None:
+    async with slots:
+        admission.request_context.set(admission.RequestContext("warmup", admission.WARMUP))
+        try:
+            await target.endpoint(**target.arguments())
+            _state["completed"] += 1
+        except Exception as e:
+            _state["failed"] += 1
+            _state["last_error"] = f"{target.name}: {e}"
+            logger.warning(f"Cache warm-up of {target.name} failed: {e}")
+
+
+async def _acquire_lock(lock: str) -> bool:
+    """Only one worker warms a given version/dataset set at a time; True if it is us"""
+    if _redis is None:
+        return True
+    try:
+        return bool(await _redis.set(lock, "1", nx=True, ex=WARMUP_LOCK_TTL))
+    except Exception as e:
+        logger.warning(f"Cache warm-up lock unavailable, warming anyway: {e}")
+        return True
+
+
+async def _release_lock(lock: str) -> None:
+    if _redis is not None:
+        try:
+            await _redis.delete(lock)
+        except Exception:
+            pass
+
+
+async def _run(trigger: str, datasets: Optional[Sequence[str]]) -> None:
+    while True:
+        targets = [t for t in _targets if datasets is None or set(t.datasets) & set(datasets)]
+        _state.update(status="running", trigger=trigger, total=len(targets), completed=0,
+                      failed=0, started_at=time.time(), duration_ms=None, last_error=None)
+        started = time.perf_counter()
+
+        version = await response_cache.get_data_version()
+        lock = f"{WARMUP_LOCK_PREFIX}:v{version}:{','.join(datasets or ['all'])}"
+        if not await _acquire_lock(lock):
+            _state.update(status="skipped", total=0)
+            logger.info(f"Cache warm-up ({trigger}) already running on another worker")
+        else:
+            slots = asyncio.Semaphore(WARMUP_CONCURRENCY)
+            try:
+                await asyncio.gather(*(_warm_one(target, slots) for target in targets))
+            finally:
+                await _release_lock(lock)
+            _state["status"] = "done"
+            _state["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(
+                f"Cache warm-up ({trigger}): {_state['completed']}/{len(targets)} "
+                f"targets in {_state['duration_ms']} ms"
+            )
+        _state["runs"] += 1
+
+        # Another load finished while we were warming: go again for it
+        if _state["pending"] is None:
+            return
+        trigger, datasets = _state["pending"]
+        _state["pending"] = None
+
+
+def start(trigger: str = "startup", datasets: Optional[Sequence[str]] = None) -> None:
+    """Warm the cache in the background; a request made during a run is queued behind it"""
+    if not CACHE_WARMUP_ENABLED or not response_cache.RESPONSE_CACHE_ENABLED or not _targets:
+        return
+    task = _state["task"]
+    if task is not None and not task.done():
+        pending = _state["pending"]
+        if pending is None:
+            merged = datasets
+        elif datasets is None or pending[1] is None:
+            merged = None
+        else:
+            merged = sorted(set(pending[1]) | set(datasets))
+        _state["pending"] = (trigger if pending is None else "reload", merged)
+        return
+    _state["task"] = asyncio.create_task(_run(trigger, datasets))
+
+
+def _handle_invalidation(message: Dict[str, Any]) -> None:
+    # Post-ETL hook: a version bump or dataset tag invalidation
+    if "version" in message:
+        start(f"version-{message['version']}")
+    elif message.get("tags"):
+        datasets = sorted(tag.split(":", 1)[1] for tag in message["tags"] if tag.startswith("dataset:"))
+        if datasets:
+            start("dataset-" + "-".join(datasets), datasets)
+
+
+response_cache.add_invalidation_handler(_handle_invalidation)
+
+
+async def stop() -> None:
+    task = _state["task"]
+    _state["task"] = None
+    _state["pending"] = None
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def warmup_stats() -> Dict[str, Any]:
+    return {key: value for key, value in _state.items() if key not in ("task", "pending")}
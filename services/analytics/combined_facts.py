@@ -0,0 +1,94 @@
+"""
+Combined BDC/OMC Transactions
+Stacks fact_bdc_transactions and fact_omc_transactions with UNION ALL so that
+cross-business analytics see every transaction exactly once.
+
+Joining both fact tables to companies (companies LEFT JOIN fact_bdc LEFT JOIN
+fact_omc ON company_id) pairs every BDC row of a company with every OMC row of
+the same company; queries here read the stacked relation instead.
+"""
+
+from typing import Any, Dict
+
+import asyncpg
+
+from monthly_cube import CUBE_TABLE, FACT_TABLES, FactSource, is_cube_ready
+
+COMBINED_COLUMNS = [
+    "transaction_id",
+    "company_id",
+    "product_id",
+    "date_id",
+    "volume_liters",
+    "volume_mt",
+    "volume_kg",
+    "data_quality_score",
+    "is_outlier",
+]
+
+
+def combined_facts_sql() -> str:
+    """Parenthesised UNION ALL of both fact tables with a business_type column"""
+    columns = ", ".join(COMBINED_COLUMNS)
+    return "(\n" + "\n        UNION ALL\n".join(
+        f"        SELECT '{business_type}'::varchar(3) as business_type, {columns} FROM {fact_table}"
+        for business_type, fact_table in FACT_TABLES.items()
+    ) + "\n    )"
+
+
+# Use as: FROM {COMBINED_FACTS} f
+COMBINED_FACTS = combined_facts_sql()
+
+
+def combined_raw_source() -> FactSource:
+    """Transaction-level source over both fact tables"""
+    return FactSource(COMBINED_FACTS, is_cube=False)
+
+
+def combined_cube_source() -> FactSource:
+    """Monthly cube source; the cube already holds both business types"""
+    return FactSource(CUBE_TABLE, is_cube=True)
+
+
+async def get_combined_source(conn: asyncpg.Connection) -> FactSource:
+    """Monthly cube when it has been built, otherwise the stacked fact tables"""
+    if await is_cube_ready(conn):
+        return combined_cube_source()
+    return combined_raw_source()
+
+
+async def verify_combined_row_counts(conn: asyncpg.Connection) -> Dict[str, Any]:
+    """
+    Check that the combined relation holds exactly the rows of the raw fact tables
+    (and that the cube, when built, accounts for the same transactions)
+    """
+    fact_counts = {}
+    for business_type, fact_table in FACT_TABLES.items():
+        fact_counts[business_type] = await conn.fetchval(f"SELECT COUNT(*) FROM {fact_table}")
+
+    rows = await conn.fetch(f"""
+        SELECT f.business_type, COUNT(*) as row_count
+        FROM {COMBINED_FACTS} f
+        GROUP BY f.business_type
+    """)
+    combined_counts = {row['business_type']: row['row_count'] for row in rows}
+
+    result = {
+        "fact_tables": fact_counts,
+        "combined": combined_counts,
+        "matches": all(combined_counts.get(bt, 0) == count for bt, count in fact_counts.items())
+    }
+
+    if await is_cube_ready(conn):
+        rows = await conn.fetch(f"""
+            SELECT business_type, SUM(txn_count)::bigint as row_count
+            FROM {CUBE_TABLE}
+            GROUP BY business_type
+        """)
+        cube_counts = {row['business_type']: row['row_count'] for row in rows}
+        result["cube"] = cube_counts
+        result["matches"] = result["matches"] and all(
+            cube_counts.get(bt, 0) == count for bt, count in fact_counts.items()
+        )
+
+    return result
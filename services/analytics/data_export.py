@@ -0,0 +1,230 @@
+"""
+Bulk Fact Export
+Streams filtered rows of the BDC / OMC fact tables and supply_data as NDJSON,
+CSV or an Arrow IPC stream.
+
+Rows are read through a server-side cursor inside a read-only transaction,
+EXPORT_BATCH_ROWS at a time, and each batch is encoded and handed to the
+response before the next is fetched. The ASGI server only asks for the next
+chunk once the client has taken the previous one, so memory stays constant
+whatever the row count and a slow client slows the cursor down rather than
+buffering the table.
+
+Exports hold a pooled connection for their whole duration, so they run in
+the admission controller's export class: at most EXPORT_MAX_CONCURRENT at
+once per worker, behind interactive requests.
+"""
+
+import io
+import csv
+import logging
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import asyncpg
+
+import admission
+from fast_json import dumps
+from sql_filters import FACT_FILTERS, FilterSet
+from supply_enhanced_analytics import SUPPLY_FILTERS
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+try:
+    from config import settings
+    EXPORT_BATCH_ROWS = settings.EXPORT_BATCH_ROWS
+except (ImportError, AttributeError):
+    EXPORT_BATCH_ROWS = 5000
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# LIMIT NULL means no limit, so the limit is just one more fixed slot
+_FACT_EXPORT_FILTERS = FilterSet(*FACT_FILTERS.predicates)
+_SUPPLY_EXPORT_FILTERS = FilterSet(*SUPPLY_FILTERS.predicates)
+
+DATASETS: Dict[str, Dict[str, Any]] = {
+    "bdc": {
+        "filters": _FACT_EXPORT_FILTERS,
+        "query": f"""
+            SELECT f.*, t.full_date
+            FROM petroverse.fact_bdc_transactions f
+            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+            WHERE {_FACT_EXPORT_FILTERS.sql}
+            ORDER BY f.transaction_id
+            LIMIT ${_FACT_EXPORT_FILTERS.next_slot}::bigint
+        """,
+    },
+    "omc": {
+        "filters": _FACT_EXPORT_FILTERS,
+        "query": f"""
+            SELECT f.*, t.full_date
+            FROM petroverse.fact_omc_transactions f
+            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+            WHERE {_FACT_EXPORT_FILTERS.sql}
+            ORDER BY f.transaction_id
+            LIMIT ${_FACT_EXPORT_FILTERS.next_slot}::bigint
+        """,
+    },
+    "supply": {
+        "filters": _SUPPLY_EXPORT_FILTERS,
+        "query": f"""
+            SELECT s.*
+            FROM petroverse.supply_data s
+            WHERE {_SUPPLY_EXPORT_FILTERS.sql}
+            ORDER BY s.id
+            LIMIT ${_SUPPLY_EXPORT_FILTERS.next_slot}::bigint
+        """,
+    },
+}
+
+async def _batches(pool: asyncpg.Pool, dataset: str, params: List[Any],
+                   header: List[Any]) -> AsyncIterator[List[asyncpg.Record]]:
+    """Cursor batches; header receives the column attributes before the first batch"""
+    async with admission.admit(admission.EXPORT):
+        async with pool.acquire() as conn:
+            async with conn.transaction(readonly=True):
+                stmt = await conn.prepare(DATASETS[dataset]["query"])
+                header.extend(stmt.get_attributes())
+                cursor = await stmt.cursor(*params)
+                while True:
+                    rows = await cursor.fetch(EXPORT_BATCH_ROWS)
+                    if not rows:
+                        break
+                    yield rows
+                    if len(rows) < EXPORT_BATCH_ROWS:
+                        break
+
+
+class _ChunkSink:
+    """Write-only file for the Arrow stream writer; drain() hands over what was written"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+# Postgres type name -> Arrow type; anything else is exported as text
+_ARROW_TYPES = {
+    "int2": "int16", "int4": "int32", "int8": "int64",
+    "float4": "float32", "float8": "float64", "numeric": "float64",
+    "bool": "bool_", "date": "date32", "text": "string", "varchar": "string",
+    "bpchar": "string",
+}
+
+
+def _arrow_schema(attributes) -> "pa.Schema":
+    fields = []
+    for attribute in attributes:
+        type_name = attribute.type.name
+        if type_name == "timestamp":
+            arrow_type = pa.timestamp("us")
+        elif type_name == "timestamptz":
+            arrow_type = pa.timestamp("us", tz="UTC")
+        else:
+            arrow_type = getattr(pa, _ARROW_TYPES.get(type_name, "string"))()
+        fields.append(pa.field(attribute.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _arrow_column(values: List[Any], arrow_type: "pa.DataType") -> "pa.Array":
+    if pa.types.is_floating(arrow_type):
+        values = [float(v) if isinstance(v, Decimal) else v for v in values]
+    elif pa.types.is_string(arrow_type):
+        values = [None if v is None else str(v) for v in values]
+    return pa.array(values, type=arrow_type)
+
+
+def stream_export(pool: asyncpg.Pool, dataset: str, fmt: str,
+                  filters: Dict[str, Any], limit: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Encoded chunks of the export, one per cursor batch. Filters are bound here,
+    so bad values raise before the response has started.
+    """
+    params = DATASETS[dataset]["filters"].params(**filters) + [limit]
+    return _encode(pool, dataset, fmt, params)
+
+
+async def _encode(pool: asyncpg.Pool, dataset: str, fmt: str, params: List[Any]) -> AsyncIterator[bytes]:
+    header: List[Any] = []
+    rows_sent = 0
+    schema = None
+    writer = None
+    sink = _ChunkSink()
+
+    try:
+        async for rows in _batches(pool, dataset, params, header):
+            if fmt == "ndjson":
+                yield b"".join(dumps(dict(row)) + b"\n" for row in rows)
+
+            elif fmt == "csv":
+                buffer = io.StringIO()
+                out = csv.writer(buffer)
+                if rows_sent == 0:
+                    out.writerow([attribute.name for attribute in header])
+                out.writerows([_csv_value(v) for v in row.values()] for row in rows)
+                yield buffer.getvalue().encode("utf-8")
+
+            else:
+                if writer is None:
+                    schema = _arrow_schema(header)
+                    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+                columns = [
+                    _arrow_column([row[i] for row in rows], field.type)
+                    for i, field in enumerate(schema)
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+                yield sink.drain()
+
+            rows_sent += len(rows)
+
+        if fmt == "csv" and rows_sent == 0 and header:
+            yield (",".join(attribute.name for attribute in header) + "\r\n").encode("utf-8")
+        if fmt == "arrow":
+            if writer is None and header:
+                writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), _arrow_schema(header))
+            if writer is not None:
+                writer.close()
+                yield sink.drain()
+    finally:
+        logger.info(f"Export {dataset} ({fmt}): {rows_sent} rows")
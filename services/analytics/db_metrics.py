@@ -0,0 +1,158 @@
+"""
+Database Instrumentation
+Times every fetch / fetchrow / fetchval / execute and every pool acquire, for
+/metrics.
+
+Queries are labelled with a logical name: the one given to
+PooledQueries.fetch(..., name="bdc.market_concentration") or set with
+
+    with query_name("supply.regional"):
+        rows = await conn.fetch(...)
+
+and otherwise the module and function that issued the query, e.g.
+"main.get_date_range". Labels stay bounded by the number of call sites.
+
+Queries over SLOW_QUERY_MS are also handed to slow_queries.
+
+Use InstrumentedConnection as the pool's connection_class and wrap the pool
+in TimedPool.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+import asyncpg
+
+import metrics
+import slow_queries
+from statement_stats import StatementStatsConnection
+
+QUERY_DURATION = metrics.histogram(
+    "petroverse_db_query_duration_seconds",
+    "Database query latency by logical query name and method",
+    ("query", "method")
+)
+QUERY_ROWS = metrics.counter(
+    "petroverse_db_query_rows_total",
+    "Rows returned by logical query name",
+    ("query",)
+)
+QUERY_ERRORS = metrics.counter(
+    "petroverse_db_query_errors_total",
+    "Failed database queries by logical query name",
+    ("query",)
+)
+POOL_WAIT = metrics.histogram(
+    "petroverse_db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection"
+)
+
+_query_name: ContextVar[Optional[str]] = ContextVar("query_name", default=None)
+
+# Frames in these modules are plumbing, not the query's owner
+_PLUMBING = {__name__, "pooled_queries", "asyncio", "contextlib"}
+
+
+@contextmanager
+def query_name(name: str):
+    """Label the queries issued inside the block"""
+    token = _query_name.set(name)
+    try:
+        yield
+    finally:
+        _query_name.reset(token)
+
+
+def _current_query_name() -> str:
+    name = _query_name.get()
+    if name:
+        return name
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in _PLUMBING and not module.startswith("asyncpg"):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _rows(method: str, result: Any) -> int:
+    if method == "fetch":
+        return len(result)
+    if method == "execute":
+        return 0
+    return 0 if result is None else 1
+
+
+class InstrumentedConnection(StatementStatsConnection):
+    """asyncpg connection that records latency and row counts per logical query"""
+
+    async def _timed(self, method: str, call, query: str, args, kwargs) -> Any:
+        name = _current_query_name()
+        started = time.perf_counter()
+        try:
+            result = await call(query, *args, **kwargs)
+        except BaseException:
+            QUERY_ERRORS.inc(query=name)
+            QUERY_DURATION.observe(time.perf_counter() - started, query=name, method=method)
+            raise
+        elapsed = time.perf_counter() - started
+        QUERY_DURATION.observe(elapsed, query=name, method=method)
+        QUERY_ROWS.inc(_rows(method, result), query=name)
+        slow_queries.record(name, method, query, args, elapsed)
+        return result
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self._timed("fetch", super().fetch, query, args, kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._timed("fetchrow", super().fetchrow, query, args, kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._timed("fetchval", super().fetchval, query, args, kwargs)
+
+    async def execute(self, query, *args, **kwargs):
+        return await self._timed("execute", super().execute, query, args, kwargs)
+
+    async def reset(self, *, timeout=None):
+        # Runs when the pool takes a connection back
+        with query_name("pool.reset"):
+            return await super().reset(timeout=timeout)
+
+
+class _TimedAcquire:
+    """pool.acquire() that records how long the caller waited for a connection"""
+
+    def __init__(self, pool: asyncpg.Pool, timeout: Optional[float]):
+        self._context = pool.acquire(timeout=timeout)
+
+    async def _timed(self, acquire) -> asyncpg.Connection:
+        started = time.perf_counter()
+        connection = await acquire
+        POOL_WAIT.observe(time.perf_counter() - started)
+        return connection
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        return await self._timed(self._context.__aenter__())
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+    def __await__(self):
+        return self._timed(self._context).__await__()
+
+
+class TimedPool:
+    """asyncpg.Pool wrapper; only acquire() is changed, everything else is the pool's own"""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _TimedAcquire:
+        return _TimedAcquire(self._pool, timeout)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
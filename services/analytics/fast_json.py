@@ -0,0 +1,121 @@
+"""
+Fast JSON Serialization
+One encoder for API responses and the response cache, built on orjson when it
+is installed (stdlib json otherwise).
+
+Values are encoded the way FastAPI's jsonable_encoder would render them
+(Decimal -> int/float, date/datetime/UUID -> strings, Records/models -> objects)
+but straight to bytes in a single pass, so the Decimal-heavy analytics results
+skip the intermediate copy of the whole payload.
+
+FastAPI still runs jsonable_encoder over any plain value an endpoint returns
+before the response class renders it, so only Responses bypass it: cached
+endpoints return theirs from response_cache, and the others return
+FastJSONResponse(...) themselves.
+"""
+
+import json
+import math
+import datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _default(value: Any) -> Any:
+    """Types the serializer does not handle natively"""
+    if isinstance(value, Decimal):
+        # Same rule as jsonable_encoder: integral Decimals stay integers
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump() if hasattr(value, "model_dump") else value.dict()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "items"):
+        # asyncpg Record and other mappings
+        return dict(value.items())
+    if hasattr(value, "isoformat"):
+        # pandas Timestamp
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _float_safe(value: Any) -> Any:
+    # stdlib json writes NaN/Infinity, which is not JSON; orjson writes null
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+if ORJSON_AVAILABLE:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+    def loads(data: Any) -> Any:
+        return orjson.loads(data)
+else:
+    class _Encoder(json.JSONEncoder):
+        def default(self, value):
+            return _default(value)
+
+        def iterencode(self, value, _one_shot=False):
+            return super().iterencode(_sanitize(value), _one_shot)
+
+    def _sanitize(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {k: _sanitize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [_sanitize(v) for v in value]
+        return _float_safe(value)
+
+    _encoder = _Encoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(value: Any) -> bytes:
+        return _encoder.encode(value).encode("utf-8")
+
+    def loads(data: Any) -> Any:
+        return json.loads(data)
+
+
+if ORJSON_AVAILABLE and hasattr(orjson, "Fragment"):
+    def raw(data: bytes) -> Any:
+        """Already-encoded JSON to embed in a value for dumps(); copied in as it is"""
+        return orjson.Fragment(data)
+else:
+    def raw(data: bytes) -> Any:
+        """Already-encoded JSON to embed in a value for dumps(); parsed back without orjson 3.9+"""
+        return loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Same output as JSONResponse, encoded by fast_json. Return it from an
+    endpoint to skip jsonable_encoder; as the default response class it only
+    replaces the final render.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
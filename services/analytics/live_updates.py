@@ -0,0 +1,241 @@
+"""
+Live Dashboard Updates
+One publisher per tenant computes the real-time update once and fans it out
+to every WebSocket subscribed to that tenant, instead of each socket polling
+the database on its own.
+
+Publishers wake when the ETL announces a load with
+
+    NOTIFY petroverse_data_changed
+
+(see data/bump_data_version.py), received on a single dedicated LISTEN
+connection per worker (on the primary; the updates themselves read through
+the replica routing), and otherwise recompute every LIVE_UPDATE_INTERVAL
+seconds, so updates keep flowing if NOTIFY is unavailable.
+
+Every socket has its own bounded send queue drained by its own task. The
+publisher never waits on a socket: when a slow client's queue is full its
+oldest update is dropped, since each update is a complete snapshot.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+import asyncpg
+from fastapi import WebSocket, WebSocketDisconnect
+
+from fast_json import dumps
+
+try:
+    from config import settings
+    LIVE_UPDATE_INTERVAL = settings.LIVE_UPDATE_INTERVAL
+    WS_SEND_QUEUE_SIZE = settings.WS_SEND_QUEUE_SIZE
+except (ImportError, AttributeError):
+    LIVE_UPDATE_INTERVAL = 30
+    WS_SEND_QUEUE_SIZE = 4
+
+logger = logging.getLogger(__name__)
+
+DATA_CHANGED_CHANNEL = "petroverse_data_changed"
+
+LATEST_ACTIVITY_QUERY = """
+    SELECT
+        COUNT(*) as recent_count,
+        SUM(volume_liters) as recent_volume
+    FROM petroverse.performance_metrics pm
+    JOIN petroverse.time_dimension t ON pm.date_id = t.date_id
+    WHERE t.full_date >= CURRENT_DATE - INTERVAL '1 hour'
+"""
+
+# read_replica.read_pool: updates read from the replica like other analytics
+_pool = None
+_dsn: Optional[str] = None
+_topics: Dict[str, "_Topic"] = {}
+_listener = {"task": None, "connected": False}
+_stats = {"published": 0, "dropped": 0, "notifications": 0}
+
+
+class Subscriber:
+    """One WebSocket and its queue of encoded updates"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+
+    def offer(self, message: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            _stats["dropped"] += 1
+        self.queue.put_nowait(message)
+
+    async def _send(self) -> None:
+        while True:
+            await self.websocket.send_text(await self.queue.get())
+
+    async def _receive(self) -> None:
+        # Clients do not send anything; this only notices the disconnect
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    async def run(self) -> None:
+        """Send queued updates until the client goes away"""
+        tasks = [asyncio.create_task(self._send()), asyncio.create_task(self._receive())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is not None and not isinstance(error, WebSocketDisconnect):
+                    raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class _Topic:
+    """Subscribers of one tenant and the task publishing to them"""
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.subscribers: Set[Subscriber] = set()
+        self.wake = asyncio.Event()
+        self.latest: Optional[str] = None
+        self.task = asyncio.create_task(self._publish_loop())
+
+    async def _publish_loop(self) -> None:
+        while True:
+            self.wake.clear()
+            try:
+                message = dumps(await _build_update(self.tenant_id)).decode("utf-8")
+                self.latest = message
+                for subscriber in self.subscribers:
+                    subscriber.offer(message)
+                _stats["published"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Live update for tenant {self.tenant_id} failed: {e}")
+
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=LIVE_UPDATE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _build_update(tenant_id: str) -> Dict[str, Any]:
+    async with _pool.acquire() as conn:
+        latest = await conn.fetchrow(LATEST_ACTIVITY_QUERY)
+    return {
+        "type": "update",
+        "data": {
+            "recent_transactions": latest["recent_count"],
+            "recent_volume": float(latest["recent_volume"] or 0),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    }
+
+
+def subscribe(tenant_id: str, websocket: WebSocket) -> Subscriber:
+    """Register a socket; it gets the tenant's last update straight away if there is one"""
+    topic = _topics.get(tenant_id)
+    if topic is None:
+        topic = _topics[tenant_id] = _Topic(tenant_id)
+    subscriber = Subscriber(websocket)
+    topic.subscribers.add(subscriber)
+    if topic.latest is not None:
+        subscriber.offer(topic.latest)
+    return subscriber
+
+
+async def unsubscribe(tenant_id: str, subscriber: Subscriber) -> None:
+    """Remove a socket; the tenant's publisher stops with its last subscriber"""
+    topic = _topics.get(tenant_id)
+    if topic is None:
+        return
+    topic.subscribers.discard(subscriber)
+    if not topic.subscribers:
+        del _topics[tenant_id]
+        topic.task.cancel()
+        await asyncio.gather(topic.task, return_exceptions=True)
+
+
+def _wake_publishers() -> None:
+    for topic in _topics.values():
+        topic.wake.set()
+
+
+def _on_notify(connection, pid, channel, payload) -> None:
+    _stats["notifications"] += 1
+    # The load just committed on the primary; keep the woken publishers off
+    # the replica until it has replayed the load
+    _pool.fence()
+    _wake_publishers()
+
+
+async def _listen_for_changes() -> None:
+    """Hold a LISTEN connection, reconnecting with backoff"""
+    delay = 1
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(_dsn)
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _: lost.set())
+            await conn.add_listener(DATA_CHANGED_CHANNEL, _on_notify)
+            _listener["connected"] = True
+            delay = 1
+            # A load may have finished while we were disconnected
+            _wake_publishers()
+            await lost.wait()
+            logger.warning("Live update LISTEN connection lost")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Live update listener disconnected: {e}")
+        finally:
+            _listener["connected"] = False
+            if conn is not None and not conn.is_closed():
+                try:
+                    await conn.close()
+                except Exception:
+                    pass
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+def init(pool, dsn: str) -> None:
+    """pool serves the update queries; dsn opens the LISTEN connection on the primary"""
+    global _pool, _dsn
+    _pool = pool
+    _dsn = dsn
+
+
+def start_listener() -> None:
+    if _listener["task"] is None:
+        _listener["task"] = asyncio.create_task(_listen_for_changes())
+
+
+async def stop() -> None:
+    """Stop the listener and all publishers"""
+    tasks = [topic.task for topic in _topics.values()]
+    if _listener["task"] is not None:
+        tasks.append(_listener["task"])
+        _listener["task"] = None
+    _topics.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def live_update_stats() -> Dict[str, Any]:
+    return {
+        "listening": _listener["connected"],
+        "tenants": len(_topics),
+        "sockets": sum(len(topic.subscribers) for topic in _topics.values()),
+        **_stats
+    }
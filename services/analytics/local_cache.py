@@ -0,0 +1,128 @@
+"""
+In-Process LRU Cache
+First cache tier in front of Redis: holds encoded responses so hot keys are
+served without a network round trip.
+
+Bounded by entry count and by approximate payload bytes (the size of the JSON
+the entry was built from), with a per-entry TTL and hit/miss counters.
+Entries can carry tags so a whole dataset or tenant can be dropped at once.
+Not thread-safe; it is only used from the event loop.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+
+class LRUCache:
+    """Least-recently-used cache with entry, byte and TTL limits"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (value, size_bytes, expires_at, tags)
+        self._entries: "OrderedDict[str, Tuple[Any, int, float, Tuple[str, ...]]]" = OrderedDict()
+        # tag -> keys carrying it
+        self._tags: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, size, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None,
+            tags: Iterable[str] = ()) -> bool:
+        """Store value; returns False if it is larger than the whole byte budget"""
+        if size > self.max_bytes:
+            return False
+
+        if key in self._entries:
+            self._remove(key)
+
+        tags = tuple(tags)
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        self._entries[key] = (value, size, expires_at, tags)
+        self._bytes += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return True
+
+    def delete(self, key: str) -> bool:
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every key starting with prefix"""
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def delete_tag(self, tag: str) -> int:
+        """Drop every entry carrying tag"""
+        keys = list(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "tags": len(self._tags)
+        }
+
+    def _remove(self, key: str) -> None:
+        _, size, _, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
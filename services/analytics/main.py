@@ -3,11 +3,11 @@ PetroVerse Analytics Service - Production Grade API
 """
 from fastapi import FastAPI, Depends, HTTPException, WebSocket, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 import asyncpg
-import asyncio
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence
 import uvicorn
 import os
 from datetime import datetime, timedelta
@@ -23,9 +23,34 @@ import secrets
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-from bdc_analytics import get_bdc_comprehensive_analytics
-from omc_analytics import get_omc_comprehensive_analytics
+from bdc_analytics import get_bdc_comprehensive_analytics, SECTIONS as BDC_SECTIONS
+from monthly_cube import get_fact_source
+from combined_facts import COMBINED_FACTS, verify_combined_row_counts
+from pooled_queries import PooledQueries
+from sql_filters import FilterSet, Predicate, to_date
+from statement_stats import statement_cache_stats
+import metrics
+from db_metrics import InstrumentedConnection, TimedPool
+import binary_formats
+from fast_json import FastJSONResponse
+import data_export
+import live_updates
+import auth_cache
+import cache_warmer
+import slow_queries
+import read_replica
+from read_replica import read_pool
+import batch_requests
+import admission
+from cache_warmer import WarmupTarget
+import time
+import response_cache
+from response_cache import cached_response
+from omc_analytics import get_omc_comprehensive_analytics, SECTIONS as OMC_SECTIONS
+from pagination import InvalidPage, Page, Ranking
+from bdc_enhanced_analytics import NETWORK_RANKING, OPERATIONAL_RANKING
 from advanced_analytics import (
+    OUTLIER_RANKING,
     get_market_concentration_metrics,
     get_company_benchmarking,
     get_supply_chain_efficiency,
@@ -71,10 +96,14 @@ except ImportError:
         CORS_ALLOW_METHODS = ["*"]
         CORS_ALLOW_HEADERS = ["*"]
         CORS_EXPOSE_HEADERS = ["*"]
+        READ_REPLICA_URL = os.getenv("READ_REPLICA_URL", "")
+        READ_POOL_MIN_SIZE = 5
+        READ_POOL_MAX_SIZE = 30
     settings = Settings()
 
 # Configuration from settings
 DATABASE_URL = settings.DATABASE_URL
+READ_REPLICA_URL = settings.READ_REPLICA_URL
 REDIS_URL = settings.REDIS_URL
 JWT_SECRET = settings.JWT_SECRET_KEY
 JWT_ALGORITHM = settings.JWT_ALGORITHM
@@ -124,25 +153,27 @@ class PredictionRequest(BaseModel):
 
 # Global connections
 db_pool: Optional[asyncpg.Pool] = None
+replica_pool: Optional[asyncpg.Pool] = None
 redis_client: Optional[redis.Redis] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle with proper resource management"""
-    global db_pool, redis_client
+    global db_pool, replica_pool, redis_client
     
     print(">>> Initializing PetroVerse Analytics Service...")
     
     # Database connection pool - REQUIRED
     try:
-        db_pool = await asyncpg.create_pool(
+        db_pool = TimedPool(await asyncpg.create_pool(
             DATABASE_URL,
             min_size=5,
             max_size=20,
             max_queries=50000,
             max_inactive_connection_lifetime=300,
-            command_timeout=60
-        )
+            command_timeout=60,
+            connection_class=InstrumentedConnection
+        ))
         print("[OK] Database connected")
         
         # Test connection
@@ -155,6 +186,25 @@ async def lifespan(app: FastAPI):
         print("[ERROR] Database is REQUIRED - cannot start without database connection")
         raise
     
+    # Read replica for analytics queries (optional; reads use the primary without it)
+    if READ_REPLICA_URL:
+        try:
+            replica_pool = TimedPool(await asyncpg.create_pool(
+                READ_REPLICA_URL,
+                min_size=settings.READ_POOL_MIN_SIZE,
+                max_size=settings.READ_POOL_MAX_SIZE,
+                max_queries=50000,
+                max_inactive_connection_lifetime=300,
+                command_timeout=60,
+                connection_class=InstrumentedConnection
+            ))
+            print("[OK] Read replica connected")
+        except Exception as e:
+            print(f"[WARNING] Read replica connection failed, reading from the primary: {e}")
+            replica_pool = None
+    read_pool.init(db_pool, replica_pool)
+    await read_pool.start()
+    
     # Redis connection (optional but recommended)
     if REDIS_AVAILABLE:
         try:
@@ -172,12 +222,29 @@ async def lifespan(app: FastAPI):
     else:
         print("[INFO] Redis not available")
     
+    response_cache.init(redis_client)
+    response_cache.start_invalidation_listener()
+    slow_queries.init(read_pool)
+    live_updates.init(read_pool, DATABASE_URL)
+    live_updates.start_listener()
+    cache_warmer.init(redis_client, WARMUP_TARGETS)
+    batch_requests.init(app, get_current_user)
+    cache_warmer.start()
+    
     print("[OK] All systems operational")
     
     yield
     
     # Graceful shutdown
     print(">>> Shutting down services...")
+    await cache_warmer.stop()
+    await slow_queries.stop()
+    await response_cache.stop_invalidation_listener()
+    await response_cache.stop_refreshes()
+    await read_pool.stop()
+    await live_updates.stop()
+    if replica_pool:
+        await replica_pool.close()
     if db_pool:
         await db_pool.close()
     if redis_client:
@@ -188,7 +255,8 @@ app = FastAPI(
     title="PetroVerse Analytics API",
     description="Production-Grade Analytics Platform",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS configuration - BULLETPROOF VERSION
@@ -221,6 +289,82 @@ async def add_cors_header(request: Request, call_next):
     response.headers['Access-Control-Max-Age'] = '3600'
     return response
 
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "petroverse_http_request_duration_seconds",
+    "Request latency by route template",
+    ("method", "route", "status")
+)
+
+def decode_token(request: Request, token: str) -> dict:
+    """
+    JWT payload of token, decoded once per request: the result (or the
+    decode error, raised again) is kept on request.state for get_current_user
+    """
+    decoded = getattr(request.state, "token", None)
+    if decoded is None or decoded[0] != token:
+        try:
+            decoded = (token, jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM]))
+        except jwt.PyJWTError as e:
+            decoded = (token, e)
+        request.state.token = decoded
+    if isinstance(decoded[1], Exception):
+        raise decoded[1]
+    return decoded[1]
+
+def request_tenant(request: Request) -> str:
+    """
+    Admission control tenant: the token's tenant_id, else the client address.
+    Behind nginx that address comes from X-Forwarded-For via uvicorn's
+    --proxy-headers, which only trusts peers in FORWARDED_ALLOW_IPS; client
+    headers are never read here, so they cannot pick another tenant's queue.
+    """
+    authorization = request.headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        try:
+            tenant_id = decode_token(request, authorization[7:]).get("tenant_id")
+            if tenant_id:
+                return f"tenant:{tenant_id}"
+        except jwt.PyJWTError:
+            pass
+    address = request.client.host if request.client else "unknown"
+    return f"ip:{address}"
+
+# Expose the headers the response cache decorator negotiates on: Accept (and
+# ?table= for Arrow) for binary formats, If-None-Match for conditional GETs,
+# and who is asking, at what priority, to admission control.
+# Also times the request for /metrics, labelled by route template.
+@app.middleware("http")
+async def capture_request_context(request: Request, call_next):
+    format_token = binary_formats.request_format.set(
+        (request.headers.get("accept", ""), request.query_params.get("table"))
+    )
+    etag_token = response_cache.if_none_match.set(request.headers.get("if-none-match"))
+    method_token = response_cache.request_method.set(request.method)
+    path = request.url.path
+    admission_token = admission.request_context.set(admission.RequestContext(
+        request_tenant(request),
+        admission.EXPORT if path.startswith("/api/v2/export/") else admission.INTERACTIVE,
+        admission.route_cost(path)
+    ))
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        )
+        binary_formats.request_format.reset(format_token)
+        response_cache.if_none_match.reset(etag_token)
+        response_cache.request_method.reset(method_token)
+        admission.request_context.reset(admission_token)
+
 # Also add standard CORS middleware as backup
 app.add_middleware(
     CORSMiddleware,
@@ -253,26 +397,24 @@ async def cache_set(key: str, value: str, expire: int = 300):
             pass
 
 async def cache_delete_pattern(pattern: str):
-    """Delete cache keys matching pattern"""
-    if redis_client:
-        try:
-            keys = await redis_client.keys(pattern)
-            if keys:
-                await redis_client.delete(*keys)
-        except:
-            pass
+    """Delete cache keys matching pattern (SCAN-based; prefer response_cache.invalidate_tags)"""
+    return await response_cache.delete_pattern(pattern)
 
 # Authentication utilities
 def create_access_token(user_data: dict) -> str:
     """Create JWT access token"""
     to_encode = user_data.copy()
-    expire = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
-    to_encode.update({"exp": expire})
+    issued_at = datetime.utcnow()
+    expire = issued_at + timedelta(hours=JWT_EXPIRATION_HOURS)
+    # iat also keys the resolved-user cache, so every login starts fresh
+    to_encode.update({"exp": expire, "iat": issued_at})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def verify_token(token: str) -> dict:
-    """Verify JWT token and return payload"""
+def verify_token(token: str, request: Optional[Request] = None) -> dict:
+    """Verify JWT token and return payload (reusing the request's decode when given)"""
     try:
+        if request is not None:
+            return decode_token(request, token)
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         return payload
     except jwt.ExpiredSignatureError:
@@ -281,10 +423,16 @@ def verify_token(token: str) -> dict:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 # Dependencies
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserModel:
+async def get_current_user(request: Request,
+                           credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserModel:
     """Get current user from JWT token"""
     token = credentials.credentials
-    payload = verify_token(token)
+    payload = verify_token(token, request)
+    issued_at = payload.get("iat", 0)
+    
+    cached = auth_cache.get_user(payload["user_id"], issued_at)
+    if cached is not None:
+        return cached
     
     # Get user from database
     async with db_pool.acquire() as conn:
@@ -301,7 +449,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        return UserModel(
+        user_model = UserModel(
             user_id=str(user["user_id"]),
             email=user["email"],
             first_name=user["first_name"],
@@ -310,6 +458,16 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             tenant_id=str(user["tenant_id"]),
             company_name=user.get("company_name")
         )
+        auth_cache.set_user(payload["user_id"], issued_at, user_model, user_model.tenant_id)
+        return user_model
+
+ADMIN_ROLES = {"super_admin", "tenant_admin", "administrator"}
+
+async def require_admin(user: UserModel = Depends(get_current_user)) -> UserModel:
+    """Current user, who must hold an admin role"""
+    if user.role not in ADMIN_ROLES:
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
 
 # API Endpoints
 @app.get("/")
@@ -318,23 +476,90 @@ async def root():
     db_status = "connected" if db_pool else "disconnected"
     redis_status = "connected" if redis_client else "disconnected"
     
-    return {
+    return FastJSONResponse({
         "status": "operational",
         "service": "PetroVerse Analytics API",
         "version": "2.0.0",
         "timestamp": datetime.utcnow().isoformat(),
         "database": db_status,
         "cache": redis_status
-    }
+    })
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint for connectivity testing"""
-    return {
+    return FastJSONResponse({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "environment": settings.ENVIRONMENT if hasattr(settings, 'ENVIRONMENT') else "production"
+        "environment": settings.ENVIRONMENT if hasattr(settings, 'ENVIRONMENT') else "production",
+        "cache": response_cache.cache_stats(),
+        "statement_cache": statement_cache_stats(),
+        "live_updates": live_updates.live_update_stats(),
+        "auth_cache": auth_cache.auth_cache_stats(),
+        "cache_warmup": cache_warmer.warmup_stats(),
+        "admission": admission.admission_stats(),
+        "read_replica": read_replica.replica_stats()
+    })
+
+DB_POOL_CONNECTIONS = metrics.gauge(
+    "petroverse_db_pool_connections",
+    "Connections in the database pool by state",
+    ("state",)
+)
+CACHE_LOOKUPS = metrics.counter(
+    "petroverse_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ("cache", "result")
+)
+CACHE_HIT_RATIO = metrics.gauge(
+    "petroverse_cache_hit_ratio",
+    "Hits / lookups since start by cache",
+    ("cache",)
+)
+
+def collect_runtime_metrics():
+    """Copy pool and cache counters into /metrics at scrape time"""
+    if db_pool is not None:
+        size, idle = db_pool.get_size(), db_pool.get_idle_size()
+        DB_POOL_CONNECTIONS.set(size - idle, state="in_use")
+        DB_POOL_CONNECTIONS.set(idle, state="idle")
+        DB_POOL_CONNECTIONS.set(db_pool.get_max_size(), state="max")
+    
+    response = response_cache.cache_stats()
+    statement = statement_cache_stats()
+    auth = auth_cache.auth_cache_stats()
+    caches = {
+        "response_local": (response["local"]["hits"], response["local"]["misses"]),
+        "response_redis": (response["redis"]["hits"], response["redis"]["misses"]),
+        "statement": (statement["hits"], statement["misses"]),
+        "auth": (auth["hits"], auth["misses"])
     }
+    for cache, (hits, misses) in caches.items():
+        CACHE_LOOKUPS.set(hits, cache=cache, result="hit")
+        CACHE_LOOKUPS.set(misses, cache=cache, result="miss")
+        CACHE_HIT_RATIO.set(round(hits / (hits + misses), 4) if hits + misses else 0, cache=cache)
+
+metrics.add_collector(collect_runtime_metrics)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Request, query, pool and cache metrics in Prometheus text format"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/api/v2/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    query_name: Optional[str] = None,
+    user: UserModel = Depends(require_admin)
+):
+    """Recent queries over SLOW_QUERY_MS with parameters and sampled EXPLAIN plans"""
+    return FastJSONResponse(slow_queries.slow_queries(limit=limit, query_name=query_name))
+
+@app.delete("/api/v2/admin/slow-queries")
+async def clear_slow_queries(user: UserModel = Depends(require_admin)):
+    """Empty the slow query buffer"""
+    slow_queries.clear()
+    return FastJSONResponse({"status": "cleared"})
 
 @app.get("/api/v2/test/data")
 async def test_data_layer():
@@ -351,9 +576,12 @@ async def test_data_layer():
             # Test sample data
             sample_bdc = await conn.fetchrow("SELECT company_name, product, volume_liters FROM petroverse.bdc_data LIMIT 1")
             sample_omc = await conn.fetchrow("SELECT company_name, product, volume_liters FROM petroverse.omc_data LIMIT 1")
-            
-            return {
-                "status": "success",
+
+            # Combined BDC/OMC relation must not add or drop fact rows
+            combined_check = await verify_combined_row_counts(conn)
+
+            return FastJSONResponse({
+                "status": "success" if combined_check["matches"] else "mismatch",
                 "data_summary": {
                     "bdc_records": bdc_count,
                     "omc_records": omc_count, 
@@ -361,23 +589,24 @@ async def test_data_layer():
                     "products": products_count,
                     "time_periods": time_periods
                 },
+                "combined_facts_check": combined_check,
                 "samples": {
                     "bdc_sample": dict(sample_bdc) if sample_bdc else None,
                     "omc_sample": dict(sample_omc) if sample_omc else None
                 },
                 "timestamp": datetime.utcnow().isoformat()
-            }
+            })
     except Exception as e:
-        return {
+        return FastJSONResponse({
             "status": "error",
             "error": str(e),
             "timestamp": datetime.utcnow().isoformat()
-        }
+        })
 
 @app.options("/health")
 async def health_options():
     """OPTIONS handler for health endpoint - helps with CORS preflight"""
-    return {"status": "ok"}
+    return FastJSONResponse({"status": "ok"})
 
 @app.post("/api/v2/auth/login")
 async def login(request: LoginRequest):
@@ -403,12 +632,15 @@ async def login(request: LoginRequest):
             # If no user exists, create demo user for development
             if request.email == "admin@demo.com" and request.password == "demo123":
                 # Create demo tenant and user
-                tenant_id = await conn.fetchval(
+                # Upserts only touch existing rows whose values differ;
+                # "updated" is false for a fresh insert (xmax = 0)
+                tenant = await conn.fetchrow(
                     """
-                    INSERT INTO petroverse_core.tenants (company_name, subscription_tier, api_key, features)
+                    INSERT INTO petroverse_core.tenants AS t (company_name, subscription_tier, api_key, features)
                     VALUES ($1, $2, $3, $4)
                     ON CONFLICT (api_key) DO UPDATE SET company_name = EXCLUDED.company_name
-                    RETURNING tenant_id
+                    WHERE t.company_name IS DISTINCT FROM EXCLUDED.company_name
+                    RETURNING tenant_id, xmax <> 0 AS updated
                     """,
                     "Demo Company", "enterprise", "demo-api-key", json.dumps({
                         "advanced_analytics": True,
@@ -416,16 +648,35 @@ async def login(request: LoginRequest):
                         "real_time_updates": True
                     })
                 )
+                if tenant is None:
+                    tenant_id = await conn.fetchval(
+                        "SELECT tenant_id FROM petroverse_core.tenants WHERE api_key = $1", "demo-api-key"
+                    )
+                else:
+                    tenant_id = tenant["tenant_id"]
                 
-                user_id = await conn.fetchval(
+                user_row = await conn.fetchrow(
                     """
-                    INSERT INTO petroverse_core.users (email, password_hash, first_name, last_name, role, tenant_id)
+                    INSERT INTO petroverse_core.users AS u (email, password_hash, first_name, last_name, role, tenant_id)
                     VALUES ($1, $2, $3, $4, $5, $6)
                     ON CONFLICT (email) DO UPDATE SET first_name = EXCLUDED.first_name
-                    RETURNING user_id
+                    WHERE u.first_name IS DISTINCT FROM EXCLUDED.first_name
+                    RETURNING user_id, xmax <> 0 AS updated
                     """,
                     "admin@demo.com", password_hash, "Admin", "User", "administrator", tenant_id
                 )
+                if user_row is None:
+                    user_id = await conn.fetchval(
+                        "SELECT user_id FROM petroverse_core.users WHERE email = $1", "admin@demo.com"
+                    )
+                else:
+                    user_id = user_row["user_id"]
+                
+                # Only an existing row that changed can be in the auth cache
+                if tenant is not None and tenant["updated"]:
+                    await auth_cache.invalidate_tenant(str(tenant_id))
+                if user_row is not None and user_row["updated"]:
+                    await auth_cache.invalidate_user(str(user_id))
                 
                 user = await conn.fetchrow(
                     """
@@ -457,30 +708,23 @@ async def login(request: LoginRequest):
             "tenant_id": str(user["tenant_id"])
         })
         
-        return {
+        return FastJSONResponse({
             "access_token": token,
             "token_type": "bearer",
             "user": user_model.dict()
-        }
+        })
 
 @app.get("/api/v2/auth/me")
 async def get_current_user_info(user: UserModel = Depends(get_current_user)):
     """Get current user information"""
-    return user
+    return FastJSONResponse(user)
 
 @app.post("/api/v2/analytics/query")
+@cached_response("analytics:query", ttl=300, tenant_arg="user", datasets=["bdc", "omc"])
 async def query_analytics(request: AnalyticsRequest, user: UserModel = Depends(get_current_user)):
     """Execute analytics query with real database data only"""
     
-    # Build cache key  
-    cache_key = f"analytics:{user.tenant_id}:{hashlib.md5(json.dumps(request.dict(), sort_keys=True).encode()).hexdigest()}"
-    
-    # Check cache
-    cached = await cache_get(cache_key)
-    if cached:
-        return json.loads(cached)
-    
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         response_data = {"status": "success", "data": {}}
         
         # Get date range dynamically or from request
@@ -506,7 +750,7 @@ async def query_analytics(request: AnalyticsRequest, user: UserModel = Depends(g
             end_date = date_range["max_date"] if date_range["max_date"] else None
         
         if not start_date or not end_date:
-            return {"status": "error", "message": "No data available in database"}
+            raise HTTPException(status_code=503, detail="No data available in database")
         
         # Convert string dates to date objects for PostgreSQL
         if isinstance(start_date, str):
@@ -703,21 +947,14 @@ async def query_analytics(request: AnalyticsRequest, user: UserModel = Depends(g
                 for row in transactions
             ]
         
-        # Cache results
-        await cache_set(cache_key, json.dumps(response_data, default=str), 300)
-        
         return response_data
 
 @app.get("/api/v2/date-range")
+@cached_response("date-range", tenant_arg="user", datasets=["bdc", "omc"])
 async def get_date_range(user: UserModel = Depends(get_current_user)):
     """Get actual date range from database"""
     
-    cache_key = f"date_range:{user.tenant_id}"
-    cached = await cache_get(cache_key)
-    if cached:
-        return json.loads(cached)
-    
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         date_range = await conn.fetchrow(
             """
             SELECT 
@@ -737,21 +974,14 @@ async def get_date_range(user: UserModel = Depends(get_current_user)):
             "max_date": date_range["max_date"].isoformat() if date_range["max_date"] else "2024-12-31"
         }
         
-        # Cache for 1 hour
-        await cache_set(cache_key, json.dumps(result, default=str), 3600)
-        
         return result
 
 @app.get("/api/v2/filters/options")
+@cached_response("filters:options", ttl=3600, tenant_arg="user", datasets=["bdc", "omc"])
 async def get_filter_options(user: UserModel = Depends(get_current_user)):
     """Get dynamic filter options from database"""
     
-    cache_key = f"filters:{user.tenant_id}"
-    cached = await cache_get(cache_key)
-    if cached:
-        return json.loads(cached)
-    
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # Get companies
         companies = await conn.fetch(
             """
@@ -812,9 +1042,6 @@ async def get_filter_options(user: UserModel = Depends(get_current_user)):
             "max_date": date_range["max_date"].isoformat() if date_range["max_date"] else None
         }
         
-        # Cache for 1 hour
-        await cache_set(cache_key, json.dumps(result, default=str), 3600)
-        
         return result
 
 @app.get("/api/v2/dashboard/config/{dashboard_type}")
@@ -851,13 +1078,13 @@ async def get_dashboard_config(dashboard_type: str, user: UserModel = Depends(ge
     if dashboard_type not in configs:
         raise HTTPException(status_code=404, detail="Dashboard configuration not found")
     
-    return configs[dashboard_type]
+    return FastJSONResponse(configs[dashboard_type])
 
 @app.post("/api/v2/analytics/predict")
 async def predict_demand(request: PredictionRequest, user: UserModel = Depends(get_current_user)):
     """Generate predictions based on historical data"""
     
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # Get historical data
         historical = await conn.fetch(
             """
@@ -911,35 +1138,26 @@ async def predict_demand(request: PredictionRequest, user: UserModel = Depends(g
                 "confidence_upper": float(predicted_volume + confidence_margin)
             })
         
-        return {
+        return FastJSONResponse({
             "product": request.product,
             "predictions": predictions,
             "model_confidence": 0.85,
             "factors_considered": ["historical_trend", "seasonality", "polynomial_regression"],
             "historical_data_points": len(historical)
-        }
+        })
 
 # New standardized API endpoints using fact tables
 
 @app.get("/api/v2/executive/summary")
+@cached_response("executive:summary", datasets=["bdc", "omc"], dated=True)
 async def get_executive_summary():
     """Executive dashboard KPIs - NO AUTH for development"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # Get overall metrics from fact tables
         summary = await conn.fetchrow(
-            """
+            f"""
             WITH combined_facts AS (
-                SELECT 
-                    company_id, product_id, date_id, 
-                    volume_liters, volume_mt, volume_kg,
-                    'BDC' as source_type
-                FROM petroverse.fact_bdc_transactions
-                UNION ALL
-                SELECT 
-                    company_id, product_id, date_id, 
-                    volume_liters, volume_mt, volume_kg,
-                    'OMC' as source_type 
-                FROM petroverse.fact_omc_transactions
+                SELECT *, business_type as source_type FROM {COMBINED_FACTS} cf
             )
             SELECT 
                 COUNT(DISTINCT company_id) as total_companies,
@@ -962,18 +1180,12 @@ async def get_executive_summary():
         
         # Get recent trend (last 12 months)
         trend = await conn.fetch(
-            """
+            f"""
             WITH combined_facts AS (
                 SELECT 
                     t.year, t.month, t.full_date,
-                    cf.volume_liters, cf.volume_mt, cf.volume_kg, cf.source_type
-                FROM (
-                    SELECT company_id, product_id, date_id, volume_liters, volume_mt, volume_kg, 'BDC' as source_type
-                    FROM petroverse.fact_bdc_transactions
-                    UNION ALL
-                    SELECT company_id, product_id, date_id, volume_liters, volume_mt, volume_kg, 'OMC' as source_type
-                    FROM petroverse.fact_omc_transactions
-                ) cf
+                    cf.volume_liters, cf.volume_mt, cf.volume_kg, cf.business_type as source_type
+                FROM {COMBINED_FACTS} cf
                 JOIN petroverse.time_dimension t ON cf.date_id = t.date_id
                 WHERE t.full_date >= CURRENT_DATE - INTERVAL '12 months'
             )
@@ -1029,24 +1241,27 @@ async def get_executive_summary():
         }
 
 @app.get("/api/v2/bdc/performance")
+@cached_response("bdc:performance")
 async def get_bdc_performance():
     """BDC performance analytics - NO AUTH for development"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
+        src = await get_fact_source(conn, "BDC")
+        
         # Top BDC companies by volume
         top_companies = await conn.fetch(
-            """
+            f"""
             SELECT 
                 c.company_name,
-                SUM(f.volume_liters) as total_volume_liters,
-                SUM(f.volume_mt) as total_volume_mt,
-                SUM(f.volume_kg) as total_volume_kg,
-                COUNT(f.transaction_id) as transaction_count,
+                {src.sum('volume_liters')} as total_volume_liters,
+                {src.sum('volume_mt')} as total_volume_mt,
+                {src.sum('volume_kg')} as total_volume_kg,
+                {src.count()} as transaction_count,
                 ROUND(
-                    (SUM(f.volume_liters) / NULLIF(
-                        (SELECT SUM(volume_liters) FROM petroverse.fact_bdc_transactions), 0
+                    ({src.sum('volume_liters')} / NULLIF(
+                        (SELECT {src.sum('volume_liters')} FROM {src.relation} f), 0
                     ) * 100)::numeric, 2
                 ) as market_share_percent
-            FROM petroverse.fact_bdc_transactions f
+            FROM {src.relation} f
             JOIN petroverse.companies c ON f.company_id = c.company_id
             GROUP BY c.company_name
             ORDER BY total_volume_liters DESC
@@ -1056,15 +1271,15 @@ async def get_bdc_performance():
         
         # BDC product distribution
         product_mix = await conn.fetch(
-            """
+            f"""
             SELECT 
                 p.product_name,
                 p.product_category,
-                SUM(f.volume_liters) as total_volume_liters,
-                SUM(f.volume_mt) as total_volume_mt,
-                SUM(f.volume_kg) as total_volume_kg,
-                COUNT(f.transaction_id) as transaction_count
-            FROM petroverse.fact_bdc_transactions f
+                {src.sum('volume_liters')} as total_volume_liters,
+                {src.sum('volume_mt')} as total_volume_mt,
+                {src.sum('volume_kg')} as total_volume_kg,
+                {src.count()} as transaction_count
+            FROM {src.relation} f
             JOIN petroverse.products p ON f.product_id = p.product_id
             GROUP BY p.product_name, p.product_category
             ORDER BY total_volume_liters DESC
@@ -1073,15 +1288,15 @@ async def get_bdc_performance():
         
         # Monthly performance trend
         monthly_trend = await conn.fetch(
-            """
+            f"""
             SELECT 
                 t.year, t.month,
                 CONCAT(t.year, '-', LPAD(t.month::text, 2, '0')) as period,
-                SUM(f.volume_liters) as volume_liters,
-                SUM(f.volume_mt) as volume_mt,
-                SUM(f.volume_kg) as volume_kg,
-                COUNT(f.transaction_id) as transactions
-            FROM petroverse.fact_bdc_transactions f
+                {src.sum('volume_liters')} as volume_liters,
+                {src.sum('volume_mt')} as volume_mt,
+                {src.sum('volume_kg')} as volume_kg,
+                {src.count()} as transactions
+            FROM {src.relation} f
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             GROUP BY t.year, t.month
             ORDER BY t.year, t.month
@@ -1120,29 +1335,80 @@ async def get_bdc_performance():
             ]
         }
 
+def parse_sections(value: Optional[str], available: Sequence[str]) -> Optional[List[str]]:
+    """
+    Comma-separated section names from sections=/fields=, in the order of
+    available and without repeats, so every spelling of the same selection
+    shares one response cache key; None (all) when unset or complete
+    """
+    if not value:
+        return None
+    requested = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sections {unknown}; available: {', '.join(available)}"
+        )
+    selected = [name for name in available if name in requested]
+    return None if len(selected) == len(available) else selected
+
+def parse_page(ranking: Ranking, sort: Optional[str], order: Optional[str],
+               limit: Optional[int], cursor: Optional[str]) -> Page:
+    """Validated page of a ranked list from sort=/order=/limit=/cursor="""
+    try:
+        return ranking.page(sort=sort, order=order, limit=limit, cursor=cursor)
+    except InvalidPage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/v2/bdc/comprehensive")
 async def get_bdc_comprehensive(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     company_ids: Optional[str] = None,
     product_ids: Optional[str] = None,
-    top_n: int = 10
+    top_n: int = 10,
+    sections: Optional[str] = None,
+    fields: Optional[str] = None
 ):
-    """Comprehensive BDC analytics with financial and operational insights"""
-    async with db_pool.acquire() as conn:
-        # Parse filter parameters
-        company_ids_list = [int(x) for x in company_ids.split(',')] if company_ids else None
-        product_ids_list = [int(x) for x in product_ids.split(',')] if product_ids else None
-        
-        # Get comprehensive analytics
-        return await get_bdc_comprehensive_analytics(
-            conn,
-            start_date=start_date,
-            end_date=end_date,
-            company_ids=company_ids_list,
-            product_ids=product_ids_list,
-            top_n=top_n
-        )
+    """
+    Comprehensive BDC analytics with financial and operational insights.
+    sections= (or fields=) takes a comma-separated subset of the payload's
+    sections; only those are computed and returned.
+    """
+    return await _bdc_comprehensive(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids,
+        top_n=top_n,
+        sections=parse_sections(sections or fields, BDC_SECTIONS)
+    )
+
+@cached_response("bdc:comprehensive")
+async def _bdc_comprehensive(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    company_ids: Optional[str],
+    product_ids: Optional[str],
+    top_n: int,
+    sections: Optional[List[str]]
+):
+    """Cached by the canonical section list, however the request spelled it"""
+    # Parse filter parameters
+    company_ids_list = [int(x) for x in company_ids.split(',')] if company_ids else None
+    product_ids_list = [int(x) for x in product_ids.split(',')] if product_ids else None
+    
+    # Get comprehensive analytics (sections run in parallel on pooled connections)
+    return await get_bdc_comprehensive_analytics(
+        read_pool,
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids_list,
+        product_ids=product_ids_list,
+        top_n=top_n,
+        sections=sections
+    )
 
 @app.get("/api/v2/omc/comprehensive")
 async def get_omc_comprehensive(
@@ -1150,30 +1416,60 @@ async def get_omc_comprehensive(
     end_date: Optional[str] = None,
     company_ids: Optional[str] = None,
     product_ids: Optional[str] = None,
-    top_n: int = 10
+    top_n: int = 10,
+    sections: Optional[str] = None,
+    fields: Optional[str] = None
 ):
-    """Comprehensive OMC analytics with financial and operational insights"""
-    async with db_pool.acquire() as conn:
-        # Parse filter parameters
-        company_ids_list = [int(x) for x in company_ids.split(',')] if company_ids else None
-        product_ids_list = [int(x) for x in product_ids.split(',')] if product_ids else None
-        
-        # Get comprehensive analytics
-        return await get_omc_comprehensive_analytics(
-            conn,
-            start_date=start_date,
-            end_date=end_date,
-            company_ids=company_ids_list,
-            product_ids=product_ids_list,
-            top_n=top_n
-        )
+    """
+    Comprehensive OMC analytics with financial and operational insights.
+    sections= (or fields=) takes a comma-separated subset of the payload's
+    sections; only those are computed and returned.
+    """
+    return await _omc_comprehensive(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids,
+        top_n=top_n,
+        sections=parse_sections(sections or fields, OMC_SECTIONS)
+    )
+
+@cached_response("omc:comprehensive")
+async def _omc_comprehensive(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    company_ids: Optional[str],
+    product_ids: Optional[str],
+    top_n: int,
+    sections: Optional[List[str]]
+):
+    """Cached by the canonical section list, however the request spelled it"""
+    # Parse filter parameters
+    company_ids_list = [int(x) for x in company_ids.split(',')] if company_ids else None
+    product_ids_list = [int(x) for x in product_ids.split(',')] if product_ids else None
+    
+    # Get comprehensive analytics (sections run in parallel on pooled connections)
+    return await get_omc_comprehensive_analytics(
+        read_pool,
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids_list,
+        product_ids=product_ids_list,
+        top_n=top_n,
+        sections=sections
+    )
 
 @app.get("/api/v2/bdc/operational")
+@cached_response("bdc:operational")
 async def get_bdc_operational_analytics(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     company_ids: Optional[str] = Query(None),
-    product_ids: Optional[str] = Query(None)
+    product_ids: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    order: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None)
 ):
     """Get BDC operational efficiency and consistency metrics"""
     from bdc_enhanced_analytics import get_bdc_operational_metrics
@@ -1181,17 +1477,20 @@ async def get_bdc_operational_analytics(
     # Parse comma-separated IDs
     company_ids_list = [int(id) for id in company_ids.split(',')] if company_ids else None
     product_ids_list = [int(id) for id in product_ids.split(',')] if product_ids else None
+    page = parse_page(OPERATIONAL_RANKING, sort, order, limit, cursor)
     
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_bdc_operational_metrics(
             conn,
             start_date=start_date,
             end_date=end_date,
             company_ids=company_ids_list,
-            product_ids=product_ids_list
+            product_ids=product_ids_list,
+            page=page
         )
 
 @app.get("/api/v2/bdc/growth")
+@cached_response("bdc:growth")
 async def get_bdc_growth_analytics(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -1205,7 +1504,7 @@ async def get_bdc_growth_analytics(
     company_ids_list = [int(id) for id in company_ids.split(',')] if company_ids else None
     product_ids_list = [int(id) for id in product_ids.split(',')] if product_ids else None
     
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_bdc_growth_analytics(
             conn,
             start_date=start_date,
@@ -1215,11 +1514,16 @@ async def get_bdc_growth_analytics(
         )
 
 @app.get("/api/v2/bdc/network")
+@cached_response("bdc:network")
 async def get_bdc_network_analytics(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     company_ids: Optional[str] = Query(None),
-    product_ids: Optional[str] = Query(None)
+    product_ids: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    order: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None)
 ):
     """Get BDC network and relationship analytics"""
     from bdc_enhanced_analytics import get_bdc_network_analytics
@@ -1227,17 +1531,20 @@ async def get_bdc_network_analytics(
     # Parse comma-separated IDs
     company_ids_list = [int(id) for id in company_ids.split(',')] if company_ids else None
     product_ids_list = [int(id) for id in product_ids.split(',')] if product_ids else None
+    page = parse_page(NETWORK_RANKING, sort, order, limit, cursor)
     
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_bdc_network_analytics(
             conn,
             start_date=start_date,
             end_date=end_date,
             company_ids=company_ids_list,
-            product_ids=product_ids_list
+            product_ids=product_ids_list,
+            page=page
         )
 
 @app.get("/api/v2/bdc/supply-chain")
+@cached_response("bdc:supply-chain")
 async def get_bdc_supply_chain_analytics(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -1251,7 +1558,7 @@ async def get_bdc_supply_chain_analytics(
     company_ids_list = [int(id) for id in company_ids.split(',')] if company_ids else None
     product_ids_list = [int(id) for id in product_ids.split(',')] if product_ids else None
     
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_bdc_supply_chain_analytics(
             conn,
             start_date=start_date,
@@ -1261,24 +1568,27 @@ async def get_bdc_supply_chain_analytics(
         )
 
 @app.get("/api/v2/omc/performance")
+@cached_response("omc:performance")
 async def get_omc_performance():
     """OMC performance analytics - NO AUTH for development"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
+        src = await get_fact_source(conn, "OMC")
+        
         # Top OMC companies by volume
         top_companies = await conn.fetch(
-            """
+            f"""
             SELECT 
                 c.company_name,
-                SUM(f.volume_liters) as total_volume_liters,
-                SUM(f.volume_mt) as total_volume_mt,
-                SUM(f.volume_kg) as total_volume_kg,
-                COUNT(f.transaction_id) as transaction_count,
+                {src.sum('volume_liters')} as total_volume_liters,
+                {src.sum('volume_mt')} as total_volume_mt,
+                {src.sum('volume_kg')} as total_volume_kg,
+                {src.count()} as transaction_count,
                 ROUND(
-                    (SUM(f.volume_liters) / NULLIF(
-                        (SELECT SUM(volume_liters) FROM petroverse.fact_omc_transactions), 0
+                    ({src.sum('volume_liters')} / NULLIF(
+                        (SELECT {src.sum('volume_liters')} FROM {src.relation} f), 0
                     ) * 100)::numeric, 2
                 ) as market_share_percent
-            FROM petroverse.fact_omc_transactions f
+            FROM {src.relation} f
             JOIN petroverse.companies c ON f.company_id = c.company_id
             GROUP BY c.company_name
             ORDER BY total_volume_liters DESC
@@ -1288,15 +1598,15 @@ async def get_omc_performance():
         
         # OMC product distribution
         product_mix = await conn.fetch(
-            """
+            f"""
             SELECT 
                 p.product_name,
                 p.product_category,
-                SUM(f.volume_liters) as total_volume_liters,
-                SUM(f.volume_mt) as total_volume_mt,
-                SUM(f.volume_kg) as total_volume_kg,
-                COUNT(f.transaction_id) as transaction_count
-            FROM petroverse.fact_omc_transactions f
+                {src.sum('volume_liters')} as total_volume_liters,
+                {src.sum('volume_mt')} as total_volume_mt,
+                {src.sum('volume_kg')} as total_volume_kg,
+                {src.count()} as transaction_count
+            FROM {src.relation} f
             JOIN petroverse.products p ON f.product_id = p.product_id
             GROUP BY p.product_name, p.product_category
             ORDER BY total_volume_liters DESC
@@ -1305,15 +1615,15 @@ async def get_omc_performance():
         
         # Monthly performance trend
         monthly_trend = await conn.fetch(
-            """
+            f"""
             SELECT 
                 t.year, t.month,
                 CONCAT(t.year, '-', LPAD(t.month::text, 2, '0')) as period,
-                SUM(f.volume_liters) as volume_liters,
-                SUM(f.volume_mt) as volume_mt,
-                SUM(f.volume_kg) as volume_kg,
-                COUNT(f.transaction_id) as transactions
-            FROM petroverse.fact_omc_transactions f
+                {src.sum('volume_liters')} as volume_liters,
+                {src.sum('volume_mt')} as volume_mt,
+                {src.sum('volume_kg')} as volume_kg,
+                {src.count()} as transactions
+            FROM {src.relation} f
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             GROUP BY t.year, t.month
             ORDER BY t.year, t.month
@@ -1353,18 +1663,15 @@ async def get_omc_performance():
         }
 
 @app.get("/api/v2/products/analysis")
+@cached_response("products:analysis", datasets=["bdc", "omc"])
 async def get_products_analysis():
     """Product analytics - NO AUTH for development"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # Overall product performance
         product_performance = await conn.fetch(
-            """
+            f"""
             WITH combined_facts AS (
-                SELECT product_id, volume_liters, volume_mt, volume_kg, 'BDC' as source
-                FROM petroverse.fact_bdc_transactions
-                UNION ALL
-                SELECT product_id, volume_liters, volume_mt, volume_kg, 'OMC' as source
-                FROM petroverse.fact_omc_transactions
+                SELECT *, business_type as source FROM {COMBINED_FACTS} cf
             )
             SELECT 
                 p.product_name,
@@ -1393,13 +1700,9 @@ async def get_products_analysis():
         
         # Product trends over time
         product_trends = await conn.fetch(
-            """
+            f"""
             WITH combined_facts AS (
-                SELECT product_id, date_id, volume_liters, volume_mt, volume_kg
-                FROM petroverse.fact_bdc_transactions
-                UNION ALL
-                SELECT product_id, date_id, volume_liters, volume_mt, volume_kg
-                FROM petroverse.fact_omc_transactions
+                SELECT * FROM {COMBINED_FACTS} cf
             )
             SELECT 
                 p.product_name,
@@ -1446,9 +1749,10 @@ async def get_products_analysis():
         }
 
 @app.get("/api/v2/filters")
+@cached_response("filters", datasets=["bdc", "omc"])
 async def get_filters():
     """Get filter options - NO AUTH for development"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # Get companies
         companies = await conn.fetch(
             "SELECT company_id, company_name, company_type FROM petroverse.companies ORDER BY company_name"
@@ -1491,7 +1795,25 @@ async def get_filters():
         }
 
 # Industry analytics filtered endpoints
+
+# Filter sets compiled once so each query keeps a single prepared statement
+EXECUTIVE_SUMMARY_FILTERS = FilterSet(
+    Predicate("start_date", "t.full_date >= {}", "date", to_date),
+    Predicate("end_date", "t.full_date <= {}", "date", to_date),
+    Predicate("company_ids", "c.company_id = ANY({})", "integer[]"),
+    Predicate("product_ids", "p.product_id = ANY({})", "integer[]"),
+    Predicate("business_types", "c.company_type = ANY({})", "text[]"),
+)
+
+EXECUTIVE_FILTERS = FilterSet(
+    Predicate("start_date", "t.full_date >= {}", "date", to_date),
+    Predicate("end_date", "t.full_date <= {}", "date", to_date),
+    Predicate("company_type", "c.company_type = {}", "text"),
+    Predicate("companies", "c.company_name = ANY({})", "text[]"),
+    Predicate("products", "p.product_name = ANY({})", "text[]"),
+)
 @app.get("/api/v2/executive/summary/filtered")
+@cached_response("executive:summary-filtered", datasets=["bdc", "omc"])
 async def get_executive_summary_filtered(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -1501,204 +1823,172 @@ async def get_executive_summary_filtered(
     top_n: int = 10
 ):
     """Filtered executive dashboard with industry analytics"""
-    from datetime import datetime
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = EXECUTIVE_SUMMARY_FILTERS.sql
+    params = EXECUTIVE_SUMMARY_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=[int(x.strip()) for x in company_ids.split(',')] if company_ids else None,
+        product_ids=[int(x.strip()) for x in product_ids.split(',')] if product_ids else None,
+        # Both business types selected means no filter
+        business_types=[x.strip() for x in business_types.split(',')]
+        if business_types and business_types != "BDC,OMC" else None
+    )
     
-    async with db_pool.acquire() as conn:
-        # Build WHERE clauses
-        where_conditions = ["1=1"]  # Base condition
-        params = []
-        param_count = 0
-        
-        # Date filtering - convert strings to date objects
-        if start_date:
-            param_count += 1
-            where_conditions.append(f"t.full_date >= ${param_count}")
-            params.append(datetime.strptime(start_date, '%Y-%m-%d').date())
-        if end_date:
-            param_count += 1
-            where_conditions.append(f"t.full_date <= ${param_count}")
-            params.append(datetime.strptime(end_date, '%Y-%m-%d').date())
-            
-        # Company filtering
-        if company_ids:
-            company_list = [int(x.strip()) for x in company_ids.split(',')]
-            param_count += 1
-            where_conditions.append(f"c.company_id = ANY(${param_count}::integer[])")
-            params.append(company_list)
-            
-        # Product filtering  
-        if product_ids:
-            product_list = [int(x.strip()) for x in product_ids.split(',')]
-            param_count += 1
-            where_conditions.append(f"p.product_id = ANY(${param_count}::integer[])")
-            params.append(product_list)
-            
-        # Business type filtering (BDC vs OMC)
-        business_filter = ""
-        if business_types and business_types != "BDC,OMC":
-            types = [x.strip() for x in business_types.split(',')]
-            param_count += 1
-            business_filter = f"AND c.company_type = ANY(${param_count}::text[])"
-            params.append(types)
-            
-        where_clause = " AND ".join(where_conditions) + business_filter
-        
-        # Industry metrics (BDC vs OMC)
-        summary_query = f"""
-        WITH bdc_data AS (
-            SELECT 
-                c.company_id, c.company_name, c.company_type,
-                p.product_id, p.product_name, p.product_category,
-                t.date_id, t.full_date, t.year, t.month,
-                f.volume_liters, f.volume_mt, f.volume_kg,
-                'BDC' as business_type
-            FROM petroverse.fact_bdc_transactions f
-            JOIN petroverse.companies c ON f.company_id = c.company_id
-            JOIN petroverse.products p ON f.product_id = p.product_id
-            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
-            WHERE {where_clause}
-        ),
-        omc_data AS (
-            SELECT 
-                c.company_id, c.company_name, c.company_type,
-                p.product_id, p.product_name, p.product_category,
-                t.date_id, t.full_date, t.year, t.month,
-                f.volume_liters, f.volume_mt, f.volume_kg,
-                'OMC' as business_type
-            FROM petroverse.fact_omc_transactions f
-            JOIN petroverse.companies c ON f.company_id = c.company_id
-            JOIN petroverse.products p ON f.product_id = p.product_id
-            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
-            WHERE {where_clause}
-        ),
-        combined_data AS (
-            SELECT * FROM bdc_data
-            UNION ALL
-            SELECT * FROM omc_data
-        )
+    # Industry metrics (BDC vs OMC)
+    summary_query = f"""
+    WITH bdc_data AS (
+        SELECT 
+            c.company_id, c.company_name, c.company_type,
+            p.product_id, p.product_name, p.product_category,
+            t.date_id, t.full_date, t.year, t.month,
+            f.volume_liters, f.volume_mt, f.volume_kg,
+            'BDC' as business_type
+        FROM petroverse.fact_bdc_transactions f
+        JOIN petroverse.companies c ON f.company_id = c.company_id
+        JOIN petroverse.products p ON f.product_id = p.product_id
+        JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        WHERE {where_clause}
+    ),
+    omc_data AS (
         SELECT 
-            -- Overall metrics
-            COUNT(DISTINCT company_id) as total_companies,
-            COUNT(DISTINCT product_id) as total_products,
-            SUM(volume_liters) as total_volume_liters,
-            SUM(volume_mt) as total_volume_mt,
-            SUM(volume_kg) as total_volume_kg,
-            COUNT(*) as total_transactions,
+            c.company_id, c.company_name, c.company_type,
+            p.product_id, p.product_name, p.product_category,
+            t.date_id, t.full_date, t.year, t.month,
+            f.volume_liters, f.volume_mt, f.volume_kg,
+            'OMC' as business_type
+        FROM petroverse.fact_omc_transactions f
+        JOIN petroverse.companies c ON f.company_id = c.company_id
+        JOIN petroverse.products p ON f.product_id = p.product_id
+        JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        WHERE {where_clause}
+    ),
+    combined_data AS (
+        SELECT * FROM bdc_data
+        UNION ALL
+        SELECT * FROM omc_data
+    )
+    SELECT 
+        -- Overall metrics
+        COUNT(DISTINCT company_id) as total_companies,
+        COUNT(DISTINCT product_id) as total_products,
+        SUM(volume_liters) as total_volume_liters,
+        SUM(volume_mt) as total_volume_mt,
+        SUM(volume_kg) as total_volume_kg,
+        COUNT(*) as total_transactions,
+        
+        -- Business type breakdown
+        SUM(CASE WHEN business_type = 'BDC' THEN volume_liters ELSE 0 END) as bdc_volume_liters,
+        SUM(CASE WHEN business_type = 'OMC' THEN volume_liters ELSE 0 END) as omc_volume_liters,
+        SUM(CASE WHEN business_type = 'BDC' THEN volume_mt ELSE 0 END) as bdc_volume_mt,
+        SUM(CASE WHEN business_type = 'OMC' THEN volume_mt ELSE 0 END) as omc_volume_mt,
+        COUNT(DISTINCT CASE WHEN business_type = 'BDC' THEN company_id END) as bdc_companies,
+        COUNT(DISTINCT CASE WHEN business_type = 'OMC' THEN company_id END) as omc_companies,
+        
+        -- Industry distribution ratio
+        CASE 
+            WHEN SUM(volume_liters) > 0 
+            THEN SUM(CASE WHEN business_type = 'BDC' THEN volume_liters ELSE 0 END) / 
+                 SUM(volume_liters) * 100
+            ELSE 0 
+        END as bdc_market_share
+    FROM combined_data
+    """
+    
+    # Monthly industry trends (BDC vs OMC)
+    trend_query = f"""
+    WITH monthly_flow AS (
+        SELECT 
+            t.year, t.month,
+            CONCAT(t.year, '-', LPAD(t.month::text, 2, '0')) as period,
+            SUM(CASE WHEN c.company_type = 'BDC' THEN f.volume_liters ELSE 0 END) as bdc_volume,
+            SUM(CASE WHEN c.company_type = 'OMC' THEN f.volume_liters ELSE 0 END) as omc_volume,
+            SUM(CASE WHEN c.company_type = 'BDC' THEN f.volume_mt ELSE 0 END) as bdc_volume_mt,
+            SUM(CASE WHEN c.company_type = 'OMC' THEN f.volume_mt ELSE 0 END) as omc_volume_mt
+        FROM {COMBINED_FACTS} f
+        JOIN petroverse.companies c ON f.company_id = c.company_id
+        JOIN petroverse.products p ON f.product_id = p.product_id
+        JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+        WHERE {where_clause}
+        GROUP BY t.year, t.month
+        ORDER BY t.year, t.month
+    )
+    SELECT 
+        *,
+        CASE WHEN (bdc_volume + omc_volume) > 0 
+            THEN bdc_volume / (bdc_volume + omc_volume) * 100 
+            ELSE 0 
+        END as bdc_share_percentage
+    FROM monthly_flow
+    """
+    
+    # The two sections are independent: run them on separate pooled connections
+    db = PooledQueries(read_pool)
+    summary, trends = await db.gather(
+        db.fetchrow(summary_query, *params, name="executive.filtered_summary"),
+        db.fetch(trend_query, *params, name="executive.filtered_trends")
+    )
+    
+    return {
+        "kpis": {
+            "total_companies": summary["total_companies"] or 0,
+            "total_products": summary["total_products"] or 0,
+            "total_volume_liters": float(summary["total_volume_liters"] or 0),
+            "total_volume_mt": float(summary["total_volume_mt"] or 0),
+            "total_volume_kg": float(summary["total_volume_kg"] or 0),
+            "total_transactions": summary["total_transactions"] or 0,
             
-            -- Business type breakdown
-            SUM(CASE WHEN business_type = 'BDC' THEN volume_liters ELSE 0 END) as bdc_volume_liters,
-            SUM(CASE WHEN business_type = 'OMC' THEN volume_liters ELSE 0 END) as omc_volume_liters,
-            SUM(CASE WHEN business_type = 'BDC' THEN volume_mt ELSE 0 END) as bdc_volume_mt,
-            SUM(CASE WHEN business_type = 'OMC' THEN volume_mt ELSE 0 END) as omc_volume_mt,
-            COUNT(DISTINCT CASE WHEN business_type = 'BDC' THEN company_id END) as bdc_companies,
-            COUNT(DISTINCT CASE WHEN business_type = 'OMC' THEN company_id END) as omc_companies,
+            # Industry metrics
+            "bdc_volume_liters": float(summary["bdc_volume_liters"] or 0),
+            "omc_volume_liters": float(summary["omc_volume_liters"] or 0),
+            "bdc_volume_mt": float(summary["bdc_volume_mt"] or 0),
+            "omc_volume_mt": float(summary["omc_volume_mt"] or 0),
+            "bdc_companies": summary["bdc_companies"] or 0,
+            "omc_companies": summary["omc_companies"] or 0,
+            "bdc_market_share": float(summary["bdc_market_share"] or 0),
             
-            -- Industry distribution ratio
-            CASE 
-                WHEN SUM(volume_liters) > 0 
-                THEN SUM(CASE WHEN business_type = 'BDC' THEN volume_liters ELSE 0 END) / 
-                     SUM(volume_liters) * 100
-                ELSE 0 
-            END as bdc_market_share
-        FROM combined_data
-        """
-        
-        summary = await conn.fetchrow(summary_query, *params)
-        
-        # Monthly industry trends (BDC vs OMC)
-        trend_query = f"""
-        WITH monthly_flow AS (
-            SELECT 
-                t.year, t.month,
-                CONCAT(t.year, '-', LPAD(t.month::text, 2, '0')) as period,
-                SUM(CASE WHEN c.company_type = 'BDC' THEN f.volume_liters ELSE 0 END) as bdc_volume,
-                SUM(CASE WHEN c.company_type = 'OMC' THEN f.volume_liters ELSE 0 END) as omc_volume,
-                SUM(CASE WHEN c.company_type = 'BDC' THEN f.volume_mt ELSE 0 END) as bdc_volume_mt,
-                SUM(CASE WHEN c.company_type = 'OMC' THEN f.volume_mt ELSE 0 END) as omc_volume_mt
-            FROM (
-                SELECT company_id, product_id, date_id, volume_liters, volume_mt FROM petroverse.fact_bdc_transactions
-                UNION ALL
-                SELECT company_id, product_id, date_id, volume_liters, volume_mt FROM petroverse.fact_omc_transactions
-            ) f
-            JOIN petroverse.companies c ON f.company_id = c.company_id
-            JOIN petroverse.products p ON f.product_id = p.product_id
-            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
-            WHERE {where_clause}
-            GROUP BY t.year, t.month
-            ORDER BY t.year, t.month
-        )
-        SELECT 
-            *,
-            CASE WHEN (bdc_volume + omc_volume) > 0 
-                THEN bdc_volume / (bdc_volume + omc_volume) * 100 
-                ELSE 0 
-            END as bdc_share_percentage
-        FROM monthly_flow
-        """
-        
-        trends = await conn.fetch(trend_query, *params)
-        
-        return {
-            "kpis": {
-                "total_companies": summary["total_companies"] or 0,
-                "total_products": summary["total_products"] or 0,
-                "total_volume_liters": float(summary["total_volume_liters"] or 0),
-                "total_volume_mt": float(summary["total_volume_mt"] or 0),
-                "total_volume_kg": float(summary["total_volume_kg"] or 0),
-                "total_transactions": summary["total_transactions"] or 0,
-                
-                # Industry metrics
-                "bdc_volume_liters": float(summary["bdc_volume_liters"] or 0),
-                "omc_volume_liters": float(summary["omc_volume_liters"] or 0),
-                "bdc_volume_mt": float(summary["bdc_volume_mt"] or 0),
-                "omc_volume_mt": float(summary["omc_volume_mt"] or 0),
-                "bdc_companies": summary["bdc_companies"] or 0,
-                "omc_companies": summary["omc_companies"] or 0,
-                "bdc_market_share": float(summary["bdc_market_share"] or 0),
-                
-                # Industry analytics indicators
-                "bdc_to_omc_ratio": float(summary["bdc_volume_liters"] / max(summary["omc_volume_liters"], 1) if summary["bdc_volume_liters"] and summary["omc_volume_liters"] else 0),
-                "avg_bdc_company_volume": float(summary["bdc_volume_liters"] / max(summary["bdc_companies"], 1) if summary["bdc_volume_liters"] and summary["bdc_companies"] else 0),
-                "avg_omc_company_volume": float(summary["omc_volume_liters"] / max(summary["omc_companies"], 1) if summary["omc_volume_liters"] and summary["omc_companies"] else 0)
-            },
-            "industry_trends": [
-                {
-                    "period": row["period"],
-                    "bdc_volume_liters": float(row["bdc_volume"] or 0),
-                    "omc_volume_liters": float(row["omc_volume"] or 0),
-                    "bdc_volume_mt": float(row["bdc_volume_mt"] or 0),
-                    "omc_volume_mt": float(row["omc_volume_mt"] or 0),
-                    "bdc_share_percentage": float(row["bdc_share_percentage"] or 0),
-                    "total_volume": float((row["bdc_volume"] or 0) + (row["omc_volume"] or 0))
-                } for row in trends
-            ],
-            "filters_applied": {
-                "start_date": start_date,
-                "end_date": end_date,
-                "company_count": len(company_ids.split(',')) if company_ids else 0,
-                "product_count": len(product_ids.split(',')) if product_ids else 0,
-                "business_types": business_types.split(',') if business_types else ['BDC', 'OMC'],
-                "industry_view": not business_types or business_types == "BDC,OMC"
-            }
+            # Industry analytics indicators
+            "bdc_to_omc_ratio": float(summary["bdc_volume_liters"] / max(summary["omc_volume_liters"], 1) if summary["bdc_volume_liters"] and summary["omc_volume_liters"] else 0),
+            "avg_bdc_company_volume": float(summary["bdc_volume_liters"] / max(summary["bdc_companies"], 1) if summary["bdc_volume_liters"] and summary["bdc_companies"] else 0),
+            "avg_omc_company_volume": float(summary["omc_volume_liters"] / max(summary["omc_companies"], 1) if summary["omc_volume_liters"] and summary["omc_companies"] else 0)
+        },
+        "industry_trends": [
+            {
+                "period": row["period"],
+                "bdc_volume_liters": float(row["bdc_volume"] or 0),
+                "omc_volume_liters": float(row["omc_volume"] or 0),
+                "bdc_volume_mt": float(row["bdc_volume_mt"] or 0),
+                "omc_volume_mt": float(row["omc_volume_mt"] or 0),
+                "bdc_share_percentage": float(row["bdc_share_percentage"] or 0),
+                "total_volume": float((row["bdc_volume"] or 0) + (row["omc_volume"] or 0))
+            } for row in trends
+        ],
+        "filters_applied": {
+            "start_date": start_date,
+            "end_date": end_date,
+            "company_count": len(company_ids.split(',')) if company_ids else 0,
+            "product_count": len(product_ids.split(',')) if product_ids else 0,
+            "business_types": business_types.split(',') if business_types else ['BDC', 'OMC'],
+            "industry_view": not business_types or business_types == "BDC,OMC"
         }
+    }
 
 @app.get("/api/v2/executive/overview")
+@cached_response("executive:overview", tenant_arg="user", datasets=["bdc", "omc"], dated=True)
 async def get_executive_overview(user: UserModel = Depends(get_current_user)):
     """Get executive dashboard overview data from real database"""
     
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # Get current month data
         current_month_data = await conn.fetchrow(
-            """
+            f"""
             SELECT 
-                SUM(CASE WHEN c.company_type = 'BDC' THEN b.volume_liters ELSE 0 END) as bdc_volume,
-                SUM(CASE WHEN c.company_type = 'OMC' THEN o.volume_liters ELSE 0 END) as omc_volume,
-                COUNT(DISTINCT CASE WHEN c.company_type = 'BDC' THEN c.company_id END) as bdc_count,
-                COUNT(DISTINCT CASE WHEN c.company_type = 'OMC' THEN c.company_id END) as omc_count
-            FROM petroverse.companies c
-            LEFT JOIN petroverse.fact_bdc_transactions b ON c.company_id = b.company_id
-            LEFT JOIN petroverse.fact_omc_transactions o ON c.company_id = o.company_id
-            LEFT JOIN petroverse.time_dimension t ON COALESCE(b.date_id, o.date_id) = t.date_id
+                SUM(CASE WHEN f.business_type = 'BDC' THEN f.volume_liters ELSE 0 END) as bdc_volume,
+                SUM(CASE WHEN f.business_type = 'OMC' THEN f.volume_liters ELSE 0 END) as omc_volume,
+                COUNT(DISTINCT CASE WHEN f.business_type = 'BDC' THEN f.company_id END) as bdc_count,
+                COUNT(DISTINCT CASE WHEN f.business_type = 'OMC' THEN f.company_id END) as omc_count
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE t.year = EXTRACT(YEAR FROM CURRENT_DATE) 
                 AND t.month = EXTRACT(MONTH FROM CURRENT_DATE)
             """
@@ -1706,14 +1996,12 @@ async def get_executive_overview(user: UserModel = Depends(get_current_user)):
         
         # Get previous month data for comparison
         prev_month_data = await conn.fetchrow(
-            """
+            f"""
             SELECT 
-                SUM(CASE WHEN c.company_type = 'BDC' THEN b.volume_liters ELSE 0 END) as bdc_volume,
-                SUM(CASE WHEN c.company_type = 'OMC' THEN o.volume_liters ELSE 0 END) as omc_volume
-            FROM petroverse.companies c
-            LEFT JOIN petroverse.bdc_performance_metrics b ON c.company_id = b.company_id
-            LEFT JOIN petroverse.omc_performance_metrics o ON c.company_id = o.company_id
-            LEFT JOIN petroverse.time_dimension t ON COALESCE(b.date_id, o.date_id) = t.date_id
+                SUM(CASE WHEN f.business_type = 'BDC' THEN f.volume_liters ELSE 0 END) as bdc_volume,
+                SUM(CASE WHEN f.business_type = 'OMC' THEN f.volume_liters ELSE 0 END) as omc_volume
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE t.full_date >= CURRENT_DATE - INTERVAL '2 months'
                 AND t.full_date < CURRENT_DATE - INTERVAL '1 month'
             """
@@ -1721,16 +2009,14 @@ async def get_executive_overview(user: UserModel = Depends(get_current_user)):
         
         # Get 12-month trend data
         trend_data = await conn.fetch(
-            """
+            f"""
             SELECT 
                 t.month,
                 t.year,
-                SUM(CASE WHEN c.company_type = 'BDC' THEN b.volume_liters ELSE 0 END) as bdc_volume,
-                SUM(CASE WHEN c.company_type = 'OMC' THEN o.volume_liters ELSE 0 END) as omc_volume
-            FROM petroverse.companies c
-            LEFT JOIN petroverse.bdc_performance_metrics b ON c.company_id = b.company_id
-            LEFT JOIN petroverse.omc_performance_metrics o ON c.company_id = o.company_id
-            LEFT JOIN petroverse.time_dimension t ON COALESCE(b.date_id, o.date_id) = t.date_id
+                SUM(CASE WHEN f.business_type = 'BDC' THEN f.volume_liters ELSE 0 END) as bdc_volume,
+                SUM(CASE WHEN f.business_type = 'OMC' THEN f.volume_liters ELSE 0 END) as omc_volume
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE t.full_date >= CURRENT_DATE - INTERVAL '12 months'
             GROUP BY t.year, t.month
             ORDER BY t.year, t.month
@@ -1739,14 +2025,14 @@ async def get_executive_overview(user: UserModel = Depends(get_current_user)):
         
         # Get top BDC companies
         top_bdcs = await conn.fetch(
-            """
+            f"""
             SELECT 
                 c.company_name,
-                SUM(b.volume_liters) as total_volume,
-                ROUND((SUM(b.volume_liters) / NULLIF(SUM(SUM(b.volume_liters)) OVER (), 0) * 100)::numeric, 2) as market_share
-            FROM petroverse.bdc_performance_metrics b
-            JOIN petroverse.companies c ON b.company_id = c.company_id
-            WHERE c.company_type = 'BDC'
+                SUM(f.volume_liters) as total_volume,
+                ROUND((SUM(f.volume_liters) / NULLIF(SUM(SUM(f.volume_liters)) OVER (), 0) * 100)::numeric, 2) as market_share
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.companies c ON f.company_id = c.company_id
+            WHERE f.business_type = 'BDC' AND c.company_type = 'BDC'
             GROUP BY c.company_name
             ORDER BY total_volume DESC
             LIMIT 5
@@ -1755,14 +2041,14 @@ async def get_executive_overview(user: UserModel = Depends(get_current_user)):
         
         # Get top OMC companies
         top_omcs = await conn.fetch(
-            """
+            f"""
             SELECT 
                 c.company_name,
-                SUM(o.volume_liters) as total_volume,
-                ROUND((SUM(o.volume_liters) / NULLIF(SUM(SUM(o.volume_liters)) OVER (), 0) * 100)::numeric, 2) as market_share
-            FROM petroverse.omc_performance_metrics o
-            JOIN petroverse.companies c ON o.company_id = c.company_id
-            WHERE c.company_type = 'OMC'
+                SUM(f.volume_liters) as total_volume,
+                ROUND((SUM(f.volume_liters) / NULLIF(SUM(SUM(f.volume_liters)) OVER (), 0) * 100)::numeric, 2) as market_share
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.companies c ON f.company_id = c.company_id
+            WHERE f.business_type = 'OMC' AND c.company_type = 'OMC'
             GROUP BY c.company_name
             ORDER BY total_volume DESC
             LIMIT 5
@@ -1771,14 +2057,13 @@ async def get_executive_overview(user: UserModel = Depends(get_current_user)):
         
         # Get product distribution
         product_dist = await conn.fetch(
-            """
+            f"""
             SELECT 
                 p.product_name,
-                SUM(COALESCE(b.volume_liters, 0) + COALESCE(o.volume_liters, 0)) as total_volume
-            FROM petroverse.products p
-            LEFT JOIN petroverse.bdc_performance_metrics b ON p.product_id = b.product_id
-            LEFT JOIN petroverse.omc_performance_metrics o ON p.product_id = o.product_id
-            WHERE COALESCE(b.volume_liters, 0) + COALESCE(o.volume_liters, 0) > 0
+                SUM(f.volume_liters) as total_volume
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.products p ON f.product_id = p.product_id
+            WHERE f.volume_liters > 0
             GROUP BY p.product_name
             ORDER BY total_volume DESC
             LIMIT 5
@@ -1842,6 +2127,7 @@ async def get_executive_overview(user: UserModel = Depends(get_current_user)):
         }
 
 @app.get("/api/v2/executive/filtered")
+@cached_response("executive:filtered", tenant_arg="user", datasets=["bdc", "omc"])
 async def get_executive_filtered_data(
     date_start: Optional[str] = None,
     date_end: Optional[str] = None,
@@ -1853,53 +2139,28 @@ async def get_executive_filtered_data(
 ):
     """Get filtered executive dashboard data"""
     
-    async with db_pool.acquire() as conn:
-        # Build filter conditions
-        filters = []
-        params = []
-        param_count = 0
-        
-        if date_start:
-            param_count += 1
-            filters.append(f"t.full_date >= ${param_count}")
-            params.append(datetime.strptime(date_start, "%Y-%m-%d").date())
-        
-        if date_end:
-            param_count += 1
-            filters.append(f"t.full_date <= ${param_count}")
-            params.append(datetime.strptime(date_end, "%Y-%m-%d").date())
-        
-        if company_type and company_type != "All":
-            param_count += 1
-            filters.append(f"c.company_type = ${param_count}")
-            params.append(company_type)
-        
-        if companies:
-            company_list = companies.split(",")
-            param_count += 1
-            filters.append(f"c.company_name = ANY(${param_count}::text[])")
-            params.append(company_list)
-        
-        if products:
-            product_list = products.split(",")
-            param_count += 1
-            filters.append(f"p.product_name = ANY(${param_count}::text[])")
-            params.append(product_list)
-        
-        where_clause = "WHERE " + " AND ".join(filters) if filters else ""
+    async with read_pool.acquire() as conn:
+        # Canonical WHERE clause: one SQL text per query whatever filters are set
+        where_clause = f"WHERE {EXECUTIVE_FILTERS.sql}"
+        params = EXECUTIVE_FILTERS.params(
+            start_date=date_start,
+            end_date=date_end,
+            company_type=company_type if company_type != "All" else None,
+            companies=companies.split(",") if companies else None,
+            products=products.split(",") if products else None
+        )
         
         # Get filtered volume data
         volume_query = f"""
             SELECT 
-                SUM(CASE WHEN c.company_type = 'BDC' THEN b.volume_liters ELSE 0 END) as bdc_volume,
-                SUM(CASE WHEN c.company_type = 'OMC' THEN o.volume_liters ELSE 0 END) as omc_volume,
-                COUNT(DISTINCT CASE WHEN c.company_type = 'BDC' THEN c.company_id END) as bdc_count,
-                COUNT(DISTINCT CASE WHEN c.company_type = 'OMC' THEN c.company_id END) as omc_count
-            FROM petroverse.companies c
-            LEFT JOIN petroverse.bdc_performance_metrics b ON c.company_id = b.company_id
-            LEFT JOIN petroverse.omc_performance_metrics o ON c.company_id = o.company_id
-            LEFT JOIN petroverse.time_dimension t ON COALESCE(b.date_id, o.date_id) = t.date_id
-            LEFT JOIN petroverse.products p ON COALESCE(b.product_id, o.product_id) = p.product_id
+                SUM(CASE WHEN f.business_type = 'BDC' THEN f.volume_liters ELSE 0 END) as bdc_volume,
+                SUM(CASE WHEN f.business_type = 'OMC' THEN f.volume_liters ELSE 0 END) as omc_volume,
+                COUNT(DISTINCT CASE WHEN f.business_type = 'BDC' THEN f.company_id END) as bdc_count,
+                COUNT(DISTINCT CASE WHEN f.business_type = 'OMC' THEN f.company_id END) as omc_count
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.companies c ON f.company_id = c.company_id
+            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+            JOIN petroverse.products p ON f.product_id = p.product_id
             {where_clause}
         """
         
@@ -1910,20 +2171,18 @@ async def get_executive_filtered_data(
             SELECT 
                 c.company_name,
                 c.company_type,
-                SUM(COALESCE(b.volume_liters, 0) + COALESCE(o.volume_liters, 0)) as total_volume
-            FROM petroverse.companies c
-            LEFT JOIN petroverse.bdc_performance_metrics b ON c.company_id = b.company_id
-            LEFT JOIN petroverse.omc_performance_metrics o ON c.company_id = o.company_id
-            LEFT JOIN petroverse.time_dimension t ON COALESCE(b.date_id, o.date_id) = t.date_id
-            LEFT JOIN petroverse.products p ON COALESCE(b.product_id, o.product_id) = p.product_id
+                SUM(f.volume_liters) as total_volume
+            FROM {COMBINED_FACTS} f
+            JOIN petroverse.companies c ON f.company_id = c.company_id
+            JOIN petroverse.time_dimension t ON f.date_id = t.date_id
+            JOIN petroverse.products p ON f.product_id = p.product_id
             {where_clause}
             GROUP BY c.company_name, c.company_type
             ORDER BY total_volume DESC
-            LIMIT ${param_count + 1}
+            LIMIT ${EXECUTIVE_FILTERS.next_slot}
         """
         
-        params.append(top_n)
-        top_companies = await conn.fetch(top_companies_query, *params)
+        top_companies = await conn.fetch(top_companies_query, *params, top_n)
         
         return {
             "summary": {
@@ -1944,18 +2203,20 @@ async def get_executive_filtered_data(
 
 # Advanced Analytics Endpoints
 @app.get("/api/v2/analytics/market-concentration")
+@cached_response("analytics:market-concentration", datasets=["bdc", "omc"])
 async def get_market_concentration(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     business_type: Optional[str] = None
 ):
     """Get market concentration metrics including HHI and KPIs"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_market_concentration_metrics(
             conn, start_date, end_date
         )
 
 @app.get("/api/v2/analytics/company-benchmarking")
+@cached_response("analytics:company-benchmarking", datasets=["bdc", "omc"])
 async def get_company_benchmarking_general(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -1963,7 +2224,7 @@ async def get_company_benchmarking_general(
     top_n: Optional[int] = 10
 ):
     """Get general company benchmarking analysis"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # Get top companies directly from database
         if business_type == "OMC":
             company_table = "petroverse.fact_omc_transactions"
@@ -2026,18 +2287,20 @@ async def get_company_benchmarking_general(
         }
 
 @app.get("/api/v2/analytics/company-benchmarking/{company_id}")
+@cached_response("analytics:company-benchmark", datasets=["bdc", "omc"])
 async def get_company_benchmark(
     company_id: int,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
 ):
     """Get company benchmarking analysis"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_company_benchmarking(
             conn, company_id, start_date, end_date
         )
 
 @app.get("/api/v2/analytics/supply-chain-efficiency")
+@cached_response("analytics:supply-chain-efficiency", datasets=["bdc", "omc"])
 async def get_supply_chain(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -2045,23 +2308,25 @@ async def get_supply_chain(
 ):
     """Get supply chain efficiency metrics"""
     company_list = [int(x) for x in company_ids.split(",")] if company_ids else None
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_supply_chain_efficiency(
             conn, start_date, end_date, company_list
         )
 
 @app.get("/api/v2/analytics/product-dependency-risk")
+@cached_response("analytics:product-dependency-risk", datasets=["bdc", "omc"])
 async def get_product_risk(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
 ):
     """Get product dependency and risk analysis"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_product_dependency_risk(
             conn, start_date, end_date
         )
 
 @app.get("/api/v2/analytics/seasonal-patterns")
+@cached_response("analytics:seasonal-patterns", datasets=["bdc", "omc"])
 async def get_seasonal_analysis(
     product_ids: Optional[str] = None,
     company_ids: Optional[str] = None
@@ -2069,24 +2334,26 @@ async def get_seasonal_analysis(
     """Get seasonal patterns analysis"""
     product_list = [int(x) for x in product_ids.split(",")] if product_ids else None
     company_list = [int(x) for x in company_ids.split(",")] if company_ids else None
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_seasonal_patterns_analysis(
             conn, product_list, company_list
         )
 
 @app.get("/api/v2/analytics/market-dynamics")
+@cached_response("analytics:market-dynamics", datasets=["bdc", "omc"])
 async def get_market_dynamics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     business_type: Optional[str] = None
 ):
     """Get market dynamics including entry/exit and growth metrics"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_market_dynamics_analysis(
             conn, start_date, end_date
         )
 
 @app.get("/api/v2/analytics/correlation-analysis")
+@cached_response("analytics:correlation-analysis", datasets=["bdc", "omc"])
 async def get_correlations(
     metric_x: str = "volume",
     metric_y: str = "transactions",
@@ -2095,75 +2362,64 @@ async def get_correlations(
     business_type: Optional[str] = None
 ):
     """Get correlation analysis between different metrics"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_correlation_analysis(
             conn, start_date, end_date
         )
 
 @app.get("/api/v2/analytics/outlier-detection")
+@cached_response("analytics:outlier-detection", datasets=["bdc", "omc"])
 async def get_outliers(
     metric: str = "volume",
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    threshold: float = 2.0
+    threshold: float = 2.0,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
 ):
     """Detect outliers in the data"""
-    async with db_pool.acquire() as conn:
+    page = parse_page(OUTLIER_RANKING, sort, order, limit, cursor)
+    async with read_pool.acquire() as conn:
         return await get_outlier_detection(
-            conn, start_date, end_date
+            conn, start_date, end_date, page=page
         )
 
 @app.get("/api/v2/analytics/volume-forecast")
+@cached_response("analytics:volume-forecast", datasets=["bdc", "omc"])
 async def get_forecast(
     periods: int = 6,
     product_id: Optional[int] = None,
     company_id: Optional[int] = None
 ):
     """Get volume forecast for future periods"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         return await get_volume_forecast(
             conn, product_id, company_id, periods
         )
 
 @app.websocket("/ws/analytics/{tenant_id}")
 async def websocket_analytics(websocket: WebSocket, tenant_id: str):
-    """Real-time analytics updates via WebSocket"""
+    """Real-time analytics updates via WebSocket, shared by all sockets of a tenant"""
     await websocket.accept()
+    subscriber = live_updates.subscribe(tenant_id, websocket)
     
     try:
-        while True:
-            # Send periodic updates from database
-            async with db_pool.acquire() as conn:
-                latest = await conn.fetchrow(
-                    """
-                    SELECT 
-                        COUNT(*) as recent_count,
-                        SUM(volume_liters) as recent_volume
-                    FROM petroverse.performance_metrics pm
-                    JOIN petroverse.time_dimension t ON pm.date_id = t.date_id
-                    WHERE t.full_date >= CURRENT_DATE - INTERVAL '1 hour'
-                    """
-                )
-                
-                await websocket.send_json({
-                    "type": "update",
-                    "data": {
-                        "recent_transactions": latest["recent_count"],
-                        "recent_volume": float(latest["recent_volume"] or 0),
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                })
-            
-            # Wait before next update
-            await asyncio.sleep(30)
-            
+        await subscriber.run()
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        await websocket.close()
+        await live_updates.unsubscribe(tenant_id, subscriber)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            # Already closed by the client
+            pass
 
 # Supply Chain Analytics Endpoints
 @app.get("/api/v2/supply/performance")
+@cached_response("supply:performance")
 async def get_supply_performance(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -2177,7 +2433,7 @@ async def get_supply_performance(
     product_ids_list = [int(id) for id in product_ids.split(',')] if product_ids else None
     
     return await get_supply_performance_metrics(
-        db_pool,
+        read_pool,
         start_date=start_date,
         end_date=end_date,
         region_ids=region_ids_list,
@@ -2186,6 +2442,7 @@ async def get_supply_performance(
     )
 
 @app.get("/api/v2/supply/regional")
+@cached_response("supply:regional")
 async def get_supply_regional(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -2209,7 +2466,7 @@ async def get_supply_regional(
             selected_product = product_list[0]
     
     return await get_supply_regional_analytics(
-        db_pool,
+        read_pool,
         start_date=start_date,
         end_date=end_date,
         region_ids=region_list,
@@ -2218,6 +2475,7 @@ async def get_supply_regional(
     )
 
 @app.get("/api/v2/supply/growth")
+@cached_response("supply:growth")
 async def get_supply_growth(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -2240,7 +2498,7 @@ async def get_supply_growth(
             selected_product = product_list[0]
     
     return await get_supply_growth_analytics(
-        db_pool,
+        read_pool,
         start_date=start_date,
         end_date=end_date,
         region_ids=region_list,
@@ -2248,6 +2506,7 @@ async def get_supply_growth(
     )
 
 @app.get("/api/v2/supply/resilience")
+@cached_response("supply:resilience")
 async def get_supply_resilience(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -2270,7 +2529,7 @@ async def get_supply_resilience(
             selected_product = product_list[0]
     
     return await get_supply_resilience_analytics(
-        db_pool,
+        read_pool,
         start_date=start_date,
         end_date=end_date,
         region_ids=region_list,
@@ -2278,6 +2537,7 @@ async def get_supply_resilience(
     )
 
 @app.get("/api/v2/supply/quality")
+@cached_response("supply:quality")
 async def get_supply_quality(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -2300,7 +2560,7 @@ async def get_supply_quality(
             selected_product = product_list[0]
     
     return await get_supply_quality_metrics(
-        db_pool,
+        read_pool,
         start_date=start_date,
         end_date=end_date,
         region_ids=region_list,
@@ -2308,6 +2568,7 @@ async def get_supply_quality(
     )
 
 @app.get("/api/v2/supply/quality-trends")
+@cached_response("supply:quality-trends")
 async def get_supply_quality_trends_endpoint(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -2328,7 +2589,7 @@ async def get_supply_quality_trends_endpoint(
             selected_product = product_list[0]
     
     return await get_supply_quality_trends_data(
-        db_pool,
+        read_pool,
         start_date=start_date,
         end_date=end_date,
         region_ids=region_list,
@@ -2337,9 +2598,10 @@ async def get_supply_quality_trends_endpoint(
     )
 
 @app.get("/api/v2/supply/products")
+@cached_response("supply:products")
 async def get_supply_products():
     """Get list of standardized products from products table"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         # First get standardized products
         query = """
         SELECT DISTINCT product_name 
@@ -2352,9 +2614,10 @@ async def get_supply_products():
         return {"products": products}
 
 @app.get("/api/v2/supply/date-range")
+@cached_response("supply:date-range")
 async def get_supply_date_range():
     """Get min and max dates from supply data"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         query = """
         SELECT 
             MIN(period_date) as min_date,
@@ -2369,9 +2632,10 @@ async def get_supply_date_range():
         }
 
 @app.get("/api/v2/supply/regions")
+@cached_response("supply:regions")
 async def get_supply_regions():
     """Get list of unique regions from supply data with basic stats"""
-    async with db_pool.acquire() as conn:
+    async with read_pool.acquire() as conn:
         query = """
         SELECT 
             region,
@@ -2397,6 +2661,7 @@ async def get_supply_regions():
         return {"regions": regions}
 
 @app.get("/api/v2/supply/kpi")
+@cached_response("supply:kpi")
 async def get_supply_kpi(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -2412,7 +2677,7 @@ async def get_supply_kpi(
         
         # Get KPI metrics
         result = await get_supply_kpi_metrics(
-            db_pool,
+            read_pool,
             start_date=start_date,
             end_date=end_date,
             region_ids=region_ids,
@@ -2422,8 +2687,93 @@ async def get_supply_kpi(
         
         return result
     except Exception as e:
+        # Raised, not returned, so the response cache never stores the failure
         logger.error(f"Error in get_supply_kpi: {e}")
-        return {"error": str(e)}
+        raise HTTPException(status_code=503, detail="Supply KPI metrics are temporarily unavailable")
+
+@app.get("/api/v2/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    company_ids: Optional[str] = None,
+    product_ids: Optional[str] = None,
+    regions: Optional[str] = None,
+    product: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    user: UserModel = Depends(get_current_user)
+):
+    """
+    Stream raw rows of bdc, omc or supply as NDJSON, CSV or Arrow IPC.
+    Rows are read through a server-side cursor, so exports of any size run in
+    constant memory; they bypass the response cache.
+    """
+    if dataset not in data_export.DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset '{dataset}'")
+    if format not in data_export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'")
+    if format == "arrow" and not data_export.ARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Arrow export requires pyarrow")
+    # Fail with 429 now rather than after the response has started streaming
+    admission.check(admission.EXPORT)
+
+    try:
+        if dataset == "supply":
+            filters = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "region_ids": [r.strip() for r in regions.split(',')] if regions else None,
+                "product": product
+            }
+        else:
+            filters = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "company_ids": [int(x) for x in company_ids.split(',')] if company_ids else None,
+                "product_ids": [int(x) for x in product_ids.split(',')] if product_ids else None
+            }
+        chunks = data_export.stream_export(read_pool, dataset, format, filters, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {e}")
+
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        chunks,
+        media_type=data_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}_export.{extension}"'}
+    )
+
+@app.post("/api/v2/batch")
+async def run_batch(batch: batch_requests.BatchRequest, user: UserModel = Depends(get_current_user)):
+    """
+    Run several dashboard GET endpoints in one round trip; results stream back
+    as NDJSON lines in completion order (see batch_requests).
+    """
+    calls, failures = batch_requests.plan(batch, user)
+    return StreamingResponse(batch_requests.stream(calls, failures), media_type=batch_requests.MEDIA_TYPE)
+
+# Default dashboard payloads precomputed at startup and after ETL loads:
+# unfiltered views plus the parameters the web dashboards send on first load
+WARMUP_TARGETS = [
+    WarmupTarget(get_executive_summary, ["bdc", "omc"]),
+    WarmupTarget(get_executive_summary_filtered, ["bdc", "omc"]),
+    WarmupTarget(get_bdc_comprehensive, ["bdc"]),
+    WarmupTarget(get_bdc_comprehensive, ["bdc"], top_n=100),
+    WarmupTarget(get_omc_comprehensive, ["omc"]),
+    WarmupTarget(get_omc_comprehensive, ["omc"], top_n=100),
+    WarmupTarget(get_bdc_performance, ["bdc"]),
+    WarmupTarget(get_omc_performance, ["omc"]),
+    WarmupTarget(get_products_analysis, ["bdc", "omc"]),
+    WarmupTarget(get_filters, ["bdc", "omc"]),
+    WarmupTarget(get_supply_kpi, ["supply"]),
+    WarmupTarget(get_supply_performance, ["supply"]),
+    WarmupTarget(get_supply_regional, ["supply"]),
+    WarmupTarget(get_supply_growth, ["supply"]),
+    WarmupTarget(get_supply_date_range, ["supply"]),
+    WarmupTarget(get_supply_regions, ["supply"]),
+    WarmupTarget(get_supply_products, ["supply"]),
+]
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -2431,5 +2781,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8003,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # Client address from X-Forwarded-For, trusted only from FORWARDED_ALLOW_IPS
+        proxy_headers=True
     )
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Monthly Rollup Cube Query Layer
+Lets analytics queries read petroverse.agg_monthly_transactions instead of
+re-scanning the fact tables whenever the request grain is monthly or coarser.
+
+Queries are written once against alias ``f`` (joined to time_dimension ``t``
+on ``f.date_id``) and use FactSource to emit either raw-fact or cube aggregates.
+"""
+
+import time
+import logging
+from typing import Any, Dict
+
+import asyncpg
+
+try:
+    from config import settings
+    USE_MONTHLY_CUBE = settings.USE_MONTHLY_CUBE
+    STATUS_TTL = settings.MONTHLY_CUBE_STATUS_TTL
+except (ImportError, AttributeError):
+    USE_MONTHLY_CUBE = True
+    STATUS_TTL = 60
+
+logger = logging.getLogger(__name__)
+
+CUBE_NAME = "agg_monthly_transactions"
+CUBE_TABLE = "petroverse.agg_monthly_transactions"
+
+FACT_TABLES = {
+    "BDC": "petroverse.fact_bdc_transactions",
+    "OMC": "petroverse.fact_omc_transactions",
+}
+
+
+class FactSource:
+    """
+    Aggregate expressions for a fact relation aliased as ``f``.
+
+    Raw sources aggregate transaction rows directly. Cube sources rebuild the
+    same statistics from monthly partial aggregates: counts and sums add up,
+    averages are sum/count and sample standard deviation comes from the
+    sum of squares. Averages and deviations use the measure's own count of
+    non-NULL values, since AVG() and STDDEV() skip NULLs.
+    """
+
+    def __init__(self, relation: str, is_cube: bool):
+        self.relation = relation
+        self.is_cube = is_cube
+
+    def __repr__(self) -> str:
+        return f"FactSource({'cube' if self.is_cube else 'raw'}: {self.relation})"
+
+    def count(self, alias: str = "f") -> str:
+        """Number of underlying transactions (bigint, like COUNT(): 0, not NULL, with no rows)"""
+        if self.is_cube:
+            return f"COALESCE(SUM({alias}.txn_count), 0)::bigint"
+        return f"COUNT({alias}.transaction_id)"
+
+    def sum(self, column: str, alias: str = "f") -> str:
+        if self.is_cube:
+            return f"SUM({alias}.{column}_sum)"
+        return f"SUM({alias}.{column})"
+
+    def avg(self, column: str, alias: str = "f") -> str:
+        if self.is_cube:
+            return f"(SUM({alias}.{column}_sum) / NULLIF(SUM({alias}.{column}_count), 0))"
+        return f"AVG({alias}.{column})"
+
+    def stddev(self, column: str, alias: str = "f") -> str:
+        """Sample standard deviation, NULL for fewer than two values like STDDEV()"""
+        if self.is_cube:
+            n = f"SUM({alias}.{column}_count)"
+            return (
+                f"SQRT(GREATEST(SUM({alias}.{column}_sumsq) - "
+                f"POWER(SUM({alias}.{column}_sum), 2) / NULLIF({n}, 0), 0) / "
+                f"NULLIF({n} - 1, 0))"
+            )
+        return f"STDDEV({alias}.{column})"
+
+    def min(self, column: str, alias: str = "f") -> str:
+        if self.is_cube:
+            return f"MIN({alias}.{column}_min)"
+        return f"MIN({alias}.{column})"
+
+    def max(self, column: str, alias: str = "f") -> str:
+        if self.is_cube:
+            return f"MAX({alias}.{column}_max)"
+        return f"MAX({alias}.{column})"
+
+
+def raw_source(business_type: str) -> FactSource:
+    """Fact table source for 'BDC' or 'OMC'"""
+    return FactSource(FACT_TABLES[business_type], is_cube=False)
+
+
+def cube_source(business_type: str) -> FactSource:
+    """Monthly cube source restricted to one business type"""
+    return FactSource(
+        f"(SELECT * FROM {CUBE_TABLE} WHERE business_type = '{business_type}')",
+        is_cube=True
+    )
+
+
+# Latest cube refresh vs latest fact load; NULL (not ready) before the first refresh
+FRESHNESS_SQL = """
+    SELECT (SELECT MAX(refreshed_at) FROM petroverse.agg_refresh_log WHERE cube_name = $1)
+        >= COALESCE((SELECT MAX(loaded_at) FROM petroverse.fact_load_log), '-infinity'::timestamp)
+"""
+
+# Process-local view of cube readiness: (checked_at, ready)
+_cube_status: Dict[str, Any] = {"checked_at": 0.0, "ready": False}
+
+
+async def is_cube_ready(conn: asyncpg.Connection) -> bool:
+    """
+    True once the ETL has refreshed the cube after the last fact table load.
+    Re-checked at most every MONTHLY_CUBE_STATUS_TTL seconds.
+    """
+    if not USE_MONTHLY_CUBE:
+        return False
+
+    now = time.monotonic()
+    if now - _cube_status["checked_at"] < STATUS_TTL:
+        return bool(_cube_status["ready"])
+
+    ready = False
+    try:
+        exists = await conn.fetchval("SELECT to_regclass('petroverse.agg_refresh_log') IS NOT NULL")
+        if exists:
+            # A load after the last refresh (e.g. new company ids) makes the cube stale
+            logged = await conn.fetchval("SELECT to_regclass('petroverse.fact_load_log') IS NOT NULL")
+            if logged:
+                ready = await conn.fetchval(FRESHNESS_SQL, CUBE_NAME)
+            else:
+                ready = await conn.fetchval(
+                    "SELECT EXISTS (SELECT 1 FROM petroverse.agg_refresh_log WHERE cube_name = $1)",
+                    CUBE_NAME
+                )
+            if not ready and _cube_status["ready"]:
+                logger.warning("Monthly cube is older than the last fact load, using fact tables")
+    except Exception as e:
+        logger.warning(f"Monthly cube status check failed, using fact tables: {e}")
+        ready = False
+
+    _cube_status["checked_at"] = now
+    _cube_status["ready"] = bool(ready)
+    return bool(ready)
+
+
+def reset_cube_status() -> None:
+    """Force the next is_cube_ready() call to re-check the database"""
+    _cube_status["checked_at"] = 0.0
+
+
+async def get_fact_source(conn: asyncpg.Connection, business_type: str) -> FactSource:
+    """Monthly cube when it has been built, otherwise the raw fact table"""
+    if await is_cube_ready(conn):
+        return cube_source(business_type)
+    return raw_source(business_type)
@@ -1,66 +1,73 @@
 # OMC Comprehensive Analytics Module
 # Provides deep financial and operational insights for OMC stakeholders
 
-from typing import Optional, List, Dict, Any
-from datetime import datetime, date
+from typing import Optional, List, Dict, Any, Callable, Sequence
+from datetime import date
 import asyncpg
 
+from monthly_cube import get_fact_source
+from fast_json import raw
+from pooled_queries import PooledQueries
+from response_cache import cached_part
+from sql_filters import FACT_FILTERS
+
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# Sections of the comprehensive payload, in response order
+SECTIONS = (
+    "market_concentration",
+    "product_portfolio",
+    "growth_trends",
+    "company_rankings",
+    "seasonality",
+    "market_dynamics",
+    "efficiency_metrics"
+)
+
+
 async def get_omc_comprehensive_analytics(
-    conn: asyncpg.Connection,
+    pool: asyncpg.Pool,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     company_ids: Optional[List[int]] = None,
     product_ids: Optional[List[int]] = None,
-    top_n: int = 10
+    top_n: int = 10,
+    sections: Optional[Sequence[str]] = None
 ) -> Dict[str, Any]:
     """
     Generate comprehensive OMC analytics based on actual database data.
     All metrics are 100% objective and database-driven.
+    The sections are independent and run concurrently on separate pool connections.
+    sections limits the payload (and the queries run) to those SECTIONS.
     """
     
-    # Month names mapping
-    month_names = [
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
-    
-    # Build dynamic WHERE clause for filtering
-    where_conditions = []
-    params = []
-    param_count = 0
+    # Canonical WHERE clause: one SQL text per query whatever filters are set
+    where_clause = FACT_FILTERS.sql
+    params = FACT_FILTERS.params(
+        start_date=start_date,
+        end_date=end_date,
+        company_ids=company_ids,
+        product_ids=product_ids
+    )
     
-    if start_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date >= ${param_count}")
-        params.append(datetime.strptime(start_date, '%Y-%m-%d').date())
+    db = PooledQueries(pool)
     
-    if end_date:
-        param_count += 1
-        where_conditions.append(f"t.full_date <= ${param_count}")
-        params.append(datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    if company_ids:
-        param_count += 1
-        where_conditions.append(f"f.company_id = ANY(${param_count}::integer[])")
-        params.append(company_ids)
-    
-    if product_ids:
-        param_count += 1
-        where_conditions.append(f"f.product_id = ANY(${param_count}::integer[])")
-        params.append(product_ids)
-    
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    # Month-grain sections read the monthly cube when it has been built
+    src = await db.run(lambda conn: get_fact_source(conn, "OMC"), name="omc.fact_source")
     
     # 1. Market Concentration Analysis (HHI Index)
-    market_concentration = await conn.fetchrow(f"""
+    market_concentration_query = f"""
         WITH company_volumes AS (
             SELECT 
                 c.company_id,
                 c.company_name,
-                SUM(f.volume_liters) as total_volume,
-                COUNT(f.transaction_id) as transactions,
+                {src.sum('volume_liters')} as total_volume,
+                {src.count()} as transactions,
                 COUNT(DISTINCT f.product_id) as product_count
-            FROM petroverse.fact_omc_transactions f
+            FROM {src.relation} f
             JOIN petroverse.companies c ON f.company_id = c.company_id
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE {where_clause}
@@ -94,24 +101,24 @@ async def get_omc_comprehensive_analytics(
             AVG(product_count) as avg_product_diversity,
             STDDEV(market_share) as market_share_dispersion
         FROM market_shares
-    """, *params)
+    """
     
     # 2. Product Portfolio Performance & Risk
-    product_portfolio = await conn.fetch(f"""
+    product_portfolio_query = f"""
         WITH product_metrics AS (
             SELECT 
                 p.product_id,
                 p.product_name,
                 p.product_category,
-                SUM(f.volume_liters) as total_volume,
-                SUM(f.volume_mt) as total_mt,
-                AVG(f.volume_liters) as avg_transaction_size,
-                STDDEV(f.volume_liters) as volume_volatility,
+                {src.sum('volume_liters')} as total_volume,
+                {src.sum('volume_mt')} as total_mt,
+                {src.avg('volume_liters')} as avg_transaction_size,
+                {src.stddev('volume_liters')} as volume_volatility,
                 COUNT(DISTINCT f.company_id) as companies_handling,
-                COUNT(f.transaction_id) as transaction_count,
+                {src.count()} as transaction_count,
                 MIN(t.full_date) as first_transaction,
                 MAX(t.full_date) as last_transaction
-            FROM petroverse.fact_omc_transactions f
+            FROM {src.relation} f
             JOIN petroverse.products p ON f.product_id = p.product_id
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE {where_clause}
@@ -133,22 +140,22 @@ async def get_omc_comprehensive_analytics(
             last_transaction
         FROM product_metrics
         ORDER BY total_volume DESC
-    """, *params)
+    """
     
     # 3. Growth & Momentum Analysis
-    growth_analysis = await conn.fetch(f"""
+    growth_analysis_query = f"""
         WITH period_volumes AS (
             SELECT 
                 t.year,
                 t.quarter,
                 t.month,
-                SUM(f.volume_liters) as period_volume,
-                SUM(f.volume_mt) as period_mt,
+                {src.sum('volume_liters')} as period_volume,
+                {src.sum('volume_mt')} as period_mt,
                 COUNT(DISTINCT f.company_id) as active_companies,
                 COUNT(DISTINCT f.product_id) as active_products,
-                COUNT(f.transaction_id) as transactions,
-                AVG(f.volume_liters) as avg_transaction_size
-            FROM petroverse.fact_omc_transactions f
+                {src.count()} as transactions,
+                {src.avg('volume_liters')} as avg_transaction_size
+            FROM {src.relation} f
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE {where_clause}
             GROUP BY t.year, t.quarter, t.month
@@ -190,23 +197,23 @@ async def get_omc_comprehensive_analytics(
                 ELSE 0 END as yoy_growth
         FROM growth_metrics
         ORDER BY year ASC, month ASC
-    """, *params)
+    """
     
     # 4. Company Performance Ranking & Portfolio Analysis
-    company_performance = await conn.fetch(f"""
+    company_performance_query = f"""
         WITH company_metrics AS (
             SELECT 
                 c.company_id,
                 c.company_name,
-                SUM(f.volume_liters) as total_volume,
-                SUM(f.volume_mt) as total_mt,
-                COUNT(f.transaction_id) as product_month_records,  -- Actually product-month combinations
+                {src.sum('volume_liters')} as total_volume,
+                {src.sum('volume_mt')} as total_mt,
+                {src.count()} as product_month_records,  -- Actually product-month combinations
                 COUNT(DISTINCT f.product_id) as products_handled,
                 COUNT(DISTINCT t.date_id) as active_months,  -- Renamed from active_days
-                AVG(f.volume_liters) as avg_volume_per_record,
+                {src.avg('volume_liters')} as avg_volume_per_record,
                 MIN(t.full_date) as first_active,
                 MAX(t.full_date) as last_active
-            FROM petroverse.fact_omc_transactions f
+            FROM {src.relation} f
             JOIN petroverse.companies c ON f.company_id = c.company_id
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE {where_clause}
@@ -225,18 +232,18 @@ async def get_omc_comprehensive_analytics(
         )
         SELECT * FROM ranked_companies
         ORDER BY volume_rank
-        LIMIT {top_n}
-    """, *params)
+        LIMIT ${FACT_FILTERS.next_slot}
+    """
     
     # 5. Seasonality Patterns
-    seasonality = await conn.fetchrow(f"""
+    seasonality_query = f"""
         WITH monthly_aggregates AS (
             SELECT 
                 t.month,
-                AVG(f.volume_liters) as avg_monthly_volume,
-                STDDEV(f.volume_liters) as volume_std,
+                {src.avg('volume_liters')} as avg_monthly_volume,
+                {src.stddev('volume_liters')} as volume_std,
                 COUNT(DISTINCT t.year) as years_observed
-            FROM petroverse.fact_omc_transactions f
+            FROM {src.relation} f
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE {where_clause}
             GROUP BY t.month
@@ -255,15 +262,15 @@ async def get_omc_comprehensive_analytics(
             MAX(seasonal_index) - MIN(seasonal_index) as seasonal_amplitude,
             AVG(monthly_cv) as avg_monthly_volatility
         FROM seasonal_index
-    """, *params)
+    """
     
     # 6. Market Dynamics & Competition
-    market_dynamics = await conn.fetchrow(f"""
+    market_dynamics_query = f"""
         WITH time_periods AS (
             SELECT DISTINCT 
                 t.year,
                 t.quarter
-            FROM petroverse.fact_omc_transactions f
+            FROM {src.relation} f
             JOIN petroverse.time_dimension t ON f.date_id = t.date_id
             WHERE {where_clause}
         ),
@@ -272,13 +279,13 @@ async def get_omc_comprehensive_analytics(
                 tp.year,
                 tp.quarter,
                 COUNT(DISTINCT f.company_id) as companies,
-                SUM(f.volume_liters) as total_volume,
+                {src.sum('volume_liters')} as total_volume,
                 (
                     SELECT SUM(sq.volume_share * sq.volume_share)
                     FROM (
                         SELECT 
-                            SUM(f2.volume_liters) * 100.0 / SUM(SUM(f2.volume_liters)) OVER() as volume_share
-                        FROM petroverse.fact_omc_transactions f2
+                            {src.sum('volume_liters', 'f2')} * 100.0 / SUM({src.sum('volume_liters', 'f2')}) OVER() as volume_share
+                        FROM {src.relation} f2
                         JOIN petroverse.time_dimension t2 ON f2.date_id = t2.date_id
                         WHERE t2.year = tp.year AND t2.quarter = tp.quarter
                         GROUP BY f2.company_id
@@ -286,7 +293,7 @@ async def get_omc_comprehensive_analytics(
                 ) as quarterly_hhi
             FROM time_periods tp
             JOIN petroverse.time_dimension t ON t.year = tp.year AND t.quarter = tp.quarter
-            JOIN petroverse.fact_omc_transactions f ON f.date_id = t.date_id
+            JOIN {src.relation} f ON f.date_id = t.date_id
             GROUP BY tp.year, tp.quarter
         )
         SELECT 
@@ -300,10 +307,10 @@ async def get_omc_comprehensive_analytics(
                 ELSE 'Highly Concentrated'
             END as market_structure
         FROM period_concentration
-    """, *params)
+    """
     
-    # 7. Operational Efficiency Metrics
-    efficiency_metrics = await conn.fetchrow(f"""
+    # 7. Operational Efficiency Metrics (transaction-level median, always raw facts)
+    efficiency_metrics_query = f"""
         WITH transaction_metrics AS (
             SELECT 
                 AVG(f.volume_liters) as avg_transaction_volume,
@@ -322,86 +329,143 @@ async def get_omc_comprehensive_analytics(
             total_transactions::float / NULLIF(operating_days, 0) as daily_transaction_rate,
             operating_days
         FROM transaction_metrics
-    """, *params)
+    """
+    
+    queries = {
+        "market_concentration": lambda: db.fetchrow(market_concentration_query, *params, name="omc.market_concentration"),
+        "product_portfolio": lambda: db.fetch(product_portfolio_query, *params, name="omc.product_portfolio"),
+        "growth_trends": lambda: db.fetch(growth_analysis_query, *params, name="omc.growth_analysis"),
+        "company_rankings": lambda: db.fetch(company_performance_query, *params, top_n, name="omc.company_performance"),
+        "seasonality": lambda: db.fetchrow(seasonality_query, *params, name="omc.seasonality"),
+        "market_dynamics": lambda: db.fetchrow(market_dynamics_query, *params, name="omc.market_dynamics"),
+        "efficiency_metrics": lambda: db.fetchrow(efficiency_metrics_query, *params, name="omc.efficiency_metrics")
+    }
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "company_ids": company_ids,
+        "product_ids": product_ids
+    }
     
+    # Each section is cached on its own, so requests for overlapping sections
+    # (or the full payload after a partial one) reuse each other's results
+    async def section(name: str) -> Any:
+        async def compute():
+            return SECTION_FORMATTERS[name](await queries[name]())
+        key_params = {**filters, "top_n": top_n} if name == "company_rankings" else filters
+        return raw(await cached_part(f"omc:comprehensive:{name}", key_params, compute, datasets=["omc"]))
+    
+    wanted = [name for name in SECTIONS if sections is None or name in sections]
+    return dict(zip(wanted, await db.gather(*(section(name) for name in wanted))))
+
+
+def _market_concentration(row: asyncpg.Record) -> Dict[str, Any]:
     return {
-        "market_concentration": {
-            "hhi_index": float(market_concentration["hhi_index"] or 0),
-            "market_structure": "Competitive" if (market_concentration["hhi_index"] or 0) < 1000 
-                              else "Moderately Concentrated" if (market_concentration["hhi_index"] or 0) < 1800 
-                              else "Highly Concentrated",
-            "active_companies": market_concentration["active_companies"],
-            "leader_market_share": float(market_concentration["leader_share"] or 0),
-            "top_tier_combined_share": float(market_concentration["top_quartile_share"] or 0),
-            "significant_players": market_concentration["above_median_players"],
-            "q3_market_share": float(market_concentration["q3_market_share"] or 0),
-            "median_market_share": float(market_concentration["median_market_share"] or 0),
-            "avg_product_diversity": float(market_concentration["avg_product_diversity"] or 0),
-            "market_share_dispersion": float(market_concentration["market_share_dispersion"] or 0)
-        },
-        "product_portfolio": [
-            {
-                "product_name": row["product_name"],
-                "category": row["product_category"],
-                "volume_liters": float(row["total_volume"] or 0),
-                "volume_mt": float(row["total_mt"] or 0),
-                "avg_transaction_size": float(row["avg_transaction_size"] or 0),
-                "volatility_cv": float(row["coefficient_of_variation"] or 0),
-                "companies_handling": row["companies_handling"],
-                "transactions": row["transaction_count"],
-                "portfolio_share": float(row["portfolio_share"] or 0)
-            } for row in product_portfolio
-        ],
-        "growth_trends": [
-            {
-                "year": row["year"],
-                "quarter": row["quarter"],
-                "month": row["month"],
-                "volume_liters": float(row["period_volume"] or 0),
-                "volume_mt": float(row["period_mt"] or 0),
-                "active_companies": row["active_companies"],
-                "active_products": row["active_products"],
-                "transactions": row["transactions"],
-                "avg_size": float(row["avg_transaction_size"] or 0),
-                "mom_growth": float(row["mom_growth"] or 0),
-                "qoq_growth": float(row["qoq_growth"] or 0),
-                "yoy_growth": float(row["yoy_growth"] or 0)
-            } for row in growth_analysis
-        ],
-        "company_rankings": [
-            {
-                "rank": row["volume_rank"],
-                "company_name": row["company_name"],
-                "volume_liters": float(row["total_volume"] or 0),
-                "volume_mt": float(row["total_mt"] or 0),
-                "market_share": float(row["market_share"] or 0),
-                "transactions": row["product_month_records"],  # Kept for API compatibility
-                "products_handled": row["products_handled"],
-                "efficiency_ratio": float(row["avg_monthly_volume_per_product"] or 0),  # Now avg volume per product
-                "daily_transaction_rate": float(row["product_diversity_score"] or 0),  # Now product diversity
-                "active_days": row["active_months"],  # Actually months
-                "active_months": row["active_months"],  # Added for clarity
-                "product_diversity_score": float(row["product_diversity_score"] or 0)
-            } for row in company_performance
-        ],
-        "seasonality": {
-            "peak_month": month_names[seasonality["peak_month"] - 1] if seasonality["peak_month"] else None,
-            "trough_month": month_names[seasonality["trough_month"] - 1] if seasonality["trough_month"] else None,
-            "seasonal_amplitude": float(seasonality["seasonal_amplitude"] or 0),
-            "avg_monthly_volatility": float(seasonality["avg_monthly_volatility"] or 0)
-        },
-        "market_dynamics": {
-            "avg_hhi": float(market_dynamics["avg_hhi"] or 0),
-            "hhi_volatility": float(market_dynamics["hhi_volatility"] or 0),
-            "min_hhi": float(market_dynamics["min_hhi"] or 0),
-            "max_hhi": float(market_dynamics["max_hhi"] or 0),
-            "market_structure": market_dynamics["market_structure"]
-        },
-        "efficiency_metrics": {
-            "avg_transaction_volume": float(efficiency_metrics["avg_transaction_volume"] or 0),
-            "median_transaction_volume": float(efficiency_metrics["median_transaction_volume"] or 0),
-            "transaction_cv": float(efficiency_metrics["transaction_cv"] or 0),
-            "daily_transaction_rate": float(efficiency_metrics["daily_transaction_rate"] or 0),
-            "operating_days": efficiency_metrics["operating_days"]
-        }
-    }
\ No newline at end of file
+        "hhi_index": float(row["hhi_index"] or 0),
+        "market_structure": "Competitive" if (row["hhi_index"] or 0) < 1000 
+                          else "Moderately Concentrated" if (row["hhi_index"] or 0) < 1800 
+                          else "Highly Concentrated",
+        "active_companies": row["active_companies"],
+        "leader_market_share": float(row["leader_share"] or 0),
+        "top_tier_combined_share": float(row["top_quartile_share"] or 0),
+        "significant_players": row["above_median_players"],
+        "q3_market_share": float(row["q3_market_share"] or 0),
+        "median_market_share": float(row["median_market_share"] or 0),
+        "avg_product_diversity": float(row["avg_product_diversity"] or 0),
+        "market_share_dispersion": float(row["market_share_dispersion"] or 0)
+    }
+
+
+def _product_portfolio(rows: List[asyncpg.Record]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "product_name": row["product_name"],
+            "category": row["product_category"],
+            "volume_liters": float(row["total_volume"] or 0),
+            "volume_mt": float(row["total_mt"] or 0),
+            "avg_transaction_size": float(row["avg_transaction_size"] or 0),
+            "volatility_cv": float(row["coefficient_of_variation"] or 0),
+            "companies_handling": row["companies_handling"],
+            "transactions": row["transaction_count"],
+            "portfolio_share": float(row["portfolio_share"] or 0)
+        } for row in rows
+    ]
+
+
+def _growth_trends(rows: List[asyncpg.Record]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "year": row["year"],
+            "quarter": row["quarter"],
+            "month": row["month"],
+            "volume_liters": float(row["period_volume"] or 0),
+            "volume_mt": float(row["period_mt"] or 0),
+            "active_companies": row["active_companies"],
+            "active_products": row["active_products"],
+            "transactions": row["transactions"],
+            "avg_size": float(row["avg_transaction_size"] or 0),
+            "mom_growth": float(row["mom_growth"] or 0),
+            "qoq_growth": float(row["qoq_growth"] or 0),
+            "yoy_growth": float(row["yoy_growth"] or 0)
+        } for row in rows
+    ]
+
+
+def _company_rankings(rows: List[asyncpg.Record]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "rank": row["volume_rank"],
+            "company_name": row["company_name"],
+            "volume_liters": float(row["total_volume"] or 0),
+            "volume_mt": float(row["total_mt"] or 0),
+            "market_share": float(row["market_share"] or 0),
+            "transactions": row["product_month_records"],  # Kept for API compatibility
+            "products_handled": row["products_handled"],
+            "efficiency_ratio": float(row["avg_monthly_volume_per_product"] or 0),  # Now avg volume per product
+            "daily_transaction_rate": float(row["product_diversity_score"] or 0),  # Now product diversity
+            "active_days": row["active_months"],  # Actually months
+            "active_months": row["active_months"],  # Added for clarity
+            "product_diversity_score": float(row["product_diversity_score"] or 0)
+        } for row in rows
+    ]
+
+
+def _seasonality(row: asyncpg.Record) -> Dict[str, Any]:
+    return {
+        "peak_month": MONTH_NAMES[row["peak_month"] - 1] if row["peak_month"] else None,
+        "trough_month": MONTH_NAMES[row["trough_month"] - 1] if row["trough_month"] else None,
+        "seasonal_amplitude": float(row["seasonal_amplitude"] or 0),
+        "avg_monthly_volatility": float(row["avg_monthly_volatility"] or 0)
+    }
+
+
+def _market_dynamics(row: asyncpg.Record) -> Dict[str, Any]:
+    return {
+        "avg_hhi": float(row["avg_hhi"] or 0),
+        "hhi_volatility": float(row["hhi_volatility"] or 0),
+        "min_hhi": float(row["min_hhi"] or 0),
+        "max_hhi": float(row["max_hhi"] or 0),
+        "market_structure": row["market_structure"]
+    }
+
+
+def _efficiency_metrics(row: asyncpg.Record) -> Dict[str, Any]:
+    return {
+        "avg_transaction_volume": float(row["avg_transaction_volume"] or 0),
+        "median_transaction_volume": float(row["median_transaction_volume"] or 0),
+        "transaction_cv": float(row["transaction_cv"] or 0),
+        "daily_transaction_rate": float(row["daily_transaction_rate"] or 0),
+        "operating_days": row["operating_days"]
+    }
+
+
+# Section name -> builds its payload from the section query's result
+SECTION_FORMATTERS: Dict[str, Callable[[Any], Any]] = {
+    "market_concentration": _market_concentration,
+    "product_portfolio": _product_portfolio,
+    "growth_trends": _growth_trends,
+    "company_rankings": _company_rankings,
+    "seasonality": _seasonality,
+    "market_dynamics": _market_dynamics,
+    "efficiency_metrics": _efficiency_metrics
+}
@@ -0,0 +1,200 @@
+"""
+Keyset Pagination
+Ranked lists (network relationships, operational consistency, outliers) page
+with an opaque cursor instead of a fixed LIMIT or OFFSET.
+
+A cursor encodes the sort, its direction and the last row's sort key plus
+tiebreaker columns. The next page is the rows after that key:
+
+    WHERE (page_key, company_name, product_name) < ($5, $6, $7)
+    ORDER BY page_key DESC, company_name DESC, product_name DESC
+    LIMIT $8
+
+so pages never skip or repeat rows when data changes between requests, and
+the sort keeps only the page's rows (a bounded top-N sort) where OFFSET would
+also sort and discard every row before it. ranked_sql itself still aggregates
+the whole date range on every page; the keyset filter applies to its result.
+Tiebreakers are unique per row, which keeps pages stable when sort values
+repeat.
+
+Each list declares its sorts once:
+
+    NETWORK_RANKING = Ranking(
+        sorts={"total_volume_mt": SortKey("total_volume_mt", "numeric"), ...},
+        tiebreak=(SortKey("company_name", "text"), SortKey("product_name", "text")),
+        default_sort="total_volume_mt",
+        default_limit=100,
+    )
+    page = NETWORK_RANKING.page(sort="transaction_count", cursor=cursor)
+    rows = await conn.fetch(page.query(ranked_sql, first_slot=5), *params, *page.params)
+    rows, next_cursor = page.split(rows)
+
+Like the compiled filters, the cursor and limit are parameters in fixed slots
+(NULL on the first page), so each sort is one SQL text.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    from config import settings
+    PAGE_MAX_LIMIT = settings.PAGE_MAX_LIMIT
+except (ImportError, AttributeError):
+    PAGE_MAX_LIMIT = 1000
+
+ORDERS = ("asc", "desc")
+
+# Cursor value <-> Python value for each supported column type
+_DECODERS = {
+    "numeric": Decimal,
+    "bigint": int,
+    "integer": int,
+    "float8": float,
+    "date": date.fromisoformat,
+    "text": str,
+}
+
+
+class InvalidPage(ValueError):
+    """Unknown sort or order, bad limit, or a cursor this list did not issue"""
+
+
+class SortKey(NamedTuple):
+    """SQL expression over the ranked rows and its Postgres type (one of _DECODERS)"""
+    expression: str
+    pg_type: str
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (Decimal, float)):
+        return str(value)
+    return value
+
+
+class Page:
+    """One page request against a Ranking: sort, order, limit and the key to start after"""
+
+    def __init__(self, ranking: "Ranking", sort: str, order: str, limit: int,
+                 after: Optional[List[Any]] = None):
+        self.ranking = ranking
+        self.sort = sort
+        self.order = order
+        self.limit = limit
+        self.after = after
+
+    @property
+    def keys(self) -> Tuple[SortKey, ...]:
+        return (self.ranking.sorts[self.sort],) + tuple(self.ranking.tiebreak)
+
+    @property
+    def params(self) -> List[Any]:
+        """Cursor key (NULLs on the first page) then limit + 1, to see whether another page follows"""
+        after = self.after if self.after is not None else [None] * len(self.keys)
+        return [*after, self.limit + 1]
+
+    def query(self, ranked_sql: str, first_slot: int) -> str:
+        """
+        Page of ranked_sql (a SELECT whose rows carry the sort and tiebreak
+        columns); its parameters are followed by self.params from first_slot
+        """
+        keys = self.keys
+        slots = [f"${first_slot + i}::{key.pg_type}" for i, key in enumerate(keys)]
+        limit_slot = f"${first_slot + len(keys)}::integer"
+        columns = ["page_key"] + [key.expression for key in self.ranking.tiebreak]
+        direction = "DESC" if self.order == "desc" else "ASC"
+        comparison = "<" if self.order == "desc" else ">"
+        return f"""
+            SELECT * FROM (
+                SELECT ranked.*, ({keys[0].expression})::{keys[0].pg_type} as page_key
+                FROM ({ranked_sql}) ranked
+            ) paged
+            WHERE ({slots[0]} IS NULL OR ({', '.join(columns)}) {comparison} ({', '.join(slots)}))
+            ORDER BY {', '.join(f'{column} {direction}' for column in columns)}
+            LIMIT {limit_slot}
+        """
+
+    def split(self, rows: Sequence[Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """(rows of this page without page_key, cursor of the next page or None)"""
+        more = len(rows) > self.limit
+        page = [dict(row) for row in rows[:self.limit]]
+        next_cursor = None
+        if more and page:
+            last = page[-1]
+            key = [last["page_key"]] + [last[key.expression] for key in self.ranking.tiebreak]
+            next_cursor = self.ranking.encode(self.sort, self.order, key)
+        for row in page:
+            row.pop("page_key", None)
+        return page, next_cursor
+
+    def describe(self, next_cursor: Optional[str]) -> Dict[str, Any]:
+        """Page metadata returned alongside the rows"""
+        return {"sort": self.sort, "order": self.order, "limit": self.limit, "next_cursor": next_cursor}
+
+
+class Ranking:
+    """
+    Sorts a ranked list offers and the tiebreak columns (plain column names,
+    unique together) that order rows with equal sort values. Sort expressions
+    and tiebreak columns must be non-NULL on every row.
+    """
+
+    def __init__(self, name: str, sorts: Dict[str, SortKey], tiebreak: Sequence[SortKey],
+                 default_sort: str, default_limit: int, default_order: str = "desc"):
+        self.name = name
+        self.sorts = sorts
+        self.tiebreak = tuple(tiebreak)
+        self.default_sort = default_sort
+        self.default_limit = default_limit
+        self.default_order = default_order
+
+    def encode(self, sort: str, order: str, key: Sequence[Any]) -> str:
+        payload = json.dumps([self.name, sort, order, [_encode_value(value) for value in key]],
+                             separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+    def _decode(self, cursor: str) -> Tuple[str, str, List[Any]]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            name, sort, order, values = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise InvalidPage("Malformed cursor")
+        if name != self.name or not isinstance(sort, str) or sort not in self.sorts or order not in ORDERS:
+            raise InvalidPage("Cursor does not belong to this list")
+
+        keys = (self.sorts[sort],) + self.tiebreak
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise InvalidPage("Malformed cursor")
+        try:
+            after = [_DECODERS[key.pg_type](value) for key, value in zip(keys, values)]
+        except (InvalidOperation, ValueError, TypeError):
+            raise InvalidPage("Malformed cursor")
+        return sort, order, after
+
+    def page(self, sort: Optional[str] = None, order: Optional[str] = None,
+             limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        """
+        Validate a page request; raises InvalidPage. A cursor carries its own
+        sort and order, and an explicit sort or order must agree with it.
+        """
+        if sort is not None and sort not in self.sorts:
+            raise InvalidPage(f"Unknown sort '{sort}'; available: {', '.join(self.sorts)}")
+        if order is not None and order not in ORDERS:
+            raise InvalidPage(f"Unknown order '{order}'; use 'asc' or 'desc'")
+        if limit is None:
+            limit = self.default_limit
+        if not 1 <= limit <= PAGE_MAX_LIMIT:
+            raise InvalidPage(f"limit must be between 1 and {PAGE_MAX_LIMIT}")
+
+        if cursor:
+            cursor_sort, cursor_order, after = self._decode(cursor)
+            if (sort or cursor_sort) != cursor_sort or (order or cursor_order) != cursor_order:
+                raise InvalidPage("Cursor was issued for a different sort; drop sort/order or the cursor")
+            return Page(self, cursor_sort, cursor_order, limit, after)
+
+        return Page(self, sort or self.default_sort, order or self.default_order, limit)
@@ -0,0 +1,71 @@
+"""
+Pooled Parallel Queries
+Dashboard endpoints are built from several independent section queries. Run
+on one connection they execute back to back and the endpoint takes the sum of
+their latencies; PooledQueries runs each on its own pooled connection so the
+endpoint takes roughly as long as its slowest section.
+
+Each request gets its own PooledQueries, whose semaphore caps how many
+connections that request holds at once (QUERY_FANOUT_LIMIT) so one heavy
+dashboard cannot starve the pool for everyone else.
+
+Sections run outside a shared transaction, so they may observe different
+snapshots if a load commits mid-request; the ETL bumps the data version after
+every load, so such a response is never served from cache afterwards.
+
+Pass name= to label a section in /metrics (see db_metrics).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+import asyncpg
+
+from db_metrics import query_name
+
+try:
+    from config import settings
+    QUERY_FANOUT_LIMIT = settings.QUERY_FANOUT_LIMIT
+except (ImportError, AttributeError):
+    QUERY_FANOUT_LIMIT = 4
+
+
+class PooledQueries:
+    """Run one request's independent queries concurrently on separate connections"""
+
+    def __init__(self, pool: asyncpg.Pool, max_concurrency: Optional[int] = None):
+        self.pool = pool
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency or QUERY_FANOUT_LIMIT))
+
+    async def run(self, fn: Callable[[asyncpg.Connection], Awaitable[Any]],
+                  name: Optional[str] = None) -> Any:
+        """Call fn(conn) on a connection of its own, within the fan-out limit"""
+        async with self._semaphore:
+            async with self.pool.acquire() as conn:
+                if name is None:
+                    return await fn(conn)
+                with query_name(name):
+                    return await fn(conn)
+
+    async def fetch(self, query: str, *args, name: Optional[str] = None) -> List[asyncpg.Record]:
+        return await self.run(lambda conn: conn.fetch(query, *args), name)
+
+    async def fetchrow(self, query: str, *args, name: Optional[str] = None) -> Optional[asyncpg.Record]:
+        return await self.run(lambda conn: conn.fetchrow(query, *args), name)
+
+    async def fetchval(self, query: str, *args, name: Optional[str] = None) -> Any:
+        return await self.run(lambda conn: conn.fetchval(query, *args), name)
+
+    async def gather(self, *aws: Awaitable[Any]) -> List[Any]:
+        """
+        asyncio.gather for section queries. If one fails the others are
+        cancelled, so their connections go straight back to the pool.
+        """
+        tasks = [asyncio.ensure_future(aw) for aw in aws]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
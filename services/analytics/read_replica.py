@@ -0,0 +1,207 @@
+"""
+Read Replica Routing
+Analytics endpoints read through read_pool, which hands out connections from
+a separate, separately sized pool on a streaming replica (READ_REPLICA_URL) so
+dashboard load does not compete with ETL writes on the primary. Logins,
+user lookups and the LISTEN connection stay on the primary pool.
+
+A background task measures replication lag every REPLICA_CHECK_INTERVAL
+seconds. Reads fall back to the primary while the replica is unreachable or
+more than REPLICA_MAX_LAG seconds behind.
+
+A new data version or a tag invalidation (see response_cache) also fences the
+replica: the primary's current WAL position is noted and reads stay on the
+primary until the replica has replayed up to it. Otherwise a lagging replica
+could answer with the previous load and that answer would be cached again.
+
+Without READ_REPLICA_URL every read goes to the primary pool.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import metrics
+import response_cache
+
+try:
+    from config import settings
+    REPLICA_MAX_LAG = settings.REPLICA_MAX_LAG
+    REPLICA_CHECK_INTERVAL = settings.REPLICA_CHECK_INTERVAL
+except (ImportError, AttributeError):
+    REPLICA_MAX_LAG = 30.0
+    REPLICA_CHECK_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, or 0 when the replica has
+# replayed everything it has received (an idle primary sends nothing)
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END::float8
+"""
+REPLAYED_QUERY = "SELECT COALESCE(pg_last_wal_replay_lsn() >= $1::text::pg_lsn, true)"
+
+READS = metrics.counter(
+    "petroverse_db_reads_total",
+    "Read pool acquisitions by the server that served them",
+    ("target",)
+)
+REPLICA_LAG = metrics.gauge(
+    "petroverse_db_replica_lag_seconds",
+    "Replication lag at the last check (-1 when the replica is unreachable)"
+)
+REPLICA_IN_USE = metrics.gauge(
+    "petroverse_db_replica_in_use",
+    "1 while reads are routed to the replica, 0 while they fall back to the primary"
+)
+REPLICA_POOL_CONNECTIONS = metrics.gauge(
+    "petroverse_db_replica_pool_connections",
+    "Connections in the replica pool by state",
+    ("state",)
+)
+
+
+class ReadPool:
+    """Routes acquire() to the replica pool when it is healthy and caught up, else the primary"""
+
+    def __init__(self):
+        self.primary = None
+        self.replica = None
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.checked_at = 0.0
+        # Primary WAL position the replica must replay before it serves reads again
+        self._fence_lsn: Optional[str] = None
+        self._fenced = False
+        self._task: Optional[asyncio.Task] = None
+        self._fence_task: Optional[asyncio.Task] = None
+        self._stats = {"replica_reads": 0, "primary_reads": 0, "fallbacks": 0, "fences": 0}
+
+    def init(self, primary, replica=None) -> None:
+        """Attach the primary pool and, if configured, the replica pool"""
+        self.primary = primary
+        self.replica = replica
+        self.lag = None
+        self.healthy = False
+        self._fence_lsn = None
+        self._fenced = False
+
+    @property
+    def use_replica(self) -> bool:
+        return (self.replica is not None and self.healthy and not self._fenced
+                and self.lag is not None and self.lag <= REPLICA_MAX_LAG)
+
+    def acquire(self, *, timeout: Optional[float] = None):
+        if self.use_replica:
+            self._stats["replica_reads"] += 1
+            READS.inc(target="replica")
+            return self.replica.acquire(timeout=timeout)
+        self._stats["primary_reads"] += 1
+        READS.inc(target="primary")
+        return self.primary.acquire(timeout=timeout)
+
+    async def check(self) -> None:
+        """Measure lag and lift the fence once the replica has replayed past it"""
+        was_in_use = self.use_replica
+        try:
+            async with self.replica.acquire(timeout=REPLICA_CHECK_INTERVAL) as conn:
+                self.lag = await conn.fetchval(LAG_QUERY, timeout=REPLICA_CHECK_INTERVAL)
+                if self._fenced and self._fence_lsn is not None:
+                    if await conn.fetchval(REPLAYED_QUERY, self._fence_lsn, timeout=REPLICA_CHECK_INTERVAL):
+                        self._fenced = False
+                        self._fence_lsn = None
+            self.healthy = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"Read replica unavailable, reading from the primary: {e}")
+            self.healthy = False
+            self.lag = None
+        self.checked_at = time.monotonic()
+
+        if was_in_use and not self.use_replica:
+            self._stats["fallbacks"] += 1
+            if self.healthy and not self._fenced:
+                logger.warning(f"Read replica {self.lag:.1f}s behind, reading from the primary")
+
+    async def _monitor(self) -> None:
+        while True:
+            if self._fenced and self._fence_lsn is None and (self._fence_task is None or self._fence_task.done()):
+                self._fence_task = asyncio.create_task(self._note_fence_lsn())
+            await self.check()
+            await asyncio.sleep(REPLICA_CHECK_INTERVAL)
+
+    def fence(self) -> None:
+        """Send reads to the primary until the replica has replayed everything written so far"""
+        if self.replica is None:
+            return
+        self._fenced = True
+        self._stats["fences"] += 1
+        if self._fence_task is None or self._fence_task.done():
+            self._fence_task = asyncio.create_task(self._note_fence_lsn())
+
+    async def _note_fence_lsn(self) -> None:
+        try:
+            async with self.primary.acquire() as conn:
+                self._fence_lsn = await conn.fetchval("SELECT pg_current_wal_lsn()::text")
+        except Exception as e:
+            # Stay fenced; the monitor retries
+            logger.warning(f"Could not read the primary WAL position: {e}")
+            return
+        await self.check()
+
+    def on_invalidation(self, message: Dict[str, Any]) -> None:
+        # New version or dropped tags: the entries will be recomputed from the new load
+        if "version" in message or message.get("tags"):
+            self.fence()
+
+    async def start(self) -> None:
+        """Check the replica once, then keep checking in the background"""
+        if self.replica is None or self._task is not None:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, self._fence_task) if task is not None]
+        self._task = self._fence_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def collect(self) -> None:
+        if self.replica is None:
+            return
+        REPLICA_LAG.set(self.lag if self.lag is not None else -1)
+        REPLICA_IN_USE.set(1 if self.use_replica else 0)
+        size, idle = self.replica.get_size(), self.replica.get_idle_size()
+        REPLICA_POOL_CONNECTIONS.set(size - idle, state="in_use")
+        REPLICA_POOL_CONNECTIONS.set(idle, state="idle")
+        REPLICA_POOL_CONNECTIONS.set(self.replica.get_max_size(), state="max")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.replica is not None,
+            "in_use": self.use_replica,
+            "healthy": self.healthy,
+            "lag_seconds": round(self.lag, 3) if self.lag is not None else None,
+            "max_lag_seconds": REPLICA_MAX_LAG,
+            "fenced": self._fenced,
+            **self._stats
+        }
+
+
+read_pool = ReadPool()
+response_cache.add_invalidation_handler(read_pool.on_invalidation)
+metrics.add_collector(read_pool.collect)
+
+
+def replica_stats() -> Dict[str, Any]:
+    """Routing state, reported on /health"""
+    return read_pool.stats()
@@ -0,0 +1,723 @@
+"""
+Response Cache for PetroVerse Analytics
+Caches endpoint responses under keys built from the endpoint namespace,
+its normalized parameters and a global data version.
+
+Two tiers, both holding the encoded JSON bytes (fast_json):
+  1. In-process LRU (local_cache.LRUCache)
+  2. Redis, shared by all workers
+A hit is sent as it is, without parsing or re-serializing.
+On a miss in both, identical concurrent requests are coalesced so only one
+of them runs the endpoint (single_flight.SingleFlight), and that run waits
+for admission (admission.admit) before it touches the pool.
+
+The ETL increments the data version (petroverse:data_version) after every
+load and announces it on the invalidation channel. Each worker keeps the
+version in memory, updated from that channel, so a hot request is answered
+without leaving the process; every cached response becomes unreachable at
+once after a reload and no per-key invalidation is needed.
+
+cached_part() caches a piece of a response (e.g. one dashboard section)
+under its own key the same way, so endpoints that assemble overlapping pieces
+share them; the piece's bytes are embedded with fast_json.raw().
+
+Narrower invalidation goes through tags: every entry is registered in Redis
+sets per dataset (bdc, omc, supply), per namespace and per tenant, and
+invalidate_tags() deletes a tag's members in pipelined batches. Tag sets are
+scoped to the data version so they expire along with the entries they index.
+Invalidating a dataset tag also increments that dataset's generation
+(petroverse:cache:generations), which is part of the key of every entry built
+from the dataset, so the next request recomputes it.
+
+Entries are fresh for the endpoint's ttl and then stale for a further
+stale_ttl before they expire (stale-while-revalidate). A stale entry is still
+answered at once, with Age and X-Cache: stale headers, while a single background
+task recomputes it at warm-up priority; a Redis lock keeps other workers from
+refreshing the same key, and a key whose refresh fails is not retried until
+its backoff (doubling up to RESPONSE_CACHE_REFRESH_BACKOFF_MAX) has passed.
+Redis keeps one expiry covering both windows, so an entry's age is read from
+its remaining TTL and the stored bytes stay as they were.
+
+Responses carry a strong ETag hashed from the stored bytes and the negotiated
+format, so it changes whenever the content does, including when a background
+refresh replaces a stale entry under the same key. A GET or HEAD whose
+If-None-Match matches gets 304 without the body being rendered or sent; other
+methods get 412. Public endpoints are also marked cacheable for
+HTTP_CACHE_MAX_AGE seconds so nginx can answer repeats; tenant-scoped ones are
+private.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import inspect
+import hashlib
+import logging
+import functools
+from datetime import date
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+import admission
+from binary_formats import render, variant
+from fast_json import dumps
+from local_cache import LRUCache
+from single_flight import SingleFlight
+
+try:
+    from config import settings
+    RESPONSE_CACHE_ENABLED = settings.RESPONSE_CACHE_ENABLED
+    RESPONSE_CACHE_TTL = settings.RESPONSE_CACHE_TTL
+    LOCAL_CACHE_MAX_ENTRIES = settings.LOCAL_CACHE_MAX_ENTRIES
+    LOCAL_CACHE_MAX_BYTES = settings.LOCAL_CACHE_MAX_BYTES
+    LOCAL_CACHE_TTL = settings.LOCAL_CACHE_TTL
+    DATA_VERSION_RECHECK = settings.DATA_VERSION_RECHECK
+    HTTP_CACHE_MAX_AGE = settings.HTTP_CACHE_MAX_AGE
+    RESPONSE_CACHE_STALE_TTL = settings.RESPONSE_CACHE_STALE_TTL
+    RESPONSE_CACHE_REFRESH_BACKOFF = settings.RESPONSE_CACHE_REFRESH_BACKOFF
+    RESPONSE_CACHE_REFRESH_BACKOFF_MAX = settings.RESPONSE_CACHE_REFRESH_BACKOFF_MAX
+except (ImportError, AttributeError):
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_TTL = 86400
+    LOCAL_CACHE_MAX_ENTRIES = 1000
+    LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    LOCAL_CACHE_TTL = 300
+    DATA_VERSION_RECHECK = 30
+    HTTP_CACHE_MAX_AGE = 60
+    RESPONSE_CACHE_STALE_TTL = 3600
+    RESPONSE_CACHE_REFRESH_BACKOFF = 5
+    RESPONSE_CACHE_REFRESH_BACKOFF_MAX = 300
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "petroverse:data_version"
+GENERATIONS_KEY = "petroverse:cache:generations"
+INVALIDATION_CHANNEL = "petroverse:cache:invalidate"
+KEY_PREFIX = "resp"
+TAG_PREFIX = "petroverse:cache:tag"
+DELETE_BATCH_SIZE = 500
+# Held by the worker refreshing a stale key; expires if that worker dies
+REFRESH_LOCK_SECONDS = 60
+
+# Redis client shared with main.py, set in lifespan via init()
+_redis = None
+
+# Marks this worker's own published messages, whose handlers already ran
+_WORKER_ID = uuid.uuid4().hex
+
+local_cache = LRUCache(
+    max_entries=LOCAL_CACHE_MAX_ENTRIES,
+    max_bytes=LOCAL_CACHE_MAX_BYTES,
+    ttl=LOCAL_CACHE_TTL
+)
+
+# Worker's view of the data version. While the pub/sub listener is connected
+# it is pushed to us; otherwise it is re-read every DATA_VERSION_RECHECK seconds.
+_version: Dict[str, Any] = {"value": None, "checked_at": 0.0}
+# Dataset generations, kept current the same way as the version
+_generations: Dict[str, int] = {}
+_listener: Dict[str, Any] = {"task": None, "connected": False}
+_stats = {"redis_hits": 0, "redis_misses": 0, "invalidations": 0, "not_modified": 0,
+          "stale_hits": 0, "refreshes": 0, "refresh_failures": 0}
+
+# If-None-Match and method of the current request, set by middleware in main.py
+if_none_match: ContextVar[Optional[str]] = ContextVar("if_none_match", default=None)
+request_method: ContextVar[str] = ContextVar("request_method", default="GET")
+
+# In-flight computations keyed by cache key
+flights = SingleFlight()
+
+# Background refreshes of stale keys, and per-key (failures, retry_at) after
+# a refresh failed
+_refreshing: Dict[str, asyncio.Task] = {}
+_refresh_backoff: Dict[str, Tuple[int, float]] = {}
+
+# Other in-process caches that follow the invalidation channel
+_handlers: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def init(redis_client) -> None:
+    """Attach the Redis client (None leaves only the in-process tier)"""
+    global _redis
+    _redis = redis_client
+    _version["value"] = None
+    _version["checked_at"] = 0.0
+    _generations.clear()
+
+
+async def get_data_version() -> str:
+    """Current data version; '0' until the ETL has bumped it once"""
+    if _redis is None:
+        return _version["value"] or "0"
+
+    now = time.monotonic()
+    fresh = _listener["connected"] or now - _version["checked_at"] < DATA_VERSION_RECHECK
+    if _version["value"] is not None and fresh:
+        return _version["value"]
+
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        pipe.get(DATA_VERSION_KEY)
+        pipe.hgetall(GENERATIONS_KEY)
+        version, generations = await pipe.execute()
+        version = version or "0"
+    except Exception as e:
+        logger.warning(f"Could not read data version: {e}")
+        return _version["value"] or "0"
+
+    _set_generations(generations)
+    _set_version(version)
+    _version["checked_at"] = now
+    return version
+
+
+async def bump_data_version() -> Optional[int]:
+    """Invalidate every cached response by moving to a new data version"""
+    if _redis is None:
+        local_cache.clear()
+        return None
+    try:
+        version = await _redis.incr(DATA_VERSION_KEY)
+        await _redis.publish(INVALIDATION_CHANNEL, json.dumps({"version": str(version)}))
+        _set_version(str(version))
+        return version
+    except Exception as e:
+        logger.warning(f"Could not bump data version: {e}")
+        return None
+
+
+def _set_version(version: str) -> None:
+    """Adopt a new data version; entries under the old one can never be hit again"""
+    if version != _version["value"]:
+        if _version["value"] is not None:
+            local_cache.clear()
+            _refresh_backoff.clear()
+            _stats["invalidations"] += 1
+        _version["value"] = version
+
+
+def _set_generations(generations: Dict[str, Any]) -> None:
+    for dataset, generation in generations.items():
+        _generations[dataset] = max(int(generation), _generations.get(dataset, 0))
+
+
+def generation(datasets: Iterable[str]) -> int:
+    """
+    Sum of the datasets' generations. Generations only grow, so the sum
+    changes whenever any of them is invalidated.
+    """
+    return sum(_generations.get(dataset, 0) for dataset in datasets)
+
+
+def _handle_invalidation(data: str) -> None:
+    try:
+        message = json.loads(data)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed cache invalidation message: {data!r}")
+        return
+
+    if "version" in message:
+        _set_version(str(message["version"]))
+        _version["checked_at"] = time.monotonic()
+    _set_generations(message.get("generations", {}))
+    for tag in message.get("tags", []):
+        local_cache.delete_tag(tag)
+    if message.get("clear"):
+        local_cache.clear()
+        _stats["invalidations"] += 1
+    if message.get("origin") == _WORKER_ID:
+        return
+    for handler in _handlers:
+        handler(message)
+
+
+def add_invalidation_handler(handler: Callable[[Dict[str, Any]], None]) -> None:
+    """Call handler with every message on the invalidation channel, from any worker"""
+    _handlers.append(handler)
+
+
+async def publish_invalidation(message: Dict[str, Any]) -> None:
+    """
+    Deliver message to this worker's handlers now and to other workers via
+    Redis; the listener skips the copy that comes back to this worker.
+    """
+    for handler in _handlers:
+        handler(message)
+    if _redis is None:
+        return
+    try:
+        await _redis.publish(INVALIDATION_CHANNEL, json.dumps({**message, "origin": _WORKER_ID}))
+    except Exception as e:
+        logger.warning(f"Could not publish invalidation {message}: {e}")
+
+
+async def _listen_for_invalidations() -> None:
+    """Follow the invalidation channel, reconnecting with backoff"""
+    delay = 1
+    while True:
+        pubsub = None
+        try:
+            pubsub = _redis.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            _listener["connected"] = True
+            delay = 1
+            # Anything published while we were disconnected is picked up here
+            _version["checked_at"] = 0.0
+            await get_data_version()
+
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    _handle_invalidation(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener disconnected: {e}")
+        finally:
+            _listener["connected"] = False
+            if pubsub is not None:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+def start_invalidation_listener() -> None:
+    """Start following cross-worker invalidations (call after init)"""
+    if _redis is None or _listener["task"] is not None:
+        return
+    _listener["task"] = asyncio.create_task(_listen_for_invalidations())
+
+
+async def stop_invalidation_listener() -> None:
+    task = _listener["task"]
+    _listener["task"] = None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def _schedule_refresh(key: str, refresh: Callable[[], Any], namespace: str) -> None:
+    """Recompute a stale key in the background unless it is already being refreshed or backing off"""
+    if key in _refreshing:
+        return
+    backoff = _refresh_backoff.get(key)
+    if backoff is not None and backoff[1] > time.monotonic():
+        return
+    # The task inherits the request's context, so admission charges its tenant
+    task = asyncio.create_task(_refresh(key, refresh, namespace))
+    _refreshing[key] = task
+    task.add_done_callback(lambda t, key=key: _refreshing.pop(key, None))
+
+
+async def _refresh(key: str, refresh: Callable[[], Any], namespace: str) -> None:
+    lock = f"{key}:refresh"
+    if _redis is not None:
+        try:
+            if not await _redis.set(lock, "1", nx=True, ex=REFRESH_LOCK_SECONDS):
+                return
+        except Exception as e:
+            logger.warning(f"Could not take refresh lock for {namespace}: {e}")
+    try:
+        # Shares the flight with any foreground miss on the same key
+        await flights.do(key, refresh)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        failures = _refresh_backoff.get(key, (0, 0.0))[0] + 1
+        delay = min(RESPONSE_CACHE_REFRESH_BACKOFF * 2 ** (failures - 1), RESPONSE_CACHE_REFRESH_BACKOFF_MAX)
+        _refresh_backoff[key] = (failures, time.monotonic() + delay)
+        _stats["refresh_failures"] += 1
+        logger.warning(f"Background refresh of {namespace} failed ({failures}x), retrying in {delay}s: {e!r}")
+    else:
+        _refresh_backoff.pop(key, None)
+        _stats["refreshes"] += 1
+    finally:
+        if _redis is not None:
+            try:
+                await _redis.delete(lock)
+            except Exception:
+                pass
+
+
+async def stop_refreshes() -> None:
+    """Cancel background refreshes still running at shutdown"""
+    tasks = list(_refreshing.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def tag_key(tag: str, version: str) -> str:
+    """Redis set listing the cache keys carrying tag under a data version"""
+    return f"{TAG_PREFIX}:v{version}:{tag}"
+
+
+async def _delete_in_batches(keys: Iterable[str]) -> int:
+    """Delete keys with one pipelined round trip per DELETE_BATCH_SIZE keys"""
+    deleted = 0
+    batch: List[str] = []
+
+    async def flush():
+        nonlocal deleted
+        pipe = _redis.pipeline(transaction=False)
+        for key in batch:
+            pipe.unlink(key)
+        deleted += sum(await pipe.execute())
+        batch.clear()
+
+    for key in keys:
+        batch.append(key)
+        if len(batch) >= DELETE_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return deleted
+
+
+async def invalidate_tags(tags: Sequence[str]) -> int:
+    """
+    Delete every cached response carrying any of tags (e.g. "dataset:supply",
+    "tenant:<id>") on all workers. Returns the number of Redis keys removed.
+    """
+    tags = list(tags)
+    datasets = [tag.split(":", 1)[1] for tag in tags if tag.startswith("dataset:")]
+    for tag in tags:
+        local_cache.delete_tag(tag)
+    if _redis is None:
+        _set_generations({dataset: _generations.get(dataset, 0) + 1 for dataset in datasets})
+        return 0
+
+    version = await get_data_version()
+    deleted = 0
+    try:
+        generations = {dataset: await _redis.hincrby(GENERATIONS_KEY, dataset, 1) for dataset in datasets}
+        _set_generations(generations)
+        for tag in tags:
+            key = tag_key(tag, version)
+            members = [member async for member in _redis.sscan_iter(key, count=DELETE_BATCH_SIZE)]
+            deleted += await _delete_in_batches(members)
+            await _redis.unlink(key)
+        await _redis.publish(INVALIDATION_CHANNEL, json.dumps({"tags": tags, "generations": generations}))
+    except Exception as e:
+        logger.warning(f"Tag invalidation failed for {tags}: {e}")
+    _stats["invalidations"] += 1
+    return deleted
+
+
+async def delete_pattern(pattern: str) -> int:
+    """
+    Delete keys matching a glob pattern using SCAN instead of KEYS, for entries
+    written before tagging existed. Slower than tags; never blocks Redis.
+    """
+    local_cache.clear()
+    if _redis is None:
+        return 0
+    try:
+        keys = [key async for key in _redis.scan_iter(match=pattern, count=DELETE_BATCH_SIZE)]
+        deleted = await _delete_in_batches(keys)
+        await _redis.publish(INVALIDATION_CHANNEL, json.dumps({"clear": True}))
+        return deleted
+    except Exception as e:
+        logger.warning(f"Pattern invalidation failed for {pattern}: {e}")
+        return 0
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters for both tiers, reported on /health"""
+    return {
+        "enabled": RESPONSE_CACHE_ENABLED,
+        "data_version": _version["value"],
+        "generations": dict(_generations),
+        "invalidation_listener": _listener["connected"],
+        "local": local_cache.stats(),
+        "redis": {
+            "connected": _redis is not None,
+            "hits": _stats["redis_hits"],
+            "misses": _stats["redis_misses"]
+        },
+        "invalidations": _stats["invalidations"],
+        "not_modified": _stats["not_modified"],
+        "stale": {
+            "hits": _stats["stale_hits"],
+            "refreshes": _stats["refreshes"],
+            "refresh_failures": _stats["refresh_failures"],
+            "refreshing": len(_refreshing),
+            "backing_off": sum(1 for _, retry_at in _refresh_backoff.values() if retry_at > time.monotonic())
+        },
+        "single_flight": flights.stats()
+    }
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop unset parameters and make values JSON-stable so that equivalent
+    requests (argument order, omitted defaults, stray whitespace) share a key
+    """
+    normalized = {}
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, BaseModel):
+            value = value.model_dump() if hasattr(value, "model_dump") else value.dict()
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        normalized[name] = value
+    return normalized
+
+
+def build_cache_key(namespace: str, params: Dict[str, Any], version: str, generation: int = 0) -> str:
+    """resp:{namespace}:v{version}[g{generation}]:{md5 of normalized params}"""
+    payload = json.dumps(normalize_params(params), sort_keys=True, default=str)
+    digest = hashlib.md5(payload.encode()).hexdigest()
+    scope = f"v{version}g{generation}" if generation else f"v{version}"
+    return f"{KEY_PREFIX}:{namespace}:{scope}:{digest}"
+
+
+def build_etag(body: bytes, representation: str) -> str:
+    """Strong ETag: changes with the encoded body and the format it is sent in"""
+    digest = hashlib.md5(body)
+    digest.update(f"|{representation}".encode())
+    return '"' + digest.hexdigest() + '"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+async def _get_or_compute(key: str, version: str, namespace: str, tags: Sequence[str], fresh_ttl: int,
+                          stale_window: int, produce: Callable[[bool], Any]) -> Tuple[Any, Optional[float]]:
+    """
+    Look key up in both tiers and otherwise compute it once (single flight).
+
+    produce(refresh) returns the value to cache, or a Response that is passed
+    through uncached; refresh is True when it runs as a background refresh.
+    Returns (encoded bytes or that Response, age in seconds if the bytes are stale).
+    """
+    expire = fresh_ttl + stale_window
+    local_ttl = min(fresh_ttl, LOCAL_CACHE_TTL)
+
+    def keep_local(body: bytes, age: float) -> None:
+        """Tier 1 copy, fresh until the entry's ttl runs out and no longer than LOCAL_CACHE_TTL"""
+        fresh_for = min(local_ttl, fresh_ttl - age)
+        # With Redis, stale reads go there so every worker sees one refresh
+        keep_for = fresh_for + (stale_window if _redis is None else 0)
+        if keep_for > 0:
+            now = time.monotonic()
+            local_cache.set(key, (body, now - age, now + fresh_for), size=len(body),
+                            ttl=keep_for, tags=tags)
+
+    async def compute(refresh: bool = False):
+        # A flight that finished while we were reading Redis may have filled tier 1
+        entry = local_cache.get(key) if not refresh and key in local_cache else None
+        if entry is not None and entry[2] > time.monotonic():
+            return entry[0]
+
+        result = await produce(refresh)
+        if isinstance(result, Response):
+            return result
+
+        # Encode once; the first response and every cache hit send these bytes
+        body = dumps(result)
+        keep_local(body, 0.0)
+        if _redis is not None:
+            try:
+                pipe = _redis.pipeline(transaction=False)
+                pipe.setex(key, expire, body)
+                for tag in tags:
+                    pipe.sadd(tag_key(tag, version), key)
+                    pipe.expire(tag_key(tag, version), expire)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Response cache write failed for {namespace}: {e}")
+        return body
+
+    def serve_stale(body: bytes, age: float) -> Tuple[bytes, float]:
+        _stats["stale_hits"] += 1
+        _schedule_refresh(key, lambda: compute(refresh=True), namespace)
+        return body, age
+
+    # Tier 1: this worker (encoded bytes, sent as they are)
+    entry = local_cache.get(key)
+    if entry is not None:
+        body, stored_at, fresh_until = entry
+        now = time.monotonic()
+        if fresh_until > now:
+            return body, None
+        if stale_window:
+            return serve_stale(body, now - stored_at)
+
+    # Tier 2: Redis; the remaining TTL tells how old the entry is
+    if _redis is not None:
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            cached, remaining_ms = await pipe.execute()
+        except Exception as e:
+            cached = None
+            logger.warning(f"Response cache read failed for {namespace}: {e}")
+        if cached:
+            _stats["redis_hits"] += 1
+            body = cached if isinstance(cached, bytes) else cached.encode()
+            age = max(expire - remaining_ms / 1000, 0.0) if remaining_ms >= 0 else 0.0
+            if age < fresh_ttl:
+                keep_local(body, age)
+                return body, None
+            if stale_window:
+                return serve_stale(body, age)
+        else:
+            _stats["redis_misses"] += 1
+
+    return await flights.do(key, compute), None
+
+
+def _datasets(namespace: str, datasets: Optional[Sequence[str]]) -> List[str]:
+    return list(datasets or [namespace.split(":")[0]])
+
+
+def _tags(namespace: str, datasets: Optional[Sequence[str]]) -> List[str]:
+    tags = [f"dataset:{dataset}" for dataset in _datasets(namespace, datasets)]
+    tags.append(f"namespace:{namespace}")
+    return tags
+
+
+def cached_response(namespace: str, ttl: Optional[int] = None, tenant_arg: Optional[str] = None,
+                    datasets: Optional[Sequence[str]] = None, stale_ttl: Optional[int] = None,
+                    dated: bool = False):
+    """
+    Cache an endpoint's JSON response.
+
+    namespace   key prefix, e.g. "bdc:comprehensive"
+    ttl         seconds an entry is fresh (defaults to RESPONSE_CACHE_TTL);
+                a new data version ends it sooner
+    tenant_arg  name of the authenticated user argument; its tenant_id becomes
+                part of the key so tenants never share entries
+    datasets    datasets the response is built from, for tag invalidation
+                (defaults to the first namespace segment, e.g. "bdc")
+    stale_ttl   seconds past ttl the entry is still served, marked stale,
+                while a background task refreshes it (defaults to
+                RESPONSE_CACHE_STALE_TTL; 0 recomputes in the request instead)
+    dated       put today's date in the key, for responses whose queries are
+                relative to CURRENT_DATE, so a new day never sees the last one's
+
+    Must be placed below @app.get/@app.post so FastAPI sees the original
+    signature (functools.wraps keeps it available through __wrapped__).
+    Entries hold the encoded JSON bytes, returned without re-serializing;
+    binary_formats.render() converts them to Arrow or MessagePack only when
+    the request's Accept header asks for it.
+    """
+    fresh_ttl = ttl or RESPONSE_CACHE_TTL
+    stale_window = RESPONSE_CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+    if tenant_arg:
+        cache_control = "private, no-cache"
+    else:
+        cache_control = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+    static_tags = _tags(namespace, datasets)
+    sources = _datasets(namespace, datasets)
+
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            params = {}
+            tags = list(static_tags)
+            for name, value in bound.arguments.items():
+                if name == tenant_arg:
+                    params["__tenant__"] = getattr(value, "tenant_id", None)
+                    tags.append(f"tenant:{params['__tenant__']}")
+                elif isinstance(value, (Request, Response)):
+                    continue
+                else:
+                    params[name] = value
+            if dated:
+                params["__date__"] = date.today().isoformat()
+
+            version = await get_data_version()
+            key = build_cache_key(namespace, params, version, generation(sources))
+
+            def respond(body: bytes, stale_age: Optional[float] = None) -> Response:
+                headers = {
+                    "ETag": build_etag(body, variant()),
+                    "Cache-Control": cache_control,
+                    "Vary": "Accept, Authorization" if tenant_arg else "Accept"
+                }
+                if etag_matches(if_none_match.get(), headers["ETag"]):
+                    if request_method.get() not in ("GET", "HEAD"):
+                        # RFC 9110: If-None-Match failing on other methods is 412, never 304
+                        return Response(status_code=412, headers=headers)
+                    _stats["not_modified"] += 1
+                    return Response(status_code=304, headers=headers)
+
+                response = render(body)
+                response.headers.update(headers)
+                if stale_age is not None:
+                    response.headers["Age"] = str(int(stale_age))
+                    response.headers["X-Cache"] = "stale"
+                    if not tenant_arg:
+                        # Nothing downstream should keep it past the refresh
+                        response.headers["Cache-Control"] = "public, max-age=0"
+                return response
+
+            async def produce(refresh: bool = False):
+                async with admission.admit(admission.WARMUP if refresh else None):
+                    return await func(*args, **kwargs)
+
+            if not RESPONSE_CACHE_ENABLED:
+                # Still coalesce identical in-flight requests to protect the pool
+                result = await flights.do(key, produce)
+                return result if isinstance(result, Response) else respond(dumps(result))
+
+            result, stale_age = await _get_or_compute(key, version, namespace, tags, fresh_ttl,
+                                                      stale_window, produce)
+            return result if isinstance(result, Response) else respond(result, stale_age)
+
+        return wrapper
+
+    return decorator
+
+
+async def cached_part(namespace: str, params: Dict[str, Any], compute: Callable[[], Any],
+                      datasets: Optional[Sequence[str]] = None, ttl: Optional[int] = None,
+                      stale_ttl: Optional[int] = None) -> bytes:
+    """
+    Cache one part of a response, e.g. a dashboard section, under its own key
+    so requests that share the part reuse it. compute() returns the part's
+    value; its encoded JSON is returned, ready for fast_json.raw().
+
+    Runs inside the calling endpoint's admission; only a background refresh of
+    a stale part is admitted on its own, at warm-up priority.
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return dumps(await compute())
+
+    async def produce(refresh: bool = False):
+        if not refresh:
+            return await compute()
+        async with admission.admit(admission.WARMUP):
+            return await compute()
+
+    version = await get_data_version()
+    key = build_cache_key(namespace, params, version, generation(_datasets(namespace, datasets)))
+    body, _ = await _get_or_compute(key, version, namespace, _tags(namespace, datasets),
+                                    ttl or RESPONSE_CACHE_TTL,
+                                    RESPONSE_CACHE_STALE_TTL if stale_ttl is None else stale_ttl, produce)
+    return body
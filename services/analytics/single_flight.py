@@ -0,0 +1,55 @@
+"""
+Single-Flight Request Coalescing
+Concurrent callers asking for the same key share one computation instead of
+each running the same query on its own pooled connection.
+
+The computation runs in its own task and every caller awaits it through
+asyncio.shield, so a caller that disconnects (and is cancelled) does not
+cancel the work the other callers are waiting for.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Coalesce concurrent calls by key (process-local)"""
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return fn()'s result, running it at most once per key at a time.
+        Exceptions raised by fn are re-raised to every waiting caller.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.followers += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Retrieve the exception so an abandoned flight does not log
+        # "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
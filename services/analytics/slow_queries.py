@@ -0,0 +1,172 @@
+"""
+Slow Query Capture
+Queries slower than SLOW_QUERY_MS are recorded in an in-process ring buffer
+with their SQL, parameters, duration and logical name (see db_metrics), and
+shown on GET /api/v2/admin/slow-queries.
+
+A sample of them (SLOW_QUERY_EXPLAIN_SAMPLE) is re-run in the background
+under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) with the same parameters, so
+the plan of an f-string-built query can be read without reassembling it by
+hand. EXPLAIN ANALYZE executes the query again, so it only runs for
+SELECT/WITH statements, inside a read-only transaction that is rolled back,
+one at a time, and at most once per query shape every
+SLOW_QUERY_EXPLAIN_COOLDOWN seconds.
+
+Statements on petroverse_core (users, tenants: password hashes, emails, API
+keys) are recorded with their parameters redacted and never EXPLAINed, as a
+plan can show parameter values inlined into its conditions.
+"""
+
+import re
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from fast_json import dumps, loads
+
+try:
+    from config import settings
+    SLOW_QUERY_MS = settings.SLOW_QUERY_MS
+    SLOW_QUERY_BUFFER_SIZE = settings.SLOW_QUERY_BUFFER_SIZE
+    SLOW_QUERY_EXPLAIN_SAMPLE = settings.SLOW_QUERY_EXPLAIN_SAMPLE
+    SLOW_QUERY_EXPLAIN_COOLDOWN = settings.SLOW_QUERY_EXPLAIN_COOLDOWN
+except (ImportError, AttributeError):
+    SLOW_QUERY_MS = 500
+    SLOW_QUERY_BUFFER_SIZE = 200
+    SLOW_QUERY_EXPLAIN_SAMPLE = 0.2
+    SLOW_QUERY_EXPLAIN_COOLDOWN = 300
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_TIMEOUT_MS = 30000
+MAX_PARAM_CHARS = 2000
+
+_pool = None
+_entries: Deque[Dict[str, Any]] = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+_explained_at: Dict[str, float] = {}
+_explaining: ContextVar[bool] = ContextVar("explaining_slow_query", default=False)
+_state = {"task": None, "next_id": 1, "captured": 0, "explained": 0}
+
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_SENSITIVE = re.compile(r"\bpetroverse_core\.", re.IGNORECASE)
+REDACTED = "[redacted]"
+
+
+def init(pool) -> None:
+    global _pool
+    _pool = pool
+
+
+def _shape(query: str) -> str:
+    """Whitespace-insensitive id of the SQL text"""
+    return hashlib.md5(" ".join(query.split()).encode()).hexdigest()[:12]
+
+
+def _params(args: Sequence[Any]) -> Any:
+    encoded = dumps(list(args))
+    if len(encoded) > MAX_PARAM_CHARS:
+        return encoded[:MAX_PARAM_CHARS].decode("utf-8", "ignore") + "..."
+    return loads(encoded)
+
+
+def record(name: str, method: str, query: str, args: Sequence[Any], seconds: float) -> None:
+    """Called by the instrumented connection after every query"""
+    if seconds * 1000 < SLOW_QUERY_MS or _explaining.get():
+        return
+
+    shape = _shape(query)
+    sensitive = bool(_SENSITIVE.search(query))
+    if sensitive:
+        params = [REDACTED] * len(args)
+    else:
+        try:
+            params = _params(args)
+        except Exception:
+            params = [repr(arg) for arg in args]
+
+    entry = {
+        "id": _state["next_id"],
+        "recorded_at": datetime.utcnow().isoformat(),
+        "query_name": name,
+        "method": method,
+        "duration_ms": round(seconds * 1000, 1),
+        "shape": shape,
+        "sql": query.strip(),
+        "params": params,
+        "explain": None,
+        "explain_status": "not_sampled"
+    }
+    _state["next_id"] += 1
+    _state["captured"] += 1
+    _entries.append(entry)
+    logger.warning(f"Slow query {name} ({shape}): {entry['duration_ms']} ms")
+
+    if not sensitive and _should_explain(query, shape):
+        entry["explain_status"] = "pending"
+        _explained_at[shape] = time.monotonic()
+        _state["task"] = asyncio.create_task(_explain(entry, query, list(args)))
+
+
+def _should_explain(query: str, shape: str) -> bool:
+    if _pool is None or not _READ_ONLY.match(query):
+        return False
+    task = _state["task"]
+    if task is not None and not task.done():
+        return False
+    last = _explained_at.get(shape)
+    if last is not None and time.monotonic() - last < SLOW_QUERY_EXPLAIN_COOLDOWN:
+        return False
+    return random.random() < SLOW_QUERY_EXPLAIN_SAMPLE
+
+
+async def _explain(entry: Dict[str, Any], query: str, args: List[Any]) -> None:
+    _explaining.set(True)
+    try:
+        async with _pool.acquire() as conn:
+            transaction = conn.transaction(readonly=True)
+            await transaction.start()
+            try:
+                await conn.execute(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                plan = await conn.fetchval(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args
+                )
+            finally:
+                await transaction.rollback()
+        entry["explain"] = loads(plan) if isinstance(plan, str) else plan
+        entry["explain_status"] = "done"
+        _state["explained"] += 1
+    except Exception as e:
+        entry["explain_status"] = f"failed: {e}"
+        logger.warning(f"EXPLAIN of slow query {entry['shape']} failed: {e}")
+
+
+def slow_queries(limit: int = 50, query_name: Optional[str] = None) -> Dict[str, Any]:
+    """Newest entries first"""
+    entries = [e for e in reversed(_entries) if query_name is None or e["query_name"] == query_name]
+    return {
+        "threshold_ms": SLOW_QUERY_MS,
+        "explain_sample": SLOW_QUERY_EXPLAIN_SAMPLE,
+        "captured": _state["captured"],
+        "explained": _state["explained"],
+        "buffered": len(_entries),
+        "entries": entries[:limit]
+    }
+
+
+async def stop() -> None:
+    task = _state["task"]
+    _state["task"] = None
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def clear() -> None:
+    _entries.clear()
+    _explained_at.clear()
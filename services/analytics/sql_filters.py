@@ -0,0 +1,116 @@
+"""
+Compiled SQL Filters
+Builds WHERE clauses with a fixed parameter slot per filter instead of
+numbering only the filters that happen to be set.
+
+Every predicate is NULL-tolerant, e.g.
+
+    ($1::date IS NULL OR t.full_date >= $1::date)
+
+so a query has exactly one SQL text whatever combination of filters a request
+uses. asyncpg prepares each text once per connection and reuses it from its
+statement cache; with hand-numbered clauses every filter combination was a
+new statement to parse and plan.
+
+Filter sets are compiled once at import time and bound per request:
+
+    FILTERS = FilterSet(
+        Predicate("start_date", "t.full_date >= {}", "date", to_date),
+        Predicate("company_ids", "f.company_id = ANY({})", "integer[]"),
+    )
+    rows = await conn.fetch(f"... WHERE {FILTERS.sql}", *FILTERS.params(start_date=start_date))
+"""
+
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+def to_date(value: Union[str, date]) -> date:
+    """'YYYY-MM-DD' strings to dates; dates pass through"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class Predicate:
+    """
+    One optional filter.
+
+    name      keyword used when binding values
+    template  SQL condition with {} where the parameter goes
+    pg_type   Postgres type of the parameter (needed for the IS NULL test)
+    convert   optional function applied to a bound value
+    """
+
+    def __init__(self, name: str, template: str, pg_type: str,
+                 convert: Optional[Callable[[Any], Any]] = None):
+        self.name = name
+        self.template = template
+        self.pg_type = pg_type
+        self.convert = convert
+
+    def compile(self, slot: int) -> str:
+        placeholder = f"${slot}::{self.pg_type}"
+        return f"({placeholder} IS NULL OR {self.template.format(placeholder)})"
+
+    def bind(self, value: Any) -> Any:
+        # Unset, empty string and empty list all mean "no filter", as before
+        if value is None or value == "" or value == []:
+            return None
+        return self.convert(value) if self.convert else value
+
+
+class FilterSet:
+    """A fixed list of predicates compiled to one canonical WHERE clause"""
+
+    def __init__(self, *predicates: Predicate, first_slot: int = 1):
+        self.predicates = predicates
+        self.first_slot = first_slot
+        self.slots: Dict[str, int] = {
+            p.name: first_slot + i for i, p in enumerate(predicates)
+        }
+        self.sql = " AND ".join(
+            p.compile(self.slots[p.name]) for p in predicates
+        ) or "TRUE"
+
+    @property
+    def next_slot(self) -> int:
+        """First parameter number free for a query's own arguments"""
+        return self.first_slot + len(self.predicates)
+
+    def slot(self, name: str) -> str:
+        """Placeholder of a filter, e.g. to reuse its value elsewhere in the query"""
+        predicate = self.predicates[self.slots[name] - self.first_slot]
+        return f"${self.slots[name]}::{predicate.pg_type}"
+
+    def params(self, **values: Any) -> List[Any]:
+        """Parameters in slot order; filters not given are bound to NULL"""
+        unknown = set(values) - set(self.slots)
+        if unknown:
+            raise TypeError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+        return [p.bind(values.get(p.name)) for p in self.predicates]
+
+
+# Date range only, on time_dimension t
+DATE_FILTERS = FilterSet(
+    Predicate("start_date", "t.full_date >= {}", "date", to_date),
+    Predicate("end_date", "t.full_date <= {}", "date", to_date),
+)
+
+# Fact-table queries written against alias f joined to time_dimension t
+FACT_FILTERS = FilterSet(
+    Predicate("start_date", "t.full_date >= {}", "date", to_date),
+    Predicate("end_date", "t.full_date <= {}", "date", to_date),
+    Predicate("company_ids", "f.company_id = ANY({})", "integer[]"),
+    Predicate("product_ids", "f.product_id = ANY({})", "integer[]"),
+)
+
+# Queries driven from the dimensions (companies c LEFT JOIN facts, products p)
+DIMENSION_FILTERS = FilterSet(
+    Predicate("start_date", "t.full_date >= {}", "date", to_date),
+    Predicate("end_date", "t.full_date <= {}", "date", to_date),
+    Predicate("company_ids", "c.company_id = ANY({})", "integer[]"),
+    Predicate("product_ids", "p.product_id = ANY({})", "integer[]"),
+)
@@ -0,0 +1,50 @@
+"""
+Prepared Statement Cache Statistics
+asyncpg keeps an LRU of prepared statements per connection. This connection
+class counts how often a query text is found there (hit) versus parsed and
+planned again (miss), so /health can show whether query shapes are being
+reused. Pass it as connection_class to asyncpg.create_pool.
+"""
+
+import hashlib
+from typing import Any, Dict
+
+import asyncpg
+
+# Distinct query texts tracked for the "shapes" figure; beyond this only the
+# hit/miss counters keep growing
+MAX_TRACKED_SHAPES = 10000
+
+_stats = {"hits": 0, "misses": 0, "uncached": 0}
+_shapes = set()
+
+
+class StatementStatsConnection(asyncpg.Connection):
+    """asyncpg connection that records statement-cache hits and misses"""
+
+    async def _get_statement(self, query, timeout, *, named=False, use_cache=True, **kwargs):
+        cache = getattr(self, "_stmt_cache", None)
+        if use_cache and not named and cache is not None:
+            # Same key asyncpg uses for its statement cache
+            record_class = kwargs.get("record_class") or self._protocol.get_record_class()
+            key = (query, record_class, kwargs.get("ignore_custom_codec", False))
+            if cache.get(key, promote=False) is not None:
+                _stats["hits"] += 1
+            else:
+                _stats["misses"] += 1
+                if len(_shapes) < MAX_TRACKED_SHAPES:
+                    _shapes.add(hashlib.md5(query.encode()).digest())
+        else:
+            _stats["uncached"] += 1
+        return await super()._get_statement(query, timeout, named=named, use_cache=use_cache, **kwargs)
+
+
+def statement_cache_stats() -> Dict[str, Any]:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "uncached": _stats["uncached"],
+        "query_shapes": len(_shapes)
+    }
@@ -0,0 +1,10 @@
+"""
+Tests for the analytics service. The service's modules are flat, imported by
+name from services/analytics; tests that need Postgres read DATABASE_URL and
+are skipped when it is unset.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
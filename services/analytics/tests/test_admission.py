@@ -0,0 +1,126 @@
+"""Admission controller: capacity, tenant and class limits, queueing and priority"""
+
+import asyncio
+
+import pytest
+
+from admission import EXPORT, INTERACTIVE, WARMUP, AdmissionController, Overloaded
+
+
+def controller(**overrides):
+    settings = dict(max_in_flight=4, interactive_reserve=1, tenant_limit=2, tenant_weights={},
+                    queue_limit=10, tenant_queue_limit=5, max_wait=0.2)
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_admits_up_to_capacity_then_queues_until_release():
+    async def scenario():
+        admission = controller(tenant_limit=10)
+        for tenant in "abcd":
+            await admission.acquire(tenant, INTERACTIVE, 1)
+        assert admission.in_flight == 4
+        waiting = asyncio.create_task(admission.acquire("e", INTERACTIVE, 1))
+        await asyncio.sleep(0)
+        assert admission.queued == 1 and not waiting.done()
+        admission._release("a", INTERACTIVE, 1, 0.1)
+        await waiting
+        assert admission.in_flight == 4 and admission.queued == 0
+    run(scenario())
+
+
+def test_wait_timeout_is_a_429_with_retry_after():
+    async def scenario():
+        admission = controller(max_in_flight=1, interactive_reserve=0, max_wait=0.01)
+        await admission.acquire("a", INTERACTIVE, 1)
+        with pytest.raises(Overloaded) as error:
+            await admission.acquire("b", INTERACTIVE, 1)
+        assert error.value.status_code == 429
+        assert int(error.value.headers["Retry-After"]) >= 1
+        assert admission.queued == 0
+    run(scenario())
+
+
+def test_tenant_limit_and_weights():
+    async def scenario():
+        admission = controller(max_in_flight=10, tenant_weights={"big": 1.5}, max_wait=0.01)
+        await admission.acquire("small", INTERACTIVE, 1)
+        await admission.acquire("small", INTERACTIVE, 1)
+        with pytest.raises(Overloaded):
+            await admission.acquire("small", INTERACTIVE, 1)
+        # Other tenants are not held back by it
+        await admission.acquire("big", INTERACTIVE, 3)
+        assert admission._blocker("big", INTERACTIVE, 1) == "tenant"
+    run(scenario())
+
+
+def test_interactive_reserve_keeps_units_from_background_work():
+    async def scenario():
+        admission = controller(tenant_limit=10)
+        for _ in range(3):
+            await admission.acquire("t", INTERACTIVE, 1)
+        assert admission._blocker("w", WARMUP, 1) == "capacity"
+        assert admission._blocker("i", INTERACTIVE, 1) is None
+    run(scenario())
+
+
+def test_higher_classes_are_dispatched_first():
+    async def scenario():
+        admission = controller(max_in_flight=1, interactive_reserve=0, tenant_limit=10, max_wait=1)
+        await admission.acquire("t", INTERACTIVE, 1)
+        order = []
+
+        async def wait(tenant, priority):
+            await admission.acquire(tenant, priority, 1)
+            order.append(priority)
+
+        warmup = asyncio.create_task(wait("w", WARMUP))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(wait("i", INTERACTIVE))
+        await asyncio.sleep(0)
+        admission._release("t", INTERACTIVE, 1, 0.0)
+        await interactive
+        admission._release("i", INTERACTIVE, 1, 0.0)
+        await warmup
+        assert order == [INTERACTIVE, WARMUP]
+    run(scenario())
+
+
+def test_queue_limit():
+    async def scenario():
+        admission = controller(max_in_flight=1, interactive_reserve=0, queue_limit=1, max_wait=1)
+        await admission.acquire("a", INTERACTIVE, 1)
+        waiting = asyncio.create_task(admission.acquire("b", INTERACTIVE, 1))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as error:
+            await admission.acquire("c", INTERACTIVE, 1)
+        assert error.value.reason == "queue full"
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert admission.queued == 0
+    run(scenario())
+
+
+def test_check_rejects_export_over_its_class_limit():
+    async def scenario():
+        admission = controller(max_in_flight=100, tenant_limit=100)
+        from admission import CLASS_LIMITS
+        for _ in range(CLASS_LIMITS[EXPORT]):
+            await admission.acquire("t", EXPORT, 1)
+        with pytest.raises(Overloaded):
+            admission.check(EXPORT)
+        admission.check(INTERACTIVE)
+    run(scenario())
+
+
+def test_admit_releases_on_exit():
+    async def scenario():
+        admission = controller()
+        async with admission.admit("t", INTERACTIVE, 2):
+            assert admission.in_flight == 2
+        assert admission.in_flight == 0 and admission.stats()["busiest_tenants"] == {}
+    run(scenario())
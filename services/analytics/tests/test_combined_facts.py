@@ -0,0 +1,98 @@
+"""Combined BDC/OMC relation against the raw fact tables (needs DATABASE_URL)"""
+
+import asyncio
+import os
+
+import pytest
+
+asyncpg = pytest.importorskip("asyncpg")
+
+from combined_facts import COMBINED_FACTS, verify_combined_row_counts
+from monthly_cube import CUBE_TABLE, FACT_TABLES, FactSource
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="DATABASE_URL is not set")
+
+
+def run(query):
+    async def main():
+        conn = await asyncpg.connect(DATABASE_URL)
+        try:
+            return await query(conn)
+        finally:
+            await conn.close()
+    return asyncio.run(main())
+
+
+def test_combined_relation_has_every_fact_row_once():
+    async def counts(conn):
+        facts = {bt: await conn.fetchval(f"SELECT COUNT(*) FROM {table}") for bt, table in FACT_TABLES.items()}
+        rows = await conn.fetch(f"SELECT business_type, COUNT(*) FROM {COMBINED_FACTS} f GROUP BY 1")
+        return facts, {row[0]: row[1] for row in rows}
+
+    facts, combined = run(counts)
+    assert combined.get("BDC", 0) == facts["BDC"]
+    assert combined.get("OMC", 0) == facts["OMC"]
+    assert sum(combined.values()) == facts["BDC"] + facts["OMC"]
+
+
+def test_combined_relation_keeps_volumes():
+    async def totals(conn):
+        facts = 0
+        for table in FACT_TABLES.values():
+            facts += await conn.fetchval(f"SELECT COALESCE(SUM(volume_mt), 0) FROM {table}")
+        combined = await conn.fetchval(f"SELECT COALESCE(SUM(volume_mt), 0) FROM {COMBINED_FACTS} f")
+        return facts, combined
+
+    facts, combined = run(totals)
+    assert combined == facts
+
+
+def test_verify_combined_row_counts_matches():
+    result = run(verify_combined_row_counts)
+    assert result["matches"], result
+
+
+def test_cube_counts_are_zero_not_null_for_companies_without_rows():
+    async def counts(conn):
+        if not await conn.fetchval(f"SELECT to_regclass('{CUBE_TABLE}') IS NOT NULL"):
+            pytest.skip("monthly cube not built")
+        sql = """
+            SELECT c.company_id, {count} as transactions
+            FROM petroverse.companies c
+            LEFT JOIN {relation} f ON c.company_id = f.company_id AND f.business_type = 'BDC'
+            GROUP BY c.company_id
+        """
+        cube = FactSource(CUBE_TABLE, is_cube=True)
+        raw = FactSource(COMBINED_FACTS, is_cube=False)
+        by_cube = await conn.fetch(sql.format(count=cube.count(), relation=cube.relation))
+        by_raw = await conn.fetch(sql.format(count=raw.count(), relation=raw.relation))
+        return dict(by_cube), dict(by_raw)
+
+    by_cube, by_raw = run(counts)
+    assert None not in by_cube.values()
+    assert by_cube == by_raw
+
+
+def test_cube_averages_skip_null_volumes_like_raw_facts():
+    async def averages(conn):
+        if not await conn.fetchval(f"SELECT to_regclass('{CUBE_TABLE}') IS NOT NULL"):
+            pytest.skip("monthly cube not built")
+        sql = """
+            SELECT f.business_type, {avg} as mean, {stddev} as spread
+            FROM {relation} f
+            GROUP BY f.business_type
+        """
+        result = []
+        for source in (FactSource(CUBE_TABLE, is_cube=True), FactSource(COMBINED_FACTS, is_cube=False)):
+            rows = await conn.fetch(sql.format(avg=source.avg("volume_mt"), stddev=source.stddev("volume_mt"),
+                                               relation=source.relation))
+            result.append({row[0]: (row[1], row[2]) for row in rows})
+        return result
+
+    by_cube, by_raw = run(averages)
+    assert by_cube.keys() == by_raw.keys()
+    for business_type, (mean, spread) in by_raw.items():
+        assert by_cube[business_type][0] == pytest.approx(mean)
+        assert by_cube[business_type][1] == pytest.approx(spread, rel=1e-6)
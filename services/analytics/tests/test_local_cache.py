@@ -0,0 +1,68 @@
+"""In-process LRU tier: recency, entry/byte limits, TTL and tags"""
+
+import time
+
+from local_cache import LRUCache
+
+
+def test_get_and_set():
+    cache = LRUCache()
+    assert cache.get("a") is None
+    assert cache.set("a", b"1", size=1)
+    assert cache.get("a") == b"1"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1, size=1)
+    cache.set("b", 2, size=1)
+    cache.get("a")
+    cache.set("c", 3, size=1)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.evictions == 1
+
+
+def test_byte_budget():
+    cache = LRUCache(max_bytes=10)
+    assert not cache.set("huge", 0, size=11)
+    cache.set("a", 1, size=6)
+    cache.set("b", 2, size=6)
+    assert "a" not in cache and "b" in cache
+    assert cache.stats()["bytes"] == 6
+
+
+def test_replacing_a_key_keeps_byte_count_exact():
+    cache = LRUCache()
+    cache.set("a", 1, size=5)
+    cache.set("a", 2, size=3)
+    assert len(cache) == 1 and cache.stats()["bytes"] == 3
+
+
+def test_entries_expire():
+    cache = LRUCache(ttl=60)
+    cache.set("a", 1, size=1, ttl=0.01)
+    cache.set("b", 2, size=1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.expirations == 1
+
+
+def test_delete_tag_and_prefix():
+    cache = LRUCache()
+    cache.set("resp:supply:1", 1, size=1, tags=["dataset:supply"])
+    cache.set("resp:supply:2", 2, size=1, tags=["dataset:supply", "tenant:t"])
+    cache.set("resp:bdc:1", 3, size=1, tags=["dataset:bdc"])
+    assert cache.delete_tag("dataset:supply") == 2
+    assert cache.delete_tag("tenant:t") == 0
+    assert cache.stats()["tags"] == 1
+    assert cache.delete_prefix("resp:bdc:") == 1
+    assert len(cache) == 0
+
+
+def test_clear():
+    cache = LRUCache()
+    cache.set("a", 1, size=4, tags=["x"])
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0 and cache.delete_tag("x") == 0
@@ -0,0 +1,43 @@
+"""Prometheus text rendering of counters, gauges and histograms"""
+
+import metrics
+
+
+def lines():
+    return metrics.render().splitlines()
+
+
+def test_counter_with_labels():
+    requests = metrics.counter("test_requests_total", "Requests", ("route",))
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    requests.inc(route='/b"\n')
+    output = lines()
+    assert "# HELP test_requests_total Requests" in output
+    assert "# TYPE test_requests_total counter" in output
+    assert 'test_requests_total{route="/a"} 3' in output
+    assert 'test_requests_total{route="/b\\"\\n"} 1' in output
+
+
+def test_gauge_set_and_collector():
+    depth = metrics.gauge("test_queue_depth", "Queue depth")
+    metrics.add_collector(lambda: depth.set(7))
+    assert "test_queue_depth 7" in lines()
+    assert "# TYPE test_queue_depth gauge" in lines()
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = metrics.histogram("test_latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(3, route="/a")
+    output = lines()
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in output
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in output
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in output
+    assert 'test_latency_seconds_sum{route="/a"} 3.55' in output
+    assert 'test_latency_seconds_count{route="/a"} 3' in output
+
+
+def test_render_ends_with_newline():
+    assert metrics.render().endswith("\n")
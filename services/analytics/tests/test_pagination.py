@@ -0,0 +1,138 @@
+"""Keyset pagination: cursor round trips, validation and generated SQL"""
+
+import asyncio
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import bdc_enhanced_analytics
+from pagination import PAGE_MAX_LIMIT, InvalidPage, Ranking, SortKey
+
+RANKING = Ranking(
+    "test:network",
+    sorts={
+        "volume": SortKey("total_volume_mt", "numeric"),
+        "count": SortKey("transaction_count", "bigint"),
+        "last": SortKey("last_date", "date"),
+        "score": SortKey("COALESCE(z_score, 0)", "float8"),
+    },
+    tiebreak=(SortKey("company_name", "text"), SortKey("transaction_id", "integer")),
+    default_sort="volume",
+    default_limit=2,
+)
+
+
+def rows(*keys):
+    return [{"page_key": key, "company_name": f"C{i}", "transaction_id": i, "x": i} for i, key in enumerate(keys)]
+
+
+def test_defaults():
+    page = RANKING.page()
+    assert (page.sort, page.order, page.limit, page.after) == ("volume", "desc", 2, None)
+    assert page.params == [None, None, None, 3]
+
+
+@pytest.mark.parametrize("sort,value", [
+    ("volume", Decimal("1234.5678")),
+    ("count", 42),
+    ("last", date(2024, 6, 1)),
+    ("score", 3.141592653589793),
+])
+def test_cursor_round_trip(sort, value):
+    page = RANKING.page(sort=sort, order="asc")
+    _, cursor = page.split([{"page_key": value, "company_name": "BDC 1", "transaction_id": 7}] * 3)
+    following = RANKING.page(cursor=cursor)
+    assert (following.sort, following.order) == (sort, "asc")
+    assert following.after == [value, "BDC 1", 7]
+    assert following.params == [value, "BDC 1", 7, 3]
+
+
+def test_split_strips_page_key_and_stops_on_the_last_page():
+    page = RANKING.page()
+    first, cursor = page.split(rows(Decimal(3), Decimal(2), Decimal(1)))
+    assert [row["x"] for row in first] == [0, 1]
+    assert "page_key" not in first[0]
+    assert cursor is not None
+    last, cursor = page.split(rows(Decimal(1)))
+    assert len(last) == 1 and cursor is None
+    assert page.describe(None) == {"sort": "volume", "order": "desc", "limit": 2, "next_cursor": None}
+
+
+def test_query_compares_sort_key_and_tiebreakers():
+    sql = " ".join(RANKING.page(sort="count").query("SELECT * FROM t WHERE a = $1", first_slot=2).split())
+    assert "(transaction_count)::bigint as page_key" in sql
+    assert "($2::bigint IS NULL OR (page_key, company_name, transaction_id) < ($2::bigint, $3::text, $4::integer))" in sql
+    assert "ORDER BY page_key DESC, company_name DESC, transaction_id DESC LIMIT $5::integer" in sql
+    ascending = RANKING.page(order="asc").query("SELECT 1", first_slot=1)
+    assert ") > ($1::numeric" in ascending and "page_key ASC" in ascending
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"sort": "bogus"},
+    {"order": "up"},
+    {"limit": 0},
+    {"limit": PAGE_MAX_LIMIT + 1},
+])
+def test_invalid_requests(kwargs):
+    with pytest.raises(InvalidPage):
+        RANKING.page(**kwargs)
+
+
+def encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).rstrip(b"=").decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encode(["test:network", "volume", "desc"]),
+    encode(["other:list", "volume", "desc", ["1", "a", 1]]),
+    encode(["test:network", ["volume"], "desc", ["1", "a", 1]]),
+    encode(["test:network", "volume", "desc", ["1", "a"]]),
+    encode(["test:network", "volume", "desc", ["one", "a", 1]]),
+    encode(["test:network", "last", "desc", ["June", "a", 1]]),
+])
+def test_malformed_or_foreign_cursors(cursor):
+    with pytest.raises(InvalidPage):
+        RANKING.page(cursor=cursor)
+
+
+def test_cursor_must_agree_with_explicit_sort():
+    _, cursor = RANKING.page(sort="count").split(rows(3, 2, 1))
+    assert RANKING.page(sort="count", order="desc", cursor=cursor).sort == "count"
+    with pytest.raises(InvalidPage):
+        RANKING.page(sort="volume", cursor=cursor)
+    with pytest.raises(InvalidPage):
+        RANKING.page(order="asc", cursor=cursor)
+
+
+class RecordingConnection:
+    """Stands in for asyncpg: keeps each statement's SQL and argument count, returns no rows"""
+
+    def __init__(self):
+        self.statements = []
+
+    async def fetch(self, sql, *args):
+        self.statements.append((sql, len(args)))
+        return []
+
+    async def fetchrow(self, sql, *args):
+        self.statements.append((sql, len(args)))
+        return None
+
+
+@pytest.mark.parametrize("analytics,ranking", [
+    (bdc_enhanced_analytics.get_bdc_operational_metrics, bdc_enhanced_analytics.OPERATIONAL_RANKING),
+    (bdc_enhanced_analytics.get_bdc_network_analytics, bdc_enhanced_analytics.NETWORK_RANKING),
+])
+def test_page_sql_is_the_same_whatever_filters_are_set(analytics, ranking):
+    def statements(**filters):
+        conn = RecordingConnection()
+        asyncio.run(analytics(conn, page=ranking.page(), **filters))
+        return conn.statements
+
+    unfiltered = statements()
+    filtered = statements(start_date="2024-01-01", company_ids=[1, 2])
+    assert filtered == unfiltered
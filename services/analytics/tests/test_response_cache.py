@@ -0,0 +1,88 @@
+"""Cache keys, ETags and If-None-Match matching"""
+
+import asyncio
+from datetime import date
+
+from pydantic import BaseModel
+
+import response_cache
+from response_cache import build_cache_key, build_etag, etag_matches, normalize_params
+
+
+class Filters(BaseModel):
+    region: str
+    years: list
+
+
+def test_normalize_params_drops_unset_and_strips():
+    assert normalize_params({"b": " x ", "a": None, "c": "", "d": 0, "e": []}) == {"b": "x", "d": 0, "e": []}
+    assert list(normalize_params({"b": 1, "a": 2})) == ["a", "b"]
+    assert normalize_params({"f": Filters(region="north", years=[2024])}) == {"f": {"region": "north", "years": [2024]}}
+
+
+def test_equivalent_requests_share_a_key():
+    assert build_cache_key("bdc:kpi", {"start": "2024-01-01", "end": None}, "3") == \
+        build_cache_key("bdc:kpi", {"start": " 2024-01-01"}, "3")
+
+
+def test_key_changes_with_version_generation_and_params():
+    key = build_cache_key("bdc:kpi", {"start": "2024-01-01"}, "3")
+    assert key.startswith("resp:bdc:kpi:v3:")
+    assert build_cache_key("bdc:kpi", {"start": "2024-01-01"}, "4") != key
+    assert build_cache_key("bdc:kpi", {"start": "2024-01-01"}, "3", 2).startswith("resp:bdc:kpi:v3g2:")
+    assert build_cache_key("bdc:kpi", {"start": "2024-02-01"}, "3") != key
+
+
+def test_etag_is_strong_and_varies_by_body_and_representation():
+    etag = build_etag(b'{"total":1}', "json")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert build_etag(b'{"total":1}', "json") == etag
+    assert build_etag(b'{"total":2}', "json") != etag
+    assert build_etag(b'{"total":1}', "arrow") != etag
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abcd"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+
+
+def test_generation_sums_known_datasets():
+    response_cache._generations.clear()
+    response_cache._set_generations({"supply": "2", "bdc": 1})
+    response_cache._set_generations({"supply": 1})
+    assert response_cache.generation(["supply"]) == 2
+    assert response_cache.generation(["supply", "bdc", "omc"]) == 3
+    response_cache._generations.clear()
+
+
+def test_dated_responses_are_recomputed_on_a_new_day(monkeypatch):
+    calls = []
+
+    class Today(date):
+        value = date(2026, 1, 31)
+
+        @classmethod
+        def today(cls):
+            return cls.value
+
+    @response_cache.cached_response("bdc:dated-test", dated=True)
+    async def endpoint():
+        calls.append(Today.value)
+        return {"day": Today.value.isoformat()}
+
+    async def scenario():
+        await endpoint()
+        await endpoint()
+        Today.value = date(2026, 2, 1)
+        return await endpoint()
+
+    monkeypatch.setattr(response_cache, "date", Today)
+    response_cache.init(None)
+    response = asyncio.run(scenario())
+    assert calls == [date(2026, 1, 31), date(2026, 2, 1)]
+    assert response.body == b'{"day":"2026-02-01"}'
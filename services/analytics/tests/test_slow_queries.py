@@ -0,0 +1,41 @@
+"""Slow query capture: threshold and redaction of credentials"""
+
+import pytest
+
+import slow_queries
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer():
+    slow_queries.clear()
+    yield
+    slow_queries.clear()
+
+
+def entries():
+    return slow_queries.slow_queries()["entries"]
+
+
+def test_fast_queries_are_not_recorded():
+    slow_queries.record("fast", "fetch", "SELECT 1", [], seconds=0.001)
+    assert entries() == []
+
+
+def test_slow_query_keeps_sql_and_parameters():
+    slow_queries.record("bdc.kpi", "fetch", "  SELECT * FROM petroverse.fact_bdc_transactions WHERE company_id = $1 ",
+                        [7], seconds=slow_queries.SLOW_QUERY_MS / 1000 + 1)
+    entry = entries()[0]
+    assert entry["sql"] == "SELECT * FROM petroverse.fact_bdc_transactions WHERE company_id = $1"
+    assert entry["params"] == [7]
+
+
+def test_core_statements_are_redacted():
+    slow_queries.record(
+        "auth.login", "fetchrow",
+        "INSERT INTO petroverse_core.users AS u (email, password_hash) VALUES ($1, $2)",
+        ["admin@demo.com", "5e884898da28047151d0e56f8dc6292773603d0d"],
+        seconds=slow_queries.SLOW_QUERY_MS / 1000 + 1
+    )
+    entry = entries()[0]
+    assert entry["params"] == [slow_queries.REDACTED] * 2
+    assert entry["explain_status"] == "not_sampled"
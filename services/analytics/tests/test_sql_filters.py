@@ -0,0 +1,56 @@
+"""Compiled filter sets: fixed slots, NULL-tolerant predicates, binding"""
+
+from datetime import date, datetime
+
+import pytest
+
+from sql_filters import DATE_FILTERS, FACT_FILTERS, FilterSet, Predicate, to_date
+
+
+def test_one_sql_text_with_a_slot_per_filter():
+    assert FACT_FILTERS.sql == (
+        "($1::date IS NULL OR t.full_date >= $1::date) AND "
+        "($2::date IS NULL OR t.full_date <= $2::date) AND "
+        "($3::integer[] IS NULL OR f.company_id = ANY($3::integer[])) AND "
+        "($4::integer[] IS NULL OR f.product_id = ANY($4::integer[]))"
+    )
+    assert FACT_FILTERS.next_slot == 5
+
+
+def test_params_in_slot_order_with_unset_filters_null():
+    assert FACT_FILTERS.params(product_ids=[3], start_date="2024-01-31") == [
+        date(2024, 1, 31), None, None, [3]
+    ]
+
+
+@pytest.mark.parametrize("value", [None, "", []])
+def test_empty_values_mean_no_filter(value):
+    assert FACT_FILTERS.params(company_ids=value) == [None] * 4
+
+
+def test_unknown_filter_is_an_error():
+    with pytest.raises(TypeError):
+        DATE_FILTERS.params(region="north")
+
+
+def test_first_slot_and_slot_placeholder():
+    filters = FilterSet(
+        Predicate("region", "s.region = {}", "text"),
+        Predicate("year", "s.year = {}", "integer"),
+        first_slot=3,
+    )
+    assert filters.sql == "($3::text IS NULL OR s.region = $3::text) AND ($4::integer IS NULL OR s.year = $4::integer)"
+    assert filters.slot("year") == "$4::integer"
+    assert filters.next_slot == 5
+
+
+def test_no_predicates_compile_to_true():
+    assert FilterSet().sql == "TRUE"
+
+
+def test_to_date():
+    assert to_date("2024-02-29") == date(2024, 2, 29)
+    assert to_date(date(2024, 1, 1)) == date(2024, 1, 1)
+    assert to_date(datetime(2024, 1, 1, 12, 30)) == date(2024, 1, 1)
+    with pytest.raises(ValueError):
+        to_date("01/02/2024")